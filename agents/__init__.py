@@ -1,23 +1,26 @@
-"""
-Multi-Agent Module
-
-Contains specialized agents for the research pipeline:
-- run_supervisor: Routes work to researchers or writer based on context
-- run_researcher: Gathers information from web sources
-- run_writer: Synthesizes research into documents
-- human_review_node: Human-in-the-loop review checkpoint
-"""
-
-from .supervisor import run_supervisor
-from .researcher import run_researcher
-from .writer import run_writer
-from .human_review import human_review_node
-from .state import AgentState
-
-__all__ = [
-    "run_supervisor",
-    "run_researcher",
-    "run_writer",
-    "human_review_node",
-    "AgentState",
-]
+"""
+Multi-Agent Module
+
+Contains specialized agents for the research pipeline:
+- run_supervisor: Routes work to researchers or writer based on context
+- run_researcher: Gathers information from web sources
+- run_writer: Synthesizes research into documents
+- human_review_node: Human-in-the-loop review checkpoint
+- compact_records: Deduplicates and budgets research records across rounds
+"""
+
+from .supervisor import run_supervisor
+from .researcher import run_researcher
+from .writer import run_writer
+from .human_review import human_review_node
+from .compaction import compact_records
+from .state import AgentState
+
+__all__ = [
+    "run_supervisor",
+    "run_researcher",
+    "run_writer",
+    "human_review_node",
+    "compact_records",
+    "AgentState",
+]
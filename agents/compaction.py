@@ -0,0 +1,217 @@
+"""
+Research Compaction
+
+Keeps the research records in play from growing with every feedback round:
+1. Deduplication: facts (lines) already present in earlier rounds or earlier
+   findings, verbatim or nearly so, are dropped.
+2. Budget: if the result is still over RESEARCH_MAX_TOKENS, the earlier
+   rounds (then, if needed, everything) are condensed into a notes record
+   with the map step shared with the map-reduce writer.
+
+Each call returns a per-round report of token counts so the savings are visible.
+"""
+
+import asyncio
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from prompts import prompt_messages
+from utils import ResearchRecord, ResearchStore, get_llm, count_tokens, render_records, split_by_tokens
+
+# Subtopic of the records holding condensed notes
+CONDENSED_SUBTOPIC = "Condensed notes from earlier research"
+
+# Map rounds before giving up on fitting the notes into the budget
+MAX_REDUCE_ROUNDS = 3
+
+# Lines sharing at least this fraction of word 3-grams count as duplicates
+NEAR_DUPLICATE_SIMILARITY = 0.8
+SHINGLE_SIZE = 3
+
+_WORD = re.compile(r"\w+")
+# Section markers and other short lines are kept even when repeated
+_MIN_FACT_WORDS = 4
+
+
+def _shingles(words: List[str]) -> Set[Tuple[str, ...]]:
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+class FactIndex:
+    """
+    Set of facts seen so far with exact and near-duplicate lookup.
+
+    Near duplicates are found through an inverted index from word 3-grams to
+    facts, so each lookup only compares against facts sharing a 3-gram.
+    """
+
+    def __init__(self):
+        self._exact: Set[str] = set()
+        self._shingles: List[Set[Tuple[str, ...]]] = []
+        self._by_shingle: Dict[Tuple[str, ...], List[int]] = {}
+
+    @staticmethod
+    def is_fact(line: str) -> bool:
+        """True for lines long enough to be compared (not headings or markers)."""
+        return len(_WORD.findall(line)) >= _MIN_FACT_WORDS
+
+    def add_if_new(self, line: str) -> bool:
+        """Record `line` and return True, or return False if it duplicates a known fact."""
+        if not self.is_fact(line):
+            return True
+        words = _WORD.findall(line.lower())
+        key = " ".join(words)
+        if key in self._exact:
+            return False
+
+        shingles = _shingles(words)
+        overlaps: Dict[int, int] = {}
+        for shingle in shingles:
+            for fact in self._by_shingle.get(shingle, ()):
+                overlaps[fact] = overlaps.get(fact, 0) + 1
+        for fact, shared in overlaps.items():
+            union = len(shingles) + len(self._shingles[fact]) - shared
+            if shared / union >= NEAR_DUPLICATE_SIMILARITY:
+                return False
+
+        self._exact.add(key)
+        fact_id = len(self._shingles)
+        self._shingles.append(shingles)
+        for shingle in shingles:
+            self._by_shingle.setdefault(shingle, []).append(fact_id)
+        return True
+
+
+def _deduplicate_text(index: FactIndex, text: str) -> Tuple[str, bool]:
+    """
+    Drop lines of `text` that repeat a fact already in `index`.
+
+    Returns:
+        The remaining text and whether it still contains any fact
+    """
+    kept, has_facts = [], False
+    for line in text.splitlines():
+        if not line.strip():
+            kept.append(line)
+        elif index.add_if_new(line):
+            kept.append(line)
+            has_facts = has_facts or FactIndex.is_fact(line)
+    # Collapse the blank runs left behind by dropped lines
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip("\n"), has_facts
+
+
+async def condense_research(research_data: str, original_query: str, max_tokens: int) -> str:
+    """
+    Condense research into notes that fit in `max_tokens`.
+
+    Splits the research into chunks of WRITER_CHUNK_TOKENS (default 8000),
+    condenses each into notes in parallel (at most WRITER_MAP_CONCURRENCY
+    calls at once, default 4), and repeats on the notes while they are still
+    over `max_tokens`.
+
+    Returns:
+        The concatenated notes
+    """
+    model = get_llm(temperature=0)
+    chunk_tokens = min(int(os.getenv("WRITER_CHUNK_TOKENS", "8000")), max_tokens)
+    semaphore = asyncio.Semaphore(int(os.getenv("WRITER_MAP_CONCURRENCY", "4")))
+
+    async def condense(chunk: str, index: int, total: int) -> str:
+        async with semaphore:
+            response = await model.ainvoke(prompt_messages(
+                "writer_notes", "writer_notes_excerpt",
+                original_query=original_query, index=index, total=total, chunk=chunk,
+            ))
+        return response.content
+
+    text = research_data
+    for _ in range(MAX_REDUCE_ROUNDS):
+        chunks = split_by_tokens(text, chunk_tokens)
+        print(f"   🗂️  Condensing {count_tokens(text)} tokens of research in {len(chunks)} chunks...")
+        notes = await asyncio.gather(*(
+            condense(chunk, i, len(chunks)) for i, chunk in enumerate(chunks, 1)
+        ))
+        text = "\n\n".join(f"--- NOTES {i} ---\n{n}" for i, n in enumerate(notes, 1))
+        if count_tokens(text) <= max_tokens:
+            break
+
+    return text
+
+
+async def compact_records(
+    store: ResearchStore,
+    run_id: str,
+    existing_ids: List[int],
+    new_ids: List[int],
+    original_query: str,
+    max_tokens: Optional[int] = None,
+) -> Tuple[List[int], dict]:
+    """
+    Merge a new round of research records into the existing ones.
+
+    New records whose facts all appeared earlier are dropped; records with
+    some repeated lines are replaced by a trimmed copy. Records nothing was
+    removed from are kept as they are, even if no line is long enough to
+    count as a fact. Records are never
+    modified: trimmed copies and condensed notes are appended to the store.
+
+    Args:
+        store: ResearchStore holding the records
+        run_id: Run the new records belong to
+        existing_ids: research_record_ids from earlier rounds
+        new_ids: Record ids added by this round's researchers
+        original_query: The user's request, given to the condensing model
+        max_tokens: Token budget (default: $RESEARCH_MAX_TOKENS or 16000)
+
+    Returns:
+        The record ids making up the research now, and a report with token
+        counts: "raw" (everything kept), "deduplicated", "final" and
+        "condensed" (whether the model was used to fit the budget)
+    """
+    if max_tokens is None:
+        max_tokens = int(os.getenv("RESEARCH_MAX_TOKENS", "16000"))
+
+    existing = store.get(existing_ids)
+    new = store.get(new_ids)
+    index = FactIndex()
+    for record in existing:
+        for line in record.text.splitlines():
+            index.add_if_new(line)
+
+    kept: List[ResearchRecord] = []
+    for record in new:
+        text, has_facts = _deduplicate_text(index, record.text)
+        if text != record.text:
+            # Only drop a record when deduplication removed every fact it had;
+            # records made of short lines (lists, names, dates) have none to remove
+            if not has_facts:
+                continue
+            record = store.get([store.add(run_id, record.subtopic, text, record.url)])[0]
+        kept.append(record)
+
+    def tokens(records: List[ResearchRecord]) -> int:
+        return sum(r.tokens for r in records)
+
+    report = {
+        "raw": tokens(existing) + tokens(new),
+        "deduplicated": tokens(existing) + tokens(kept),
+        "condensed": False,
+    }
+    records = existing + kept
+
+    if report["deduplicated"] > max_tokens:
+        report["condensed"] = True
+        new_tokens = tokens(kept)
+        if existing and new_tokens <= max_tokens // 2:
+            # Keep the new round verbatim; condense what came before into the rest
+            notes = await condense_research(render_records(existing), original_query, max_tokens - new_tokens)
+            records = store.get([store.add(run_id, CONDENSED_SUBTOPIC, notes)]) + kept
+        if tokens(records) > max_tokens:
+            notes = await condense_research(render_records(records), original_query, max_tokens)
+            records = store.get([store.add(run_id, CONDENSED_SUBTOPIC, notes)])
+
+    report["final"] = tokens(records)
+    return [r.id for r in records], report
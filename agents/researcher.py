@@ -1,70 +1,208 @@
-"""
-Researcher Agent
-
-Gathers information from web sources, Wikipedia, and URLs.
-Uses a ToolNode-based loop for tool execution.
-"""
-
-import os
-
-from langchain_core.messages import SystemMessage
-from langgraph.prebuilt import ToolNode
-
-from .state import AgentState
-from prompts import load_prompt
-from utils import get_llm
-
-
-async def run_researcher(state: AgentState, tools: list) -> dict:
-    """
-    Execute the researcher with a ToolNode-based loop.
-
-    Args:
-        state: Current agent state
-        tools: List of research tools (web_search, fetch_webpage, wikipedia_search)
-
-    Returns:
-        Updated state with research_data
-    """
-    print("\n🔍 RESEARCHER Starting...")
-
-    model = get_llm(temperature=0.1)
-
-    system_prompt = load_prompt("researcher")
-    model_with_tools = model.bind_tools(tools)
-    tool_node = ToolNode(tools)
-
-    messages = [
-        SystemMessage(content=system_prompt),
-        *list(state["messages"]),
-    ]
-
-    # ToolNode-based loop
-    iterations = 0
-    max_iterations = int(os.getenv("RESEARCHER_MAX_ITERATIONS", "5"))
-    while iterations < max_iterations:
-        iterations += 1
-        response = await model_with_tools.ainvoke(messages)
-        messages.append(response)
-
-        # No tool calls → model is done
-        if not response.tool_calls:
-            break
-
-        # Execute tool calls via ToolNode
-        tool_result = await tool_node.ainvoke({"messages": messages})
-        messages.extend(tool_result["messages"])
-
-    # Extract research data from the final AI message
-    research_data = ""
-    for msg in reversed(messages):
-        if hasattr(msg, "content") and msg.content and not getattr(msg, "tool_calls", None):
-            research_data = msg.content
-            break
-
-    print(f"✅ RESEARCHER Complete - Gathered {len(research_data)} chars of research")
-
-    return {
-        "messages": messages,
-        "parallel_results": [research_data],
-    }
+"""
+Researcher Agent
+
+Gathers information from web sources, Wikipedia, and URLs.
+
+Runs a tool-calling loop: the tool calls of one model turn run concurrently,
+each with its own timeout (RESEARCHER_TOOL_TIMEOUT), and each model call and
+tool call holds a slot of the shared research semaphore (RESEARCH_CONCURRENCY),
+so however many researchers are fanned out, only that many calls are in flight.
+
+Only the latest round of tool outputs is sent to the model in full; older
+outputs, which the model has already read, are cut to
+RESEARCHER_OLD_TOOL_OUTPUT_CHARS. The loop stops at RESEARCHER_MAX_ITERATIONS
+model calls, or earlier once RESEARCHER_MAX_INPUT_TOKENS input tokens or
+RESEARCHER_TIME_BUDGET seconds are spent; the model is then asked for its
+summary without tools.
+"""
+
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from .state import AgentState, shared_scratchpad
+from prompts import load_prompt
+from utils import bind_tools_cached, count_tokens, get_llm, get_research_store, research_slot
+
+
+async def _run_tool_call(tools_by_name: dict, call: dict, timeout: float) -> ToolMessage:
+    """Run one tool call; errors and timeouts become error ToolMessages the model can read."""
+    tool = tools_by_name.get(call["name"])
+    if tool is None:
+        return ToolMessage(
+            content=f"Error: unknown tool '{call['name']}'",
+            tool_call_id=call["id"], name=call["name"], status="error",
+        )
+    try:
+        async with research_slot():
+            output = await asyncio.wait_for(tool.ainvoke(call["args"]), timeout=timeout)
+    except asyncio.TimeoutError:
+        return ToolMessage(
+            content=f"Error: {call['name']} timed out after {timeout:g}s",
+            tool_call_id=call["id"], name=call["name"], status="error",
+        )
+    except Exception as exc:
+        return ToolMessage(
+            content=f"Error: {call['name']} failed: {exc}",
+            tool_call_id=call["id"], name=call["name"], status="error",
+        )
+    if isinstance(output, ToolMessage):
+        return output
+    content = output if isinstance(output, (str, list)) else str(output)
+    return ToolMessage(content=content, tool_call_id=call["id"], name=call["name"])
+
+
+def _truncate_old_tool_outputs(messages: List[BaseMessage], max_chars: int) -> List[BaseMessage]:
+    """
+    Copy of `messages` with tool outputs before the last model turn cut to `max_chars`.
+
+    The model has already read them in full; the latest round is left intact.
+    """
+    last_turn = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    result = []
+    for i, message in enumerate(messages):
+        content = message.content
+        if i < last_turn and isinstance(message, ToolMessage) and isinstance(content, str) and len(content) > max_chars:
+            message = message.model_copy(update={
+                "content": f"{content[:max_chars]}\n[... {len(content) - max_chars} more characters already read]",
+            })
+        result.append(message)
+    return result
+
+
+def _input_tokens(response: AIMessage, sent: List[BaseMessage]) -> int:
+    """Input tokens of a model call: reported usage if available, else an estimate."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage and usage.get("input_tokens"):
+        return usage["input_tokens"]
+    return sum(count_tokens(m.content if isinstance(m.content, str) else str(m.content)) for m in sent)
+
+
+def _final_answer(messages: List[BaseMessage]) -> Optional[str]:
+    """The content of the last model turn if it answered without calling tools."""
+    last = messages[-1]
+    if isinstance(last, AIMessage) and last.content and not last.tool_calls:
+        return last.content
+    return None
+
+
+async def run_researcher(state: AgentState, tools: list) -> dict:
+    """
+    Execute the researcher's tool-calling loop.
+
+    Args:
+        state: Researcher state: the subtopic as a HumanMessage and the research_store_id
+        tools: List of research tools (web_search, fetch_webpage, wikipedia_search)
+
+    Returns:
+        Updated state with the ids of the findings added to the ResearchStore,
+        a short result message and the call's metrics (the full message
+        history only with AGENT_SCRATCHPAD=shared)
+    """
+    print("\n🔍 RESEARCHER Starting...")
+    start = time.perf_counter()
+
+    model = get_llm(temperature=0.1)
+
+    system_prompt = load_prompt("researcher")
+    model_with_tools = bind_tools_cached(model, tools)
+    tools_by_name = {t.name: t for t in tools}
+
+    messages = [
+        SystemMessage(content=system_prompt),
+        *list(state["messages"]),
+    ]
+
+    max_iterations = int(os.getenv("RESEARCHER_MAX_ITERATIONS", "5"))
+    max_input_tokens = int(os.getenv("RESEARCHER_MAX_INPUT_TOKENS", "60000"))
+    time_budget = float(os.getenv("RESEARCHER_TIME_BUDGET", "180"))
+    tool_timeout = float(os.getenv("RESEARCHER_TOOL_TIMEOUT", "30"))
+    old_output_chars = int(os.getenv("RESEARCHER_OLD_TOOL_OUTPUT_CHARS", "1500"))
+
+    iterations = 0
+    tool_calls = 0
+    tool_errors = 0
+    tool_output_chars = 0
+    input_tokens = 0
+    stop_reason = "iterations"
+    while iterations < max_iterations:
+        if input_tokens >= max_input_tokens:
+            stop_reason = "tokens"
+            break
+        if time.perf_counter() - start >= time_budget:
+            stop_reason = "time"
+            break
+
+        iterations += 1
+        sent = _truncate_old_tool_outputs(messages, old_output_chars)
+        # One slot per model call, shared with all other researchers
+        async with research_slot():
+            response = await model_with_tools.ainvoke(sent)
+        input_tokens += _input_tokens(response, sent)
+        messages.append(response)
+
+        # No tool calls → model is done
+        if not response.tool_calls:
+            stop_reason = "answer"
+            break
+
+        # Independent tool calls of this turn run concurrently
+        tool_messages = await asyncio.gather(
+            *(_run_tool_call(tools_by_name, call, tool_timeout) for call in response.tool_calls)
+        )
+        messages.extend(tool_messages)
+        tool_calls += len(tool_messages)
+        tool_errors += sum(1 for m in tool_messages if m.status == "error")
+        tool_output_chars += sum(len(str(m.content)) for m in tool_messages)
+
+    research_data = _final_answer(messages)
+    if research_data is None:
+        # Budget spent before the model answered: ask for the summary, without tools
+        messages.append(HumanMessage(content=load_prompt("researcher_wrap_up")))
+        sent = _truncate_old_tool_outputs(messages, old_output_chars)
+        async with research_slot():
+            response = await model.ainvoke(sent)
+        input_tokens += _input_tokens(response, sent)
+        messages.append(response)
+        research_data = response.content if isinstance(response.content, str) else str(response.content)
+
+    subtopic = state["messages"][0].content if state["messages"] else ""
+    record_ids = get_research_store().add_findings(state.get("research_store_id", ""), subtopic, research_data)
+
+    print(
+        f"✅ RESEARCHER Complete - Gathered {len(research_data)} chars of research in {len(record_ids)} findings"
+        f" ({iterations} model calls, {input_tokens} input tokens)"
+    )
+
+    metrics = {
+        "agent": "researcher",
+        "subtopic": subtopic,
+        "iterations": iterations,
+        "stop_reason": stop_reason,
+        "tool_calls": tool_calls,
+        "tool_errors": tool_errors,
+        "tool_output_chars": tool_output_chars,
+        "input_tokens": input_tokens,
+        "scratchpad_messages": len(messages),
+        "scratchpad_chars": sum(len(str(m.content)) for m in messages),
+        "findings": len(record_ids),
+        "research_chars": len(research_data),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    if shared_scratchpad():
+        result_messages = messages
+    else:
+        # The findings live in the ResearchStore; the shared history only needs a note
+        result_messages = [AIMessage(
+            content=f"Researched '{subtopic}': {len(record_ids)} findings ({len(research_data)} chars) from {tool_calls} tool calls.",
+            name="researcher",
+        )]
+
+    return {
+        "messages": result_messages,
+        "parallel_results": record_ids,
+        "agent_metrics": [metrics],
+    }
@@ -1,33 +1,61 @@
-"""
-Agent State Definition
-
-Defines the shared state passed between agents in the pipeline.
-"""
-
-import operator
-from typing import TypedDict, Annotated, List, Optional
-from langchain_core.messages import BaseMessage
-from langgraph.graph.message import add_messages
-
-
-class AgentState(TypedDict):
-    """
-    Shared state for the multi-agent pipeline.
-
-    Attributes:
-        messages: Annotated[List[BaseMessage], add_messages]
-        research_data: str - Final aggregated research data
-        parallel_results: Annotated[List[str], operator.add] - Individual research snippets from fan-out
-        draft_document: str
-        subtopics: List[str]
-        human_feedback: str
-        current_phase: str
-    """
-    messages: Annotated[List[BaseMessage], add_messages]
-    research_data: str
-    parallel_results: Annotated[List[str], operator.add]
-    draft_document: str
-    subtopics: List[str]
-    human_feedback: str
-    rewrite_instructions: str
-    current_phase: str
+"""
+Agent State Definition
+
+Defines the shared state passed between agents in the pipeline.
+"""
+
+import operator
+import os
+from typing import TypedDict, Annotated, List, Optional
+from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
+
+
+def extend_or_reset(current: Optional[list], update: Optional[list]) -> list:
+    """List reducer like operator.add, except that an update of None clears the list."""
+    if update is None:
+        return []
+    return (current or []) + update
+
+
+class AgentState(TypedDict):
+    """
+    Shared state for the multi-agent pipeline.
+
+    Attributes:
+        messages: Annotated[List[BaseMessage], add_messages]
+        research_store_id: str - Run id under which research records are kept in the ResearchStore
+        research_record_ids: List[int] - Records that make up the current research (replaced by each merge)
+        parallel_results: Annotated[List[int], extend_or_reset] - Record ids added by this round's
+            researchers (cleared by the merge)
+        research_rounds: Annotated[List[dict], operator.add] - Token report of each merge (see compact_records)
+        agent_metrics: Annotated[List[dict], operator.add] - Per-call metrics reported by researchers and the writer
+        draft_document: str
+        subtopics: List[str]
+        human_feedback: str
+        current_phase: str
+    """
+    messages: Annotated[List[BaseMessage], add_messages]
+    research_store_id: str
+    research_record_ids: List[int]
+    parallel_results: Annotated[List[int], extend_or_reset]
+    research_rounds: Annotated[List[dict], operator.add]
+    agent_metrics: Annotated[List[dict], operator.add]
+    draft_document: str
+    subtopics: List[str]
+    human_feedback: str
+    rewrite_instructions: str
+    current_phase: str
+
+
+def shared_scratchpad() -> bool:
+    """
+    Whether agents return their whole working message list to the shared state.
+
+    By default (AGENT_SCRATCHPAD=local) the system prompt, tool calls and tool
+    outputs of a researcher or writer stay local to the call; only its result
+    message and metrics reach AgentState, which keeps messages and every
+    checkpoint small. AGENT_SCRATCHPAD=shared restores the full history, e.g.
+    for debugging a run.
+    """
+    return os.getenv("AGENT_SCRATCHPAD", "local").lower() == "shared"
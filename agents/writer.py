@@ -1,89 +1,130 @@
-"""
-Writer Agent
-
-Synthesizes research into well-structured documents.
-Handles both initial drafts and revisions based on human feedback.
-Non-agentic: performs a single LLM call and saves the output via a local utility.
-"""
-
-from langchain_core.messages import HumanMessage, SystemMessage
-
-from .state import AgentState
-from prompts import load_prompt
-from utils import get_llm
-
-
-async def run_writer(state: AgentState, tools: list = None) -> dict:
-    """
-    Execute the writer by generating content.
-
-    Args:
-        state: Current agent state with research_data and optional human_feedback
-        tools: Ignored (kept for backward compatibility with the signature)
-
-    Returns:
-        Updated state with draft_document
-    """
-    print("\n✍️ WRITER Starting...")
-
-    research_data = state.get("research_data", "")
-    human_feedback = state.get("human_feedback", "")
-    rewrite_instructions = state.get("rewrite_instructions", "")
-    existing_draft = state.get("draft_document", "")
-    original_query = state["messages"][0].content if state["messages"] else ""
-
-    if rewrite_instructions and existing_draft:
-        # Revision mode — improve existing draft based on supervisor instructions
-        writing_prompt = f"""Revise the following document based on the supervisor's instructions.
-
-                ORIGINAL REQUEST:
-                {original_query}
-
-                CURRENT DRAFT:
-                {existing_draft}
-
-                INSTRUCTIONS:
-                {rewrite_instructions}
-
-                (Reference) RAW HUMAN FEEDBACK:
-                {human_feedback}
-
-                (Reference) RESEARCH DATA:
-                {research_data[:3000]}
-
-                Please revise the document and provide the full updated content directly."""
-    else:
-        # Initial draft mode
-        writing_prompt = f"""Based on the following research data, create a comprehensive document.
-
-                ORIGINAL REQUEST:
-                {original_query}
-
-                RESEARCH DATA:
-                {research_data}
-
-                Please synthesize this into a well-structured document and provide the full content directly."""
-
-    model = get_llm(temperature=0)
-    system_prompt = load_prompt("writer")
-
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=writing_prompt),
-    ]
-
-    # Simple single LLM call
-    response = await model.ainvoke(messages)
-    draft = response.content
-
-    messages.append(response)
-
-    mode = "Revised" if rewrite_instructions else "Created initial"
-    print(f"✅ WRITER Complete - {mode} draft document")
-
-    return {
-        "messages": messages,
-        "draft_document": draft,
-        "current_phase": "human_review",
-        "rewrite_instructions": "",  # Clear instructions after incorporating them
-    }
+"""
+Writer Agent
+
+Synthesizes research into well-structured documents.
+Handles both initial drafts and revisions based on human feedback.
+Non-agentic: performs a single streamed LLM call. Tokens are emitted on the
+LangGraph "custom" stream as they arrive so the UI can show the draft while it
+is being written; the final draft_document is the concatenated stream.
+
+Research comes from the ResearchStore records listed in research_record_ids.
+When they exceed WRITER_MAX_RESEARCH_TOKENS, the writer switches to
+map-reduce: research is split into chunks that are condensed into notes in
+parallel, and the draft is written from the notes. Revisions only see the
+top BM25-ranked records for the instructions and feedback.
+"""
+
+import os
+import time
+
+from langchain_core.messages import AIMessageChunk, message_chunk_to_message
+from langgraph.config import get_stream_writer
+
+from .compaction import condense_research
+from .state import AgentState, shared_scratchpad
+from prompts import log_prompt_tokens, prompt_messages
+from utils import astream_cached, get_llm, get_research_store, render_records
+
+
+def _stream_writer():
+    """Custom stream writer of the running graph, or a no-op outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+async def run_writer(state: AgentState, tools: list = None) -> dict:
+    """
+    Execute the writer by generating content.
+
+    Args:
+        state: Current agent state with research_record_ids and optional human_feedback
+        tools: Ignored (kept for backward compatibility with the signature)
+
+    Returns:
+        Updated state with draft_document and the call's metrics
+    """
+    print("\n✍️ WRITER Starting...")
+    start = time.perf_counter()
+
+    record_ids = state.get("research_record_ids") or []
+    human_feedback = state.get("human_feedback", "")
+    rewrite_instructions = state.get("rewrite_instructions", "")
+    existing_draft = state.get("draft_document", "")
+    original_query = state["messages"][0].content if state["messages"] else ""
+
+    if rewrite_instructions and existing_draft:
+        # Revision mode — improve existing draft based on supervisor instructions,
+        # with the research records most relevant to them
+        references = get_research_store().select(
+            record_ids,
+            f"{rewrite_instructions} {human_feedback}",
+            int(os.getenv("WRITER_REVISION_RESEARCH_TOKENS", "1500")),
+            k=int(os.getenv("WRITER_REVISION_TOP_K", "8")),
+        )
+        research_data = render_records(references)
+
+        template = "writer_revision"
+        values = {
+            "original_query": original_query,
+            "research_data": research_data,
+            "existing_draft": existing_draft,
+            "rewrite_instructions": rewrite_instructions,
+            "human_feedback": human_feedback,
+        }
+    else:
+        # Initial draft mode; condense research that doesn't fit the budget
+        records = get_research_store().get(record_ids)
+        research_data = render_records(records)
+        max_research_tokens = int(os.getenv("WRITER_MAX_RESEARCH_TOKENS", "24000"))
+        research_tokens = sum(r.tokens for r in records)
+        if research_tokens > max_research_tokens:
+            print(f"   📚 Research is {research_tokens} tokens (budget {max_research_tokens}), using map-reduce")
+            research_data = await condense_research(research_data, original_query, max_research_tokens)
+
+        template = "writer_draft"
+        values = {"original_query": original_query, "research_data": research_data}
+
+    # stream_usage: token counts of streamed drafts reach usage callbacks too
+    model = get_llm(temperature=0, stream_usage=True)
+    # Fixed instructions first, then the values from least to most variable
+    messages = prompt_messages("writer", template, **values)
+    prompt_stats = log_prompt_tokens("Writer", messages, template)
+
+    # Single LLM call, streamed token by token
+    write = _stream_writer()
+    write({"type": "draft_start", "node": "writer"})
+    response = AIMessageChunk(content="")
+    async for chunk in astream_cached(model, messages):
+        response += chunk
+        if chunk.content:
+            write({"type": "draft_token", "node": "writer", "content": chunk.content})
+    write({"type": "draft_end", "node": "writer"})
+
+    response = message_chunk_to_message(response)
+    draft = response.content
+
+    prompt_chars = sum(len(m.content) for m in messages)
+    messages.append(response)
+
+    mode = "Revised" if rewrite_instructions else "Created initial"
+    print(f"✅ WRITER Complete - {mode} draft document")
+
+    metrics = {
+        "agent": "writer",
+        "mode": "revision" if rewrite_instructions else "initial",
+        "prompt_chars": prompt_chars,
+        **prompt_stats,
+        "draft_chars": len(draft),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+    return {
+        # The prompt (system prompt and research) stays local unless AGENT_SCRATCHPAD=shared
+        "messages": messages if shared_scratchpad() else [response],
+        "agent_metrics": [metrics],
+        "draft_document": draft,
+        "current_phase": "human_review",
+        "rewrite_instructions": "",  # Clear instructions after incorporating them
+    }
@@ -0,0 +1,250 @@
+"""
+Headless Batch Runner
+
+Runs many research queries from a JSONL file without a terminal in the loop.
+Each line is one query:
+
+    {"id": "agi", "query": "State of AGI research", "feedback": ["Add a timeline"]}
+
+Only "query" is required. Every query runs as its own graph thread; at most
+--concurrency of them run at once (the research semaphore and rate limit in
+utils.limits still apply across all of them). At human review, the scripted
+"feedback" entries are applied in order and the draft is then approved.
+
+For each query the approved draft is written to <out>/<id>.md, and a line
+with its status, timing and token usage to <out>/report.jsonl. The aggregate
+throughput goes to <out>/summary.json and the terminal.
+
+Usage:
+    python batch.py queries.jsonl [--out DIR] [--concurrency N] [--verbose]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+
+load_dotenv()
+
+import main  # noqa: E402
+from tools import close_tools, release_fetch_registry  # noqa: E402
+from utils import (  # noqa: E402
+    close_checkpointer,
+    close_llm_cache,
+    close_llm_clients,
+    close_research_store,
+    llm_cache_stats,
+    prune_checkpoints,
+)
+
+PROJECT_DIR = Path(__file__).parent
+DEFAULT_OUTPUT_DIR = PROJECT_DIR / "output" / "batch"
+
+# Scripted reply that ends a query's review loop
+APPROVE = "approve"
+
+
+def load_queries(path: Path) -> List[dict]:
+    """
+    Read queries from a JSONL file, giving each a unique id.
+
+    Blank lines are skipped. Ids default to the line number; repeated ids
+    get a numeric suffix.
+    """
+    queries, seen = [], set()
+    for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if not entry.get("query"):
+            raise ValueError(f"{path}:{number}: missing 'query'")
+        base = re.sub(r"[^\w.-]+", "_", str(entry.get("id") or number)).strip("_") or str(number)
+        query_id, suffix = base, 1
+        while query_id in seen:
+            suffix += 1
+            query_id = f"{base}-{suffix}"
+        seen.add(query_id)
+        feedback = entry.get("feedback") or []
+        queries.append({
+            "id": query_id,
+            "query": entry["query"],
+            "feedback": [feedback] if isinstance(feedback, str) else list(feedback),
+        })
+    return queries
+
+
+async def run_query(graph, entry: dict, out_dir: Path) -> dict:
+    """
+    Run one query to completion, answering each review from its script.
+
+    Returns:
+        The query's report line
+    """
+    thread_id = f"batch-{entry['id']}-{os.urandom(3).hex()}"
+    usage = UsageMetadataCallbackHandler()
+    config = {
+        "configurable": {"thread_id": thread_id, "draft_streamed": True},
+        "callbacks": [usage],
+    }
+    replies = [*entry["feedback"], APPROVE]
+    report = {"id": entry["id"], "query": entry["query"], "thread_id": thread_id, "status": "ok", "error": None}
+
+    start = time.perf_counter()
+    reviews = 0
+    try:
+        state = await graph.ainvoke(
+            {
+                "messages": [HumanMessage(content=entry["query"])],
+                "research_store_id": thread_id,
+                "research_record_ids": [],
+                "parallel_results": [],
+                "research_rounds": [],
+                "agent_metrics": [],
+                "current_phase": "initial",
+            },
+            config,
+        )
+        while (await graph.aget_state(config)).next:
+            reply = replies[min(reviews, len(replies) - 1)]
+            reviews += 1
+            state = await graph.ainvoke(Command(resume=reply), config)
+
+        draft = state.get("draft_document", "")
+        (out_dir / f"{entry['id']}.md").write_text(draft, encoding="utf-8")
+        report["draft_chars"] = len(draft)
+        report["research_rounds"] = len(state.get("research_rounds") or [])
+    except Exception as exc:
+        report["status"] = "error"
+        report["error"] = f"{type(exc).__name__}: {exc}"
+    finally:
+        await prune_checkpoints(graph.checkpointer, thread_id)
+        report["page_fetches"] = release_fetch_registry(thread_id)
+
+    report["reviews"] = reviews
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    totals = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for model_usage in usage.usage_metadata.values():
+        for key in totals:
+            totals[key] += model_usage.get(key, 0)
+    report.update(totals)
+    return report
+
+
+def summarize(reports: List[dict], wall_seconds: float) -> dict:
+    """Aggregate throughput and latency over all query reports."""
+    ok = [r for r in reports if r["status"] == "ok"]
+    latencies = sorted(r["seconds"] for r in reports)
+    total_tokens = sum(r["total_tokens"] for r in reports)
+    return {
+        "queries": len(reports),
+        "succeeded": len(ok),
+        "failed": len(reports) - len(ok),
+        "wall_seconds": round(wall_seconds, 3),
+        "queries_per_minute": round(len(reports) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "latency_p50": round(statistics.median(latencies), 3) if latencies else 0.0,
+        "latency_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else 0.0,
+        "input_tokens": sum(r["input_tokens"] for r in reports),
+        "output_tokens": sum(r["output_tokens"] for r in reports),
+        "tokens_per_second": round(total_tokens / wall_seconds, 1) if wall_seconds else 0.0,
+        "page_fetches_saved": sum(r["page_fetches"]["saved"] for r in reports),
+        "llm_cache": llm_cache_stats(),
+    }
+
+
+async def run_batch(queries: List[dict], out_dir: Path, concurrency: int, verbose: bool = False) -> dict:
+    """
+    Run every query with at most `concurrency` in flight and write the reports.
+
+    Returns:
+        The aggregate summary (also written to summary.json)
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    console = sys.stdout
+    graph = main.create_multi_agent_graph()
+    limit = asyncio.Semaphore(max(1, concurrency))
+    report_file = (out_dir / "report.jsonl").open("w", encoding="utf-8")
+    reports: List[dict] = []
+
+    async def run_one(entry: dict):
+        async with limit:
+            report = await run_query(graph, entry, out_dir)
+        reports.append(report)
+        report_file.write(json.dumps(report) + "\n")
+        report_file.flush()
+        mark = "✅" if report["status"] == "ok" else "❌"
+        print(
+            f"{mark} [{len(reports)}/{len(queries)}] {report['id']}: {report['seconds']:.1f}s,"
+            f" {report['total_tokens']} tokens{' — ' + report['error'] if report['error'] else ''}",
+            file=console,
+            flush=True,
+        )
+
+    start = time.perf_counter()
+    # Node progress output from concurrent queries would interleave; keep it only with --verbose
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        stack.callback(report_file.close)
+        await asyncio.gather(*(run_one(entry) for entry in queries))
+    summary = summarize(reports, time.perf_counter() - start)
+    (out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def print_summary(summary: dict, out_dir: Path):
+    print("\n" + "=" * 70)
+    print(f"📊 BATCH COMPLETE  {summary['succeeded']}/{summary['queries']} succeeded  ⏱  {summary['wall_seconds']:.1f}s")
+    print("=" * 70)
+    print(f"   Throughput: {summary['queries_per_minute']} queries/min, {summary['tokens_per_second']} tokens/s")
+    print(f"   Latency: p50 {summary['latency_p50']:.1f}s, p95 {summary['latency_p95']:.1f}s")
+    print(f"   Tokens: {summary['input_tokens']} in, {summary['output_tokens']} out")
+    print(f"   Page fetches saved: {summary['page_fetches_saved']}")
+    if summary["llm_cache"]:
+        cache = summary["llm_cache"]
+        print(f"   LLM cache: {cache['hits']} hits, {cache['misses']} misses (hit rate {cache['hit_rate']:.0%})")
+    print(f"   Reports: {out_dir}")
+
+
+async def amain(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", type=Path, help="JSONL file with one query per line")
+    parser.add_argument("--out", type=Path, default=None, help="Output directory (default: output/batch/<timestamp>)")
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("BATCH_MAX_QUERIES", "4")),
+        help="Queries running at once (default: $BATCH_MAX_QUERIES or 4)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' progress output")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ Error: OPENAI_API_KEY environment variable not set")
+        return
+    queries = load_queries(args.queries)
+    out_dir = args.out or DEFAULT_OUTPUT_DIR / time.strftime("%Y%m%d_%H%M%S")
+    print(f"🗂  {len(queries)} queries, {args.concurrency} at a time → {out_dir}")
+
+    try:
+        summary = await run_batch(queries, out_dir, args.concurrency, args.verbose)
+    finally:
+        await close_tools()
+        await close_llm_clients()
+        close_llm_cache()
+        close_research_store()
+        await close_checkpointer()
+    print_summary(summary, out_dir)
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
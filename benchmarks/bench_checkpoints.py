@@ -0,0 +1,124 @@
+"""
+Checkpoint Size Benchmark
+
+Runs the graph up to human review against a local fake LLM whose
+researchers fetch several large pages, once with AGENT_SCRATCHPAD=shared
+(researchers and the writer return their whole message list) and once with
+the default local scratchpad, and reports the size of the saved state.
+
+Checkpoints are written with the plain JSON serializer, so the numbers show
+the state itself rather than CompactSerializer's savings.
+
+Usage:
+    python benchmarks/bench_checkpoints.py [--subtopics N] [--fetches N] [--page-chars N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+import aiosqlite  # noqa: E402
+from langchain_core.messages import HumanMessage  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver  # noqa: E402
+
+import main  # noqa: E402
+from tests.fake_llm import FakeLLMServer  # noqa: E402
+from utils import close_llm_clients, research_store  # noqa: E402
+
+
+def make_responder(subtopics: int, fetches: int):
+    """Supervisor plans `subtopics`; each researcher fetches `fetches` pages before summarizing."""
+    import json
+
+    def respond(request: dict):
+        if request.get("response_format"):
+            return json.dumps({
+                "action": "research",
+                "subtopics": [f"Subtopic {i}" for i in range(subtopics)],
+                "rewrite_instructions": None,
+            })
+        if request.get("tools"):
+            done = sum(1 for m in request["messages"] if m.get("role") == "tool")
+            if done < fetches:
+                return {"tool_calls": [{"name": "fetch_webpage", "args": {"url": f"https://example.com/{done}"}}]}
+            return "\n\n".join(f"Finding {i}: a summarized fact with enough words to count as a finding here." for i in range(5))
+        return "# Draft\n\n" + "A paragraph of the drafted document. " * 200
+
+    return respond
+
+
+async def measure(mode: str, server: FakeLLMServer, tools: list) -> dict:
+    """Run to the review interrupt with AGENT_SCRATCHPAD=`mode` and measure the checkpoints."""
+    os.environ["AGENT_SCRATCHPAD"] = mode
+    config = {"configurable": {"thread_id": uuid.uuid4().hex}}
+    async with aiosqlite.connect(":memory:") as conn:
+        saver = AsyncSqliteSaver(conn)
+        graph = main.create_multi_agent_graph(checkpointer=saver)
+        # Node progress output is not part of the report
+        with patch.object(main, "get_tools", AsyncMock(return_value=tools)), contextlib.redirect_stdout(io.StringIO()):
+            await graph.ainvoke({"messages": [HumanMessage(content="Benchmark query")]}, config)
+        async with conn.execute("SELECT COUNT(*), SUM(LENGTH(checkpoint)), MAX(LENGTH(checkpoint)) FROM checkpoints") as cursor:
+            count, total, largest = await cursor.fetchone()
+        async with conn.execute("SELECT SUM(LENGTH(value)) FROM writes") as cursor:
+            writes = (await cursor.fetchone())[0] or 0
+        state = (await graph.aget_state(config)).values
+    return {
+        "checkpoints": count,
+        "checkpoint_bytes": total,
+        "largest_bytes": largest,
+        "write_bytes": writes,
+        "messages": len(state["messages"]),
+    }
+
+
+async def run(args):
+    page = "Page text " * (args.page_chars // 10)
+
+    @tool
+    def fetch_webpage(url: str) -> str:
+        """Fetch a page."""
+        return page
+
+    server = FakeLLMServer(make_responder(args.subtopics, args.fetches)).start()
+    os.environ.update(OPENAI_API_BASE=server.base_url, OPENAI_API_KEY="sk-fake", MODEL_NAME="fake-model")
+    research_store._store = research_store.ResearchStore(":memory:")
+    try:
+        results = {mode: await measure(mode, server, [fetch_webpage]) for mode in ("shared", "local")}
+    finally:
+        await close_llm_clients()
+        research_store.close_research_store()
+        server.stop()
+
+    header = f"{'scratchpad':<12}{'checkpoints':>13}{'total KB':>11}{'largest KB':>12}{'writes KB':>11}{'messages':>10}"
+    print(header)
+    print("-" * len(header))
+    for mode, r in results.items():
+        print(
+            f"{mode:<12}{r['checkpoints']:>13}{r['checkpoint_bytes'] / 1024:>11.1f}"
+            f"{r['largest_bytes'] / 1024:>12.1f}{r['write_bytes'] / 1024:>11.1f}{r['messages']:>10}"
+        )
+    print("-" * len(header))
+    ratio = results["shared"]["checkpoint_bytes"] / results["local"]["checkpoint_bytes"]
+    print(f"checkpoint bytes, shared / local: {ratio:.1f}x")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subtopics", type=int, default=3, help="Researchers fanned out")
+    parser.add_argument("--fetches", type=int, default=4, help="Pages fetched by each researcher")
+    parser.add_argument("--page-chars", type=int, default=5000, help="Characters per fetched page")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,84 @@
+"""
+HTML Extraction Benchmark
+
+Compares the extraction engines in mcp_servers/extraction.py on a corpus of
+saved HTML pages at fetch_webpage's default budget of 5000 characters.
+
+Each page is measured as saved and "inflated" (its <body> repeated --scale
+times), which models the large pages where extraction cost dominates.
+
+Usage:
+    python benchmarks/bench_extraction.py [--corpus DIR] [--scale N] [--repeat N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+from mcp_servers.extraction import EXTRACTORS  # noqa: E402
+
+DEFAULT_CORPUS = PROJECT_DIR / "tests" / "fixtures" / "html"
+
+
+def inflate(html: bytes, scale: int) -> bytes:
+    """Repeat the document body `scale` times to simulate a heavy page."""
+    start = html.find(b"<body")
+    start = html.find(b">", start) + 1
+    end = html.rfind(b"</body>")
+    if start <= 0 or end < start:
+        return html * scale
+    return html[:start] + html[start:end] * scale + html[end:]
+
+
+def time_engine(engine, html: bytes, max_chars: int, repeat: int) -> float:
+    """Median wall time in milliseconds for one extraction."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.extract(html, max_chars=max_chars)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Directory of saved .html pages")
+    parser.add_argument("--scale", type=int, default=200, help="Body repetitions for the inflated variant")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per page and engine")
+    parser.add_argument("--max-chars", type=int, default=5000)
+    args = parser.parse_args()
+
+    pages = sorted(args.corpus.glob("*.html"))
+    if not pages:
+        sys.exit(f"No .html files in {args.corpus}")
+
+    engines = {name: cls() for name, cls in EXTRACTORS.items()}
+    baseline = "soup"
+    names = [baseline] + [n for n in engines if n != baseline]
+
+    header = f"{'page':<34}{'size':>10}" + "".join(f"{n + ' ms':>12}" for n in names) + f"{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+
+    speedups = []
+    for path in pages:
+        raw = path.read_bytes()
+        for label, html in ((path.stem, raw), (f"{path.stem} x{args.scale}", inflate(raw, args.scale))):
+            times = {n: time_engine(engines[n], html, args.max_chars, args.repeat) for n in names}
+            best_other = min(times[n] for n in names if n != baseline)
+            speedup = times[baseline] / best_other if best_other else float("inf")
+            speedups.append(speedup)
+            row = f"{label:<34}{len(html) / 1024:>8.0f}KB" + "".join(f"{times[n]:>12.2f}" for n in names)
+            print(row + f"{speedup:>9.1f}x")
+
+    print("-" * len(header))
+    print(f"geometric mean speedup vs {baseline}: {statistics.geometric_mean(speedups):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+LLM Response Cache Benchmark
+
+Sends the same --prompts requests twice to a local fake OpenAI-compatible
+server that takes --latency seconds per completion, first with LLM_CACHE
+unset and then with an empty cache file, and reports the wall time of each
+pass. The second cached pass is what a batch re-run or a regression test
+pays once the responses are on disk.
+
+Usage:
+    python benchmarks/bench_llm_cache.py [--prompts N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+os.environ.setdefault("MODEL_NAME", "fake-model")
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from tests.fake_llm import FakeLLMServer  # noqa: E402
+from utils import close_llm_cache, close_llm_clients, get_llm, llm_cache_stats  # noqa: E402
+
+
+async def run_pass(prompts: int) -> float:
+    """Wall time in seconds for one pass over the prompts, 4 at a time."""
+    model = get_llm(temperature=0)
+    limit = asyncio.Semaphore(4)
+
+    async def ask(i: int):
+        async with limit:
+            await model.ainvoke([HumanMessage(content=f"Summarize topic {i}")])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(i) for i in range(prompts)))
+    elapsed = time.perf_counter() - start
+    await close_llm_clients()
+    return elapsed
+
+
+async def run(args):
+    server = FakeLLMServer(lambda request: "A short summary of the topic.", delay=args.latency).start()
+    os.environ["OPENAI_API_BASE"] = server.base_url
+    os.environ.pop("LLM_CACHE", None)
+    try:
+        timings = {"uncached": [await run_pass(args.prompts), await run_pass(args.prompts)]}
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["LLM_CACHE"] = str(Path(tmp) / "llm.sqlite")
+            timings["cached"] = [await run_pass(args.prompts), await run_pass(args.prompts)]
+            stats = llm_cache_stats()
+            close_llm_cache()
+    finally:
+        server.stop()
+
+    header = f"{'cache':<10}{'pass 1 s':>10}{'pass 2 s':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, (first, second) in timings.items():
+        print(f"{name:<10}{first:>10.2f}{second:>10.2f}")
+    print("-" * len(header))
+    print(f"requests sent: {len(server.requests)}, cache hits: {stats['hits']}, misses: {stats['misses']}")
+    print(f"second pass, uncached / cached: {timings['uncached'][1] / timings['cached'][1]:.0f}x")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=40, help="Distinct requests per pass")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model latency per completion (seconds)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,91 @@
+"""
+Per-Query Setup Benchmark
+
+Measures the graph and tool setup a query pays before its first model call:
+
+- uncached: what every query used to do, compiling the StateGraph and, in
+  each of --researchers fanned-out researchers, binding the tools to the
+  model and building a ToolNode
+- cached: create_multi_agent_graph(), bind_tools_cached() and
+  with_shared_fetches(), which build once and then reuse
+
+Usage:
+    python benchmarks/bench_startup.py [--queries N] [--researchers N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+os.environ.setdefault("MODEL_NAME", "fake-model")
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+from langgraph.prebuilt import ToolNode  # noqa: E402
+
+import main  # noqa: E402
+from tests.conftest import RESEARCH_TOOLS  # noqa: E402
+from tools import release_fetch_registry, with_shared_fetches  # noqa: E402
+from utils import bind_tools_cached, close_llm_clients, get_llm  # noqa: E402
+
+
+def uncached_setup(checkpointer, researchers: int):
+    main.build_multi_agent_graph(checkpointer)
+    model = get_llm(temperature=0.1)
+    for _ in range(researchers):
+        model.bind_tools(RESEARCH_TOOLS)
+        ToolNode(RESEARCH_TOOLS)
+
+
+def cached_setup(checkpointer, researchers: int, run_id: str):
+    main.create_multi_agent_graph(checkpointer)
+    model = get_llm(temperature=0.1)
+    for _ in range(researchers):
+        tools = with_shared_fetches(RESEARCH_TOOLS, run_id)
+        bind_tools_cached(model, tools)
+
+
+async def run(args):
+    checkpointer = MemorySaver()
+    # Warm up imports and lazy initialization outside the timings
+    uncached_setup(checkpointer, 1)
+
+    timings = {"uncached": [], "cached": []}
+    for query in range(args.queries):
+        start = time.perf_counter()
+        uncached_setup(checkpointer, args.researchers)
+        timings["uncached"].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        cached_setup(checkpointer, args.researchers, f"bench-{query}")
+        timings["cached"].append((time.perf_counter() - start) * 1000)
+        release_fetch_registry(f"bench-{query}")
+    await close_llm_clients()
+
+    header = f"{'setup':<10}{'first ms':>10}{'median ms':>11}{'p95 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, samples in timings.items():
+        p95 = sorted(samples)[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{name:<10}{samples[0]:>10.2f}{statistics.median(samples):>11.2f}{p95:>9.2f}")
+    print("-" * len(header))
+    speedup = statistics.median(timings["uncached"]) / statistics.median(timings["cached"])
+    print(f"median per-query setup, uncached / cached: {speedup:.0f}x ({args.researchers} researchers)")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50, help="Queries to set up")
+    parser.add_argument("--researchers", type=int, default=4, help="Researchers fanned out per query")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
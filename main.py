@@ -1,247 +1,362 @@
-"""
-Multi-Agent Web Research and Document Writer
-
-A LangGraph-based multi-agent system with a Supervisor-led dynamic architecture:
-- Supervisor: Routes to Parallel Researchers or Writer
-- Researchers: Run in parallel based on subtopics
-- Writer: Synthesizes research or revises based on feedback
-- Human Review: Mandatory checkpoint after writing
-"""
-
-import asyncio
-import os
-import time
-import uuid
-from typing import List, Literal
-from dotenv import load_dotenv
-
-from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.types import Send, Command
-from langchain_core.messages import HumanMessage
-
-from tools import get_mcp_client
-from agents import (
-    run_supervisor,
-    run_researcher,
-    run_writer,
-    human_review_node,
-    AgentState
-)
-
-# Load environment variables
-load_dotenv()
-
-
-# --- Node Functions ---
-
-async def supervisor_node(state: AgentState):
-    """Router node that calls the supervisor."""
-    return await run_supervisor(state)
-
-
-async def researcher_node(state: AgentState):
-    """Researcher node (fanned out)."""
-    #TODO: FETCHING THE TOOLS TWICE 
-    from tools import get_tools
-    all_tools = await get_tools()
-    research_tools = [t for t in all_tools if t.name in ["web_search", "fetch_webpage", "wikipedia_search"]]
-
-    return await run_researcher(state, tools=research_tools)
-
-
-async def merge_research_node(state: AgentState):
-    """Merges parallel research results into a single research_data string."""
-    print("🔄 MERGING parallel research results...")
-    results = state.get("parallel_results", [])
-    existing_research = state.get("research_data", "")
-    merged = ""
-    
-    for i, res in enumerate(results, 1):
-        merged += f"--- SOURCE {i} ---\n{res}\n\n"
-    
-    # Append new research to existing data so previous rounds aren't lost
-    if existing_research:
-        combined = existing_research + "\n--- ADDITIONAL RESEARCH ---\n\n" + merged
-    else:
-        combined = merged
-
-    return {
-        "research_data": combined,
-        "parallel_results": [], 
-        "current_phase": "writing"
-    }
-
-
-async def writer_node(state: AgentState):
-    """Writer node."""
-    return await run_writer(state)
-
-
-# --- Routing Functions ---
-
-def route_from_supervisor(state: AgentState):
-    """Decides where to go after Supervisor based on current_phase."""
-    phase = state.get("current_phase")
-    
-    if phase == "research":
-        subtopics = state.get("subtopics", [])
-        
-        # Parallel fan-out
-        return [Send("researcher", {"messages": [HumanMessage(content=s)]}) for s in subtopics]
-    
-    elif phase == "rewrite":
-        return "writer"
-    
-    return "writer" # Fallback
-
-
-def route_from_human_review(state: AgentState):
-    """Decides where to go after Human Review."""
-    phase = state.get("current_phase")
-    if phase == "approved":
-        return END
-    return "supervisor"
-
-
-# --- Graph Construction ---
-
-def create_multi_agent_graph():
-    """Build and compile the multi-agent graph."""
-    builder = StateGraph(AgentState)
-    
-    # Add nodes
-    builder.add_node("supervisor", supervisor_node)
-    builder.add_node("researcher", researcher_node)
-    builder.add_node("merge_research", merge_research_node)
-    builder.add_node("writer", writer_node)
-    builder.add_node("human_review", human_review_node)
-    
-    # Define flow
-    builder.add_edge(START, "supervisor")
-    
-    # Supervisor → Parallel Researchers OR Writer
-    builder.add_conditional_edges(
-        "supervisor", 
-        route_from_supervisor,
-        ["researcher", "writer"]
-    )
-    
-    # Parallel Researchers → Merge
-    builder.add_edge("researcher", "merge_research")
-    
-    # Merge → Writer
-    builder.add_edge("merge_research", "writer")
-    
-    # Writer → Human Review (Checkpoint)
-    builder.add_edge("writer", "human_review")
-    
-    # Human Review → END or Back to Supervisor
-    builder.add_conditional_edges(
-        "human_review",
-        route_from_human_review,
-        [END, "supervisor"]
-    )
-    
-    # Persistence for interrupts
-    memory = MemorySaver()
-    return builder.compile(checkpointer=memory)
-
-
-async def run_multi_agent(query: str):
-    """
-    Run the multi-agent pipeline with a given research query.
-    Handles the interrupt-resume loop for human review.
-    """
-    start_time = time.time()
-    thread_id = uuid.uuid4().hex[:8]
-
-    print("\n" + "=" * 70)
-    print("🤖 Supervisor-Led Multi-Agent Pipeline")
-    print("=" * 70)
-    print(f"\n📝 Task: {query}")
-    print(f"🧵 Thread: {thread_id}\n")
-    
-    graph = create_multi_agent_graph()
-    config = {"configurable": {"thread_id": thread_id}}
-    
-    # Initialize state
-    initial_state = {
-        "messages": [HumanMessage(content=query)],
-        "research_data": "",
-        "parallel_results": [],
-        "draft_document": "",
-        "human_feedback": "",
-        "rewrite_instructions": "",
-        "subtopics": [],
-        "current_phase": "initial"
-    }
-    
-    # Event loop to handle interrupts
-    current_input = initial_state
-    
-    while True:
-        async for event in graph.astream(current_input, config, stream_mode="values"):
-            # Values stream will emit the latest state at each step
-            latest_state = event
-        
-        # Check if we are at an interrupt
-        state_snapshot = await graph.aget_state(config)
-        
-        if state_snapshot.next:
-            # We hit an interrupt (human_review node)
-            # The human_review_node already printed the draft.
-            print("\n👉 Awaiting your input (type 'approve' to finish, or describe changes):")
-            user_input = await asyncio.get_event_loop().run_in_executor(None, input, "Feedback > ")
-            
-            # Resume with user input
-            current_input = Command(resume=user_input)
-        else:
-            # Graph finished
-            break
-    
-    elapsed = time.time() - start_time
-    print("\n" + "=" * 70)
-    print(f"📊 PIPELINE COMPLETE  ⏱  {elapsed:.1f}s")
-    print("=" * 70)
-    
-    return latest_state
-
-
-async def main():
-    """Interactive entry point — prompts the user for research topics in a loop."""
-    if not os.getenv("OPENAI_API_KEY"):
-        print("❌ Error: OPENAI_API_KEY environment variable not set")
-        return
-
-    print("\n" + "=" * 70)
-    print("  🔬  Multi-Agent Research Assistant")
-    print("=" * 70)
-    print("  Describe a topic and I'll research, write, and let you review.")
-    print("  Type 'quit' to exit.\n")
-
-    while True:
-        try:
-            query = await asyncio.get_event_loop().run_in_executor(
-                None, input, "🔎 Enter research topic > "
-            )
-        except (EOFError, KeyboardInterrupt):
-            print("\n👋 Goodbye!")
-            break
-
-        query = query.strip()
-        if not query:
-            continue
-        if query.lower() in ("quit", "exit", "q"):
-            print("👋 Goodbye!")
-            break
-
-        try:
-            await run_multi_agent(query)
-        except Exception as exc:
-            print(f"\n❌ Pipeline error: {exc}")
-            print("   You can try again with another topic.\n")
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+"""
+Multi-Agent Web Research and Document Writer
+
+A LangGraph-based multi-agent system with a Supervisor-led dynamic architecture:
+- Supervisor: Routes to Parallel Researchers or Writer
+- Researchers: Run in parallel based on subtopics
+- Writer: Synthesizes research or revises based on feedback
+- Human Review: Mandatory checkpoint after writing
+"""
+
+import asyncio
+import os
+import time
+import uuid
+import weakref
+from typing import List, Literal, Optional
+from dotenv import load_dotenv
+
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send, Command
+from langchain_core.messages import HumanMessage
+
+from tools import close_tools, get_fetch_registry, get_tools, release_fetch_registry, with_shared_fetches
+from utils import (
+    close_checkpointer,
+    close_llm_cache,
+    close_llm_clients,
+    close_research_store,
+    get_checkpointer,
+    get_research_store,
+    llm_cache_stats,
+    prune_checkpoints,
+)
+from agents import (
+    run_supervisor,
+    run_researcher,
+    run_writer,
+    human_review_node,
+    compact_records,
+    AgentState
+)
+
+# Load environment variables
+load_dotenv()
+
+# MCP tools exposed to researchers
+RESEARCH_TOOL_NAMES = [
+    "web_search",
+    "web_search_many",
+    "fetch_webpage",
+    "fetch_webpages",
+    "wikipedia_search",
+    "wikipedia_summaries",
+]
+
+
+# --- Node Functions ---
+
+async def supervisor_node(state: AgentState):
+    """Router node that calls the supervisor."""
+    return await run_supervisor(state)
+
+
+async def researcher_node(state: AgentState):
+    """Researcher node (fanned out). Tools come from the shared MCP session pool."""
+    all_tools = await get_tools()
+    research_tools = [t for t in all_tools if t.name in RESEARCH_TOOL_NAMES]
+    # Pages fetched by one researcher are reused by the others in this run
+    research_tools = with_shared_fetches(research_tools, state.get("research_store_id", ""))
+
+    return await run_researcher(state, tools=research_tools)
+
+
+async def merge_research_node(state: AgentState):
+    """Adds the researchers' records to the research, deduplicated and within the token budget."""
+    print("🔄 MERGING parallel research results...")
+    new_ids = state.get("parallel_results", [])
+
+    # Fold this round into previous rounds' research so they aren't lost
+    original_query = next((m.content for m in state.get("messages", []) if isinstance(m, HumanMessage)), "")
+    record_ids, report = await compact_records(
+        get_research_store(),
+        state.get("research_store_id", ""),
+        state.get("research_record_ids") or [],
+        new_ids,
+        original_query,
+    )
+
+    report["round"] = len(state.get("research_rounds") or []) + 1
+    print(
+        f"   📏 Round {report['round']}: {report['raw']} tokens raw → {report['deduplicated']} deduplicated"
+        f" → {report['final']} final{' (condensed)' if report['condensed'] else ''}"
+    )
+    fetches = get_fetch_registry(state.get("research_store_id", "")).stats()
+    if fetches["requested"]:
+        print(f"   🔗 Pages: {fetches['fetched']} fetched, {fetches['saved']} shared between researchers")
+
+    return {
+        "research_record_ids": record_ids,
+        # None clears the channel (see extend_or_reset) so the next round only sees its own records
+        "parallel_results": None,
+        "research_rounds": [report],
+        "current_phase": "writing"
+    }
+
+
+async def writer_node(state: AgentState):
+    """Writer node."""
+    return await run_writer(state)
+
+
+# --- Routing Functions ---
+
+def route_from_supervisor(state: AgentState):
+    """Decides where to go after Supervisor based on current_phase."""
+    phase = state.get("current_phase")
+    
+    if phase == "research":
+        subtopics = state.get("subtopics", [])
+        
+        # Parallel fan-out; findings go to the run's records in the ResearchStore
+        store_id = state.get("research_store_id", "")
+        return [
+            Send("researcher", {"messages": [HumanMessage(content=s)], "research_store_id": store_id})
+            for s in subtopics
+        ]
+    
+    elif phase == "rewrite":
+        return "writer"
+    
+    return "writer" # Fallback
+
+
+def route_from_human_review(state: AgentState):
+    """Decides where to go after Human Review."""
+    phase = state.get("current_phase")
+    if phase == "approved":
+        return END
+    return "supervisor"
+
+
+# --- Graph Construction ---
+
+def build_multi_agent_graph(checkpointer):
+    """Build and compile a new multi-agent graph (see create_multi_agent_graph for the shared one)."""
+    builder = StateGraph(AgentState)
+    
+    # Add nodes
+    builder.add_node("supervisor", supervisor_node)
+    builder.add_node("researcher", researcher_node)
+    builder.add_node("merge_research", merge_research_node)
+    builder.add_node("writer", writer_node)
+    builder.add_node("human_review", human_review_node)
+    
+    # Define flow
+    builder.add_edge(START, "supervisor")
+    
+    # Supervisor → Parallel Researchers OR Writer
+    builder.add_conditional_edges(
+        "supervisor", 
+        route_from_supervisor,
+        ["researcher", "writer"]
+    )
+    
+    # Parallel Researchers → Merge
+    builder.add_edge("researcher", "merge_research")
+    
+    # Merge → Writer
+    builder.add_edge("merge_research", "writer")
+    
+    # Writer → Human Review (Checkpoint)
+    builder.add_edge("writer", "human_review")
+    
+    # Human Review → END or Back to Supervisor
+    builder.add_conditional_edges(
+        "human_review",
+        route_from_human_review,
+        [END, "supervisor"]
+    )
+    
+    # Persistence for interrupts; survives restarts so threads can be resumed
+    return builder.compile(checkpointer=checkpointer)
+
+
+# Compiled graphs by checkpointer; the graph holds no per-run state, so one serves every query
+_graphs: "weakref.WeakKeyDictionary[object, object]" = weakref.WeakKeyDictionary()
+
+
+def create_multi_agent_graph(checkpointer=None):
+    """
+    The compiled multi-agent graph, built once per checkpointer and reused.
+
+    Args:
+        checkpointer: Saver for interrupts and resume (default: the durable
+            SQLite checkpointer from utils.checkpoint)
+    """
+    checkpointer = checkpointer or get_checkpointer()
+    graph = _graphs.get(checkpointer)
+    if graph is None:
+        graph = _graphs[checkpointer] = build_multi_agent_graph(checkpointer)
+    return graph
+
+
+def _print_draft_event(event: dict):
+    """Render a writer stream event on the terminal."""
+    kind = event.get("type")
+    if kind == "draft_start":
+        print("\n📄 Draft (streaming):\n")
+    elif kind == "draft_token":
+        print(event["content"], end="", flush=True)
+    elif kind == "draft_end":
+        print()
+
+
+async def run_multi_agent(query: str = "", thread_id: Optional[str] = None):
+    """
+    Run the multi-agent pipeline with a given research query.
+    Handles the interrupt-resume loop for human review.
+
+    Pass the thread_id of an earlier run (and no query) to resume it from its
+    last checkpoint, e.g. after a restart while a draft was awaiting review.
+    """
+    start_time = time.time()
+    resuming = thread_id is not None
+    thread_id = thread_id or uuid.uuid4().hex[:8]
+
+    print("\n" + "=" * 70)
+    print("🤖 Supervisor-Led Multi-Agent Pipeline")
+    print("=" * 70)
+    if query:
+        print(f"\n📝 Task: {query}")
+    print(f"🧵 Thread: {thread_id}\n")
+    
+    graph = create_multi_agent_graph()
+    # draft_streamed: the draft is printed live below, so human review only shows a summary.
+    # A resumed run starts at human review without streaming, so the draft is shown again.
+    config = {"configurable": {"thread_id": thread_id, "draft_streamed": not resuming}}
+
+    if resuming:
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values:
+            print(f"❌ No saved run with thread id {thread_id}")
+            return None
+        latest_state = snapshot.values
+        # None continues from the last checkpoint
+        initial_state = None
+    else:
+        # Initialize state
+        initial_state = {
+            "messages": [HumanMessage(content=query)],
+            "research_store_id": thread_id,
+            "research_record_ids": [],
+            "parallel_results": [],
+            "research_rounds": [],
+            "agent_metrics": [],
+            "draft_document": "",
+            "human_feedback": "",
+            "rewrite_instructions": "",
+            "subtopics": [],
+            "current_phase": "initial"
+        }
+    
+    # Event loop to handle interrupts
+    current_input = initial_state
+    
+    try:
+        while True:
+            async for mode, event in graph.astream(current_input, config, stream_mode=["values", "custom"]):
+                if mode == "custom":
+                    # Writer tokens, printed as they arrive
+                    _print_draft_event(event)
+                else:
+                    # Values stream will emit the latest state at each step
+                    latest_state = event
+
+            # Check if we are at an interrupt
+            state_snapshot = await graph.aget_state(config)
+
+            if state_snapshot.next:
+                # We hit an interrupt (human_review node)
+                # The human_review_node already printed the draft.
+                print("\n👉 Awaiting your input (type 'approve' to finish, or describe changes):")
+                user_input = await asyncio.get_event_loop().run_in_executor(None, input, "Feedback > ")
+            
+                # Resume with user input; from here on the draft is streamed again
+                current_input = Command(resume=user_input)
+                config["configurable"]["draft_streamed"] = True
+            else:
+                # Graph finished
+                break
+    finally:
+        # Only the newest checkpoints are needed to resume the thread; also on
+        # failure, so a long-lived process doesn't keep the run's fetch registry
+        await prune_checkpoints(graph.checkpointer, thread_id)
+        fetches = release_fetch_registry(thread_id)
+    
+    elapsed = time.time() - start_time
+    print("\n" + "=" * 70)
+    print(f"📊 PIPELINE COMPLETE  ⏱  {elapsed:.1f}s")
+    if fetches["requested"]:
+        print(f"🔗 Page fetches: {fetches['requested']} requested, {fetches['fetched']} made, {fetches['saved']} saved")
+    llm_cache = llm_cache_stats()
+    if llm_cache:
+        print(f"💾 LLM cache: {llm_cache['hits']} hits, {llm_cache['misses']} misses (hit rate {llm_cache['hit_rate']:.0%})")
+    print("=" * 70)
+    
+    return latest_state
+
+
+async def main():
+    """Interactive entry point — prompts the user for research topics in a loop."""
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ Error: OPENAI_API_KEY environment variable not set")
+        return
+
+    print("\n" + "=" * 70)
+    print("  🔬  Multi-Agent Research Assistant")
+    print("=" * 70)
+    print("  Describe a topic and I'll research, write, and let you review.")
+    print("  Type 'resume <thread id>' to continue an earlier run, or 'quit' to exit.\n")
+
+    try:
+        await _interactive_loop()
+    finally:
+        # MCP sessions, LLM connections, the research store and the checkpointer are shared across queries; close them once on exit
+        await close_tools()
+        await close_llm_clients()
+        close_llm_cache()
+        close_research_store()
+        await close_checkpointer()
+
+
+async def _interactive_loop():
+    """Prompt for research topics and run the pipeline until the user quits."""
+    while True:
+        try:
+            query = await asyncio.get_event_loop().run_in_executor(
+                None, input, "🔎 Enter research topic > "
+            )
+        except (EOFError, KeyboardInterrupt):
+            print("\n👋 Goodbye!")
+            break
+
+        query = query.strip()
+        if not query:
+            continue
+        if query.lower() in ("quit", "exit", "q"):
+            print("👋 Goodbye!")
+            break
+
+        try:
+            if query.lower().startswith("resume "):
+                await run_multi_agent(thread_id=query.split(maxsplit=1)[1])
+            else:
+                await run_multi_agent(query)
+        except Exception as exc:
+            print(f"\n❌ Pipeline error: {exc}")
+            print("   You can try again with another topic.\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
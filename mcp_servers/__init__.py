@@ -0,0 +1,5 @@
+"""
+MCP Servers
+
+FastMCP tool servers and the helpers they share.
+"""
@@ -0,0 +1,255 @@
+"""
+HTML Text Extraction
+
+Pluggable engines that turn an HTML document into readable text for
+fetch_webpage. Every engine exposes the same incremental interface: feed()
+chunks of markup as they arrive and close() to get the text. Engines stop
+early once they have `max_chars` characters of main-content text.
+
+Engines:
+- "lxml" (default): streaming lxml pull parser; skips boilerplate subtrees
+  (script, style, nav, ...) without building them and stops as soon as the
+  character budget is reached.
+- "soup": the original BeautifulSoup + html.parser path, kept as a fallback
+  and as the benchmark baseline.
+
+Select with HTML_EXTRACTOR=lxml|soup.
+"""
+
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, NamedTuple, Optional, Type, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    etree = None
+
+# Subtrees that never contain main content
+SKIP_TAGS = frozenset({"script", "style", "nav", "footer", "header", "noscript", "template", "svg", "aside"})
+
+Chunk = Union[str, bytes]
+
+# Slice size used by Extractor.extract() so streaming engines can stop early
+FEED_CHUNK_SIZE = 16 * 1024
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+
+
+class ExtractedText(NamedTuple):
+    """Result of Extractor.extract()."""
+    text: str
+    truncated: bool
+
+
+class ExtractionSession(ABC):
+    """Incremental extraction of one document. Created by Extractor.session()."""
+
+    def __init__(self, max_chars: Optional[int] = None):
+        self.max_chars = max_chars
+        self.truncated = False
+        self._lines: List[str] = []
+        self._length = 0
+
+    @property
+    def done(self) -> bool:
+        """True once enough text has been collected; further input is ignored."""
+        return self.truncated
+
+    def _add_text(self, text: Optional[str]):
+        if not text or self.done:
+            return
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            # Truncated only when part of the text is actually dropped
+            if self.max_chars is not None and self._length + len(line) > self.max_chars:
+                remaining = self.max_chars - self._length
+                if remaining > 0:
+                    self._lines.append(line[:remaining])
+                self._length = self.max_chars
+                self.truncated = True
+                return
+            self._lines.append(line)
+            # Account for the newline that joins lines
+            self._length += len(line) + 1
+
+    @abstractmethod
+    def feed(self, data: Chunk) -> bool:
+        """
+        Consume the next chunk of markup.
+
+        Returns:
+            True once the character budget is reached (the caller can stop reading)
+        """
+
+    def close(self) -> str:
+        """Finish parsing and return the extracted text, one text block per line."""
+        return "\n".join(self._lines)
+
+
+class _SoupSession(ExtractionSession):
+    def __init__(self, max_chars: Optional[int] = None):
+        super().__init__(max_chars)
+        self._chunks: List[Chunk] = []
+
+    def feed(self, data: Chunk) -> bool:
+        self._chunks.append(data)
+        return False
+
+    def close(self) -> str:
+        if self._chunks and isinstance(self._chunks[0], bytes):
+            markup: Chunk = b"".join(self._chunks)
+        else:
+            markup = "".join(self._chunks)
+        soup = BeautifulSoup(markup, "html.parser")
+
+        # Remove script and style elements
+        for element in soup(["script", "style", "nav", "footer", "header"]):
+            element.decompose()
+
+        self._add_text(soup.get_text(separator="\n", strip=True))
+        return super().close()
+
+
+def _pending_text(parent, node) -> Iterable[Optional[str]]:
+    """
+    Text of `parent` that ends right after `node` (its last child seen so far).
+
+    Comments and processing instructions produce no parser events, so the
+    text around them is collected here together with the preceding element's
+    tail (or the parent's own text when there is no preceding element).
+    """
+    pieces = []
+    while node is not None and not isinstance(node.tag, str):
+        pieces.append(node.tail)
+        node = node.getprevious()
+    pieces.append(node.tail if node is not None else parent.text)
+    return reversed(pieces)
+
+
+class _LxmlSession(ExtractionSession):
+    def __init__(self, max_chars: Optional[int] = None, encoding: Optional[str] = None):
+        super().__init__(max_chars)
+        self._encoding = encoding
+        self._parser = None
+        # Skip flag of every open element, innermost last
+        self._skipping: List[bool] = []
+
+    def _make_parser(self, first_chunk: Chunk):
+        encoding = None
+        if isinstance(first_chunk, bytes):
+            # libxml2 assumes Latin-1 for undeclared bytes; prefer the page's
+            # own declaration, then UTF-8
+            match = _META_CHARSET.search(first_chunk[:2048])
+            encoding = self._encoding or (match.group(1).decode("ascii") if match else "utf-8")
+        return etree.HTMLPullParser(events=("start", "end"), encoding=encoding, no_network=True)
+
+    def _drain(self):
+        for event, element in self._parser.read_events():
+            if self.done:
+                return
+            tag = element.tag if isinstance(element.tag, str) else ""
+            if event == "start":
+                parent_skipped = bool(self._skipping) and self._skipping[-1]
+                # Text before this element belongs to the parent and is now complete
+                parent = element.getparent()
+                if parent is not None and not parent_skipped:
+                    for text in _pending_text(parent, element.getprevious()):
+                        self._add_text(text)
+                self._skipping.append(parent_skipped or tag.lower() in SKIP_TAGS)
+            else:
+                skipped = self._skipping.pop() if self._skipping else False
+                if not skipped:
+                    for text in _pending_text(element, element[-1] if len(element) else None):
+                        self._add_text(text)
+                # Processed subtrees are no longer needed
+                element.clear(keep_tail=True)
+
+    def feed(self, data: Chunk) -> bool:
+        if not self.done:
+            if self._parser is None:
+                self._parser = self._make_parser(data)
+            self._parser.feed(data)
+            self._drain()
+        return self.done
+
+    def close(self) -> str:
+        if not self.done and self._parser is not None:
+            try:
+                self._parser.close()
+            except etree.LxmlError:
+                pass
+            self._drain()
+        return super().close()
+
+
+class Extractor:
+    """Base class for extraction engines."""
+
+    name = ""
+    session_class: Type[ExtractionSession] = ExtractionSession
+
+    def session(self, max_chars: Optional[int] = None, encoding: Optional[str] = None) -> ExtractionSession:
+        """
+        Start an incremental extraction.
+
+        Args:
+            max_chars: Stop once this many characters are collected (None = no limit)
+            encoding: Character encoding of byte chunks, if known from HTTP headers
+        """
+        return self.session_class(max_chars)
+
+    def extract(self, html: Chunk, max_chars: Optional[int] = None, encoding: Optional[str] = None) -> ExtractedText:
+        """
+        Extract text from a complete document.
+
+        Returns:
+            The text and whether it was cut at `max_chars`
+        """
+        session = self.session(max_chars, encoding)
+        for start in range(0, len(html), FEED_CHUNK_SIZE):
+            if session.feed(html[start:start + FEED_CHUNK_SIZE]):
+                break
+        text = session.close()
+        return ExtractedText(text, session.truncated)
+
+
+class SoupExtractor(Extractor):
+    """Original BeautifulSoup + html.parser extraction (buffers the whole page)."""
+
+    name = "soup"
+    session_class = _SoupSession
+
+
+class LxmlExtractor(Extractor):
+    """Streaming lxml extraction that stops at the character budget."""
+
+    name = "lxml"
+
+    def session(self, max_chars: Optional[int] = None, encoding: Optional[str] = None) -> ExtractionSession:
+        return _LxmlSession(max_chars, encoding)
+
+
+EXTRACTORS: Dict[str, Type[Extractor]] = {
+    "lxml": LxmlExtractor,
+    "soup": SoupExtractor,
+}
+
+
+def get_extractor(name: Optional[str] = None) -> Extractor:
+    """
+    Return the extraction engine named by `name` or HTML_EXTRACTOR (default "lxml").
+
+    Falls back to the BeautifulSoup engine when lxml is not installed.
+    """
+    name = (name or os.getenv("HTML_EXTRACTOR", "lxml")).lower()
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor '{name}', expected one of {sorted(EXTRACTORS)}")
+    if name == "lxml" and etree is None:
+        name = "soup"
+    return EXTRACTORS[name]()
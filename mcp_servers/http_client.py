@@ -0,0 +1,113 @@
+"""
+Shared Async HTTP Client
+
+One pooled httpx.AsyncClient per research server process, so concurrent tool
+calls from parallel researchers reuse keep-alive connections (HTTP/2 when the
+`h2` package is installed) instead of paying a TCP+TLS handshake each, and
+never block the server's event loop while waiting on the network.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide AsyncClient, creating it on first use.
+
+    Pool size is bounded by HTTP_MAX_CONNECTIONS (default 50) with up to
+    HTTP_MAX_KEEPALIVE (default 20) idle keep-alive connections.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        # Connections are bound to the loop that opened them
+        _client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            http2=_http2_available(),
+            follow_redirects=True,
+            timeout=httpx.Timeout(float(os.getenv("HTTP_TIMEOUT", "10"))),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "50")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=30,
+            ),
+        )
+        _client_loop = loop
+        _host_slots.clear()
+    return _client
+
+
+def host_slot(url: str) -> asyncio.Semaphore:
+    """Semaphore limiting concurrent requests to one host (HTTP_MAX_PER_HOST, default 6)."""
+    host = (urlsplit(url).hostname or "").lower()
+    if host not in _host_slots:
+        _host_slots[host] = asyncio.Semaphore(int(os.getenv("HTTP_MAX_PER_HOST", "6")))
+    return _host_slots[host]
+
+
+async def fetch(url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+    """
+    GET a URL through the shared pool, respecting the per-host limit.
+
+    Args:
+        url: The URL to fetch
+        headers: Extra request headers (e.g. conditional validators)
+        timeout: Per-request timeout in seconds (default: client timeout)
+
+    Returns:
+        The fully read httpx.Response
+    """
+    client = get_client()
+    async with host_slot(url):
+        if timeout is None:
+            return await client.get(url, headers=headers)
+        return await client.get(url, headers=headers, timeout=timeout)
+
+
+@asynccontextmanager
+async def stream(url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> AsyncIterator[httpx.Response]:
+    """
+    Open a streaming GET through the shared pool, respecting the per-host limit.
+
+    The body is not read; iterate `response.aiter_bytes()` and stop whenever
+    enough has arrived. The connection is released when the block exits.
+    """
+    client = get_client()
+    kwargs = {"headers": headers}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    async with host_slot(url):
+        async with client.stream("GET", url, **kwargs) as response:
+            yield response
+
+
+async def aclose():
+    """Close the shared client and its pooled connections."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_slots.clear()
@@ -0,0 +1,234 @@
+"""
+Persistent Page Cache
+
+Content-addressed on-disk cache for fetched webpages, shared by every
+research server process and across runs. Entries are keyed by the SHA-256 of
+the normalized URL and hold the raw body, its validators (ETag /
+Last-Modified) and the extracted text. Stale entries are revalidated with a
+conditional request; the total size is bounded with least-recently-used
+eviction.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+PROJECT_DIR = Path(__file__).parent.parent
+DEFAULT_CACHE_DIR = PROJECT_DIR / ".cache"
+
+# Query parameters that never change page content
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body BLOB,
+    text TEXT NOT NULL,
+    truncated INTEGER NOT NULL DEFAULT 0,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalize a URL so trivially different spellings share a cache entry.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def url_key(url: str) -> str:
+    """Content address of a URL: SHA-256 of its normalized form."""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedPage:
+    """A cache entry as returned by PageCache.get()."""
+    url: str
+    body: bytes
+    text: str
+    truncated: bool
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        """True if the entry was fetched or revalidated within `ttl` seconds."""
+        return time.time() - self.fetched_at < ttl
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    SQLite-backed webpage cache with TTL, LRU eviction and hit counters.
+
+    Args:
+        path: SQLite file (default: $FETCH_CACHE_DIR/pages.sqlite)
+        ttl: Seconds an entry is served without revalidation (default: $FETCH_CACHE_TTL or 1 day)
+        max_bytes: Total size budget before LRU eviction (default: $FETCH_CACHE_MAX_MB or 200 MB)
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        if path is None:
+            cache_dir = Path(os.getenv("FETCH_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            path = str(cache_dir / "pages.sqlite")
+        self.ttl = ttl if ttl is not None else float(os.getenv("FETCH_CACHE_TTL", "86400"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("FETCH_CACHE_MAX_MB", "200")) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "truncated" not in columns:
+            # Caches created before extraction stopped early
+            self._conn.execute("ALTER TABLE pages ADD COLUMN truncated INTEGER NOT NULL DEFAULT 0")
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Look up a URL and mark it as recently used.
+
+        Counts a hit only for fresh entries; stale entries are returned so the
+        caller can revalidate them, and count as misses until they are.
+        """
+        key = url_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, text, truncated, etag, last_modified, fetched_at FROM pages WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        page = CachedPage(
+            url=row[0],
+            body=zlib.decompress(row[1]) if row[1] else b"",
+            text=row[2],
+            truncated=bool(row[3]),
+            etag=row[4],
+            last_modified=row[5],
+            fetched_at=row[6],
+        )
+        if page.is_fresh(self.ttl):
+            self.hits += 1
+        else:
+            self.misses += 1
+        return page
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        truncated: bool = False,
+    ):
+        """
+        Store (or replace) the entry for a URL, then evict down to the size budget.
+
+        `truncated` records that `text` stops at the extraction budget, so a later
+        request for more text re-extracts from `body`.
+        """
+        blob = zlib.compress(body) if body else b""
+        size = len(blob) + len(text.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(key, url, body, text, truncated, etag, last_modified, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url_key(url), normalize_url(url), blob, text, int(truncated), etag, last_modified, size, now, now),
+            )
+            self._evict()
+
+    def update_text(self, url: str, text: str, truncated: bool):
+        """Replace the extracted text of an entry without touching its freshness."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET text = ?, truncated = ? WHERE key = ?",
+                (text, int(truncated), url_key(url)),
+            )
+
+    def mark_revalidated(self, url: str):
+        """Reset an entry's freshness after the origin answered 304 Not Modified."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (time.time(), time.time(), url_key(url)),
+            )
+        self.revalidations += 1
+        # A successful revalidation is served from cache
+        self.misses -= 1
+        self.hits += 1
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus current entry count and size."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._conn.close()
@@ -1,144 +1,375 @@
-"""
-MCP Server for Web Research Tools
-
-Provides tools for web searching, URL fetching, and Wikipedia queries.
-Uses FastMCP for easy MCP server creation.
-"""
-
-from mcp.server.fastmcp import FastMCP
-from duckduckgo_search import DDGS
-import wikipedia
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional
-
-# Initialize FastMCP server
-mcp = FastMCP("Research")
-
-
-@mcp.tool()
-def web_search(query: str, max_results: int = 5) -> str:
-    """
-    Search the web using DuckDuckGo and return relevant results.
-    
-    Args:
-        query: The search query string
-        max_results: Maximum number of results to return (default: 5)
-    
-    Returns:
-        Formatted search results with titles, snippets, and URLs
-    """
-    try:
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=max_results))
-        
-        if not results:
-            return f"No results found for query: {query}"
-        
-        formatted_results = []
-        for i, result in enumerate(results, 1):
-            formatted_results.append(
-                f"{i}. **{result.get('title', 'No title')}**\n"
-                f"   URL: {result.get('href', 'No URL')}\n"
-                f"   {result.get('body', 'No description')}\n"
-            )
-        
-        return f"Search results for '{query}':\n\n" + "\n".join(formatted_results)
-    
-    except Exception as e:
-        return f"Error performing web search: {str(e)}"
-
-
-@mcp.tool()
-def fetch_webpage(url: str, max_chars: int = 5000) -> str:
-    """
-    Fetch and extract the main text content from a webpage URL.
-    
-    Args:
-        url: The URL to fetch content from
-        max_chars: Maximum characters to return (default: 5000)
-    
-    Returns:
-        Extracted text content from the webpage
-    """
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-            element.decompose()
-        
-        # Get text content
-        text = soup.get_text(separator='\n', strip=True)
-        
-        # Clean up whitespace
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        text = '\n'.join(lines)
-        
-        # Truncate if needed
-        if len(text) > max_chars:
-            text = text[:max_chars] + "\n\n[Content truncated...]"
-        
-        return f"Content from {url}:\n\n{text}"
-    
-    except requests.exceptions.Timeout:
-        return f"Error: Request timed out for URL: {url}"
-    except requests.exceptions.RequestException as e:
-        return f"Error fetching webpage: {str(e)}"
-    except Exception as e:
-        return f"Error processing webpage: {str(e)}"
-
-
-@mcp.tool()
-def wikipedia_search(query: str, sentences: int = 5) -> str:
-    """
-    Search Wikipedia and return a summary of the topic.
-    
-    Args:
-        query: The topic to search for on Wikipedia
-        sentences: Number of sentences to return in summary (default: 5)
-    
-    Returns:
-        Wikipedia summary and related information
-    """
-    try:
-        # Search for matching pages
-        search_results = wikipedia.search(query, results=3)
-        
-        if not search_results:
-            return f"No Wikipedia articles found for: {query}"
-        
-        # Try to get the summary for the first result
-        try:
-            page = wikipedia.page(search_results[0])
-            summary = wikipedia.summary(search_results[0], sentences=sentences)
-            
-            return (
-                f"**{page.title}**\n\n"
-                f"{summary}\n\n"
-                f"URL: {page.url}\n\n"
-                f"Related topics: {', '.join(search_results[1:]) if len(search_results) > 1 else 'None'}"
-            )
-        
-        except wikipedia.DisambiguationError as e:
-            # Handle disambiguation pages
-            options = e.options[:5]
-            return (
-                f"Multiple Wikipedia articles found for '{query}':\n"
-                f"- " + "\n- ".join(options) + "\n\n"
-                f"Please be more specific in your query."
-            )
-    
-    except Exception as e:
-        return f"Error searching Wikipedia: {str(e)}"
-
-
-if __name__ == "__main__":
-    # Run the MCP server using stdio transport
-    mcp.run(transport="stdio")
+"""
+MCP Server for Web Research Tools
+
+Provides tools for web searching, URL fetching, and Wikipedia queries.
+Uses FastMCP for easy MCP server creation.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Make the project root importable when launched as `python mcp_servers/research_server.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from contextlib import asynccontextmanager
+from mcp.server.fastmcp import FastMCP
+from duckduckgo_search import DDGS
+import httpx
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from mcp_servers import http_client, wikipedia_api
+from mcp_servers.extraction import ExtractedText, get_extractor
+from mcp_servers.page_cache import PageCache
+from mcp_servers.search_cache import QueryCache
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Close pooled HTTP connections when the server shuts down."""
+    try:
+        yield
+    finally:
+        await http_client.aclose()
+
+
+# Initialize FastMCP server
+mcp = FastMCP("Research", lifespan=lifespan)
+
+# Persistent cache of fetched pages, shared across server processes and runs
+page_cache = PageCache()
+
+# Recent web/Wikipedia search results, keyed by normalized query
+search_cache = QueryCache()
+
+# HTML-to-text engine (HTML_EXTRACTOR=lxml|soup)
+extractor = get_extractor()
+
+
+def _ddg_text(query: str, max_results: int) -> List[dict]:
+    """Raw DuckDuckGo text search (blocking)."""
+    with DDGS() as ddgs:
+        return list(ddgs.text(query, max_results=max_results))
+
+
+@mcp.tool()
+async def web_search(query: str, max_results: int = 5) -> str:
+    """
+    Search the web using DuckDuckGo and return relevant results.
+    
+    Args:
+        query: The search query string
+        max_results: Maximum number of results to return (default: 5)
+    
+    Returns:
+        Formatted search results with titles, snippets, and URLs
+    """
+    try:
+        results = await search_cache.get_or_fetch(
+            search_cache.key("web", query, max_results),
+            lambda: asyncio.to_thread(_ddg_text, query, max_results),
+        )
+        
+        if not results:
+            return f"No results found for query: {query}"
+        
+        formatted_results = []
+        for i, result in enumerate(results, 1):
+            formatted_results.append(
+                f"{i}. **{result.get('title', 'No title')}**\n"
+                f"   URL: {result.get('href', 'No URL')}\n"
+                f"   {result.get('body', 'No description')}\n"
+            )
+        
+        return f"Search results for '{query}':\n\n" + "\n".join(formatted_results)
+    
+    except Exception as e:
+        return f"Error performing web search: {str(e)}"
+
+
+# Content types fetch_webpage will download and extract
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+def _cached_text(cached, max_chars: int) -> Optional[ExtractedText]:
+    """
+    Text of a cache entry for a `max_chars` budget.
+
+    Text cut at a smaller budget is re-extracted from the stored body. Returns
+    None when the entry cannot satisfy the request (the body was not stored
+    because its download stopped early), so the page must be fetched again.
+    """
+    if len(cached.text) >= max_chars:
+        return ExtractedText(cached.text[:max_chars], cached.truncated or len(cached.text) > max_chars)
+    if not cached.truncated:
+        return ExtractedText(cached.text, False)
+    if not cached.body:
+        return None
+    extracted = extractor.extract(cached.body, max_chars=max_chars)
+    page_cache.update_text(cached.url, extracted.text, extracted.truncated)
+    return extracted
+
+
+async def _download(response, max_chars: int) -> Tuple[ExtractedText, bytes, bool]:
+    """
+    Stream a response body into the extractor.
+
+    Reading stops as soon as the extractor has `max_chars` of text or the body
+    exceeds FETCH_MAX_BYTES (default 2 MB), whichever comes first.
+
+    Returns:
+        The extracted text, the bytes read, and whether the whole body was read
+    """
+    max_bytes = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+    session = extractor.session(max_chars, encoding=response.charset_encoding)
+    body = bytearray()
+    complete = True
+    async for chunk in response.aiter_bytes():
+        over_budget = len(body) + len(chunk) > max_bytes
+        if over_budget:
+            chunk = chunk[:max_bytes - len(body)]
+        body += chunk
+        if session.feed(chunk) or over_budget:
+            # Stopped before the end of the body
+            complete = False
+            break
+    length = response.headers.get('Content-Length', '')
+    if not complete and length.isdigit():
+        # Everything may have arrived before we stopped reading
+        encoded = 'Content-Encoding' in response.headers
+        received = response.num_bytes_downloaded if encoded else len(body)
+        complete = received == int(length)
+    text = session.close()
+    return ExtractedText(text, session.truncated or not complete), bytes(body), complete
+
+
+@mcp.tool()
+async def fetch_webpage(url: str, max_chars: int = 5000) -> str:
+    """
+    Fetch and extract the main text content from a webpage URL.
+    
+    Args:
+        url: The URL to fetch content from
+        max_chars: Maximum characters to return (default: 5000)
+    
+    Returns:
+        Extracted text content from the webpage
+    """
+    try:
+        cached = page_cache.get(url)
+        extracted = _cached_text(cached, max_chars) if cached is not None else None
+        
+        if extracted is None or not cached.is_fresh(page_cache.ttl):
+            # Revalidate only entries that can answer this request
+            headers = cached.validators() if extracted is not None else None
+            async with http_client.stream(url, headers=headers) as response:
+                if response.status_code == 304 and extracted is not None:
+                    # Unchanged since we cached it
+                    page_cache.mark_revalidated(url)
+                else:
+                    response.raise_for_status()
+                    
+                    # Reject binaries and other non-text downloads before reading the body
+                    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                    if content_type and content_type not in TEXT_CONTENT_TYPES:
+                        return f"Error: Unsupported content type '{content_type}' for URL: {url}"
+                    
+                    extracted, body, complete = await _download(response, max_chars)
+                    page_cache.put(
+                        url,
+                        # A partial body cannot serve larger requests later
+                        body=body if complete else b"",
+                        text=extracted.text,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified'),
+                        truncated=extracted.truncated,
+                    )
+        
+        text = extracted.text
+        if extracted.truncated:
+            text += "\n\n[Content truncated...]"
+        
+        return f"Content from {url}:\n\n{text}"
+    
+    except httpx.TimeoutException:
+        return f"Error: Request timed out for URL: {url}"
+    except httpx.HTTPError as e:
+        return f"Error fetching webpage: {str(e)}"
+    except Exception as e:
+        return f"Error processing webpage: {str(e)}"
+
+
+async def _run_batch(items: List[str], run: Callable[[str], Awaitable[str]], timeout: float) -> List[str]:
+    """
+    Run `run(item)` for every item concurrently, in input order.
+
+    Concurrency is capped by BATCH_CONCURRENCY (default 8) and each item gets
+    its own timeout, so one slow item cannot hold up the others.
+    """
+    limit = asyncio.Semaphore(int(os.getenv("BATCH_CONCURRENCY", "8")))
+
+    async def run_one(item: str) -> str:
+        async with limit:
+            try:
+                return await asyncio.wait_for(run(item), timeout=timeout)
+            except asyncio.TimeoutError:
+                return f"Error: Timed out after {timeout:.0f}s for: {item}"
+
+    return await asyncio.gather(*(run_one(item) for item in items))
+
+
+def _format_batch(label: str, items: List[str], results: List[str]) -> str:
+    """Join per-item results into one response, numbered in input order."""
+    sections = [f"=== [{i}] {label}: {item} ===\n{result}" for i, (item, result) in enumerate(zip(items, results), 1)]
+    return "\n\n".join(sections)
+
+
+@mcp.tool()
+async def fetch_webpages(urls: List[str], max_chars: int = 5000, timeout: float = 15) -> str:
+    """
+    Fetch several webpages concurrently and extract their main text content.
+    
+    Prefer this over repeated fetch_webpage calls when you need more than one URL.
+    
+    Args:
+        urls: The URLs to fetch content from
+        max_chars: Maximum characters to return per page (default: 5000)
+        timeout: Maximum seconds to wait for each page (default: 15)
+    
+    Returns:
+        Extracted text content for each URL, in the order given
+    """
+    if not urls:
+        return "Error: No URLs provided"
+    results = await _run_batch(urls, lambda url: fetch_webpage(url, max_chars=max_chars), timeout)
+    return _format_batch("URL", urls, results)
+
+
+@mcp.tool()
+async def web_search_many(queries: List[str], max_results: int = 5, timeout: float = 15) -> str:
+    """
+    Run several web searches concurrently using DuckDuckGo.
+    
+    Prefer this over repeated web_search calls when you have more than one query.
+    
+    Args:
+        queries: The search query strings
+        max_results: Maximum number of results per query (default: 5)
+        timeout: Maximum seconds to wait for each search (default: 15)
+    
+    Returns:
+        Formatted search results for each query, in the order given
+    """
+    if not queries:
+        return "Error: No queries provided"
+    results = await _run_batch(queries, lambda query: web_search(query, max_results=max_results), timeout)
+    return _format_batch("Query", queries, results)
+
+
+@mcp.tool()
+def fetch_cache_stats() -> str:
+    """
+    Report hit/miss counters and size of the webpage cache.
+    
+    Returns:
+        Cache statistics as "key: value" lines
+    """
+    return "\n".join(f"{k}: {v}" for k, v in page_cache.stats().items())
+
+
+@mcp.tool()
+async def wikipedia_search(query: str, sentences: int = 5) -> str:
+    """
+    Search Wikipedia and return a summary of the topic.
+    
+    Args:
+        query: The topic to search for on Wikipedia
+        sentences: Number of sentences to return in summary (default: 5)
+    
+    Returns:
+        Wikipedia summary and related information
+    """
+    try:
+        result = await search_cache.get_or_fetch(
+            search_cache.key("wikipedia", query, sentences),
+            lambda: wikipedia_api.search(query, sentences=sentences),
+        )
+        
+        if result.get("found") is False:
+            return f"No Wikipedia articles found for: {query}"
+        
+        if "options" in result:
+            # Handle disambiguation pages
+            return (
+                f"Multiple Wikipedia articles found for '{query}':\n"
+                f"- " + "\n- ".join(result["options"]) + "\n\n"
+                f"Please be more specific in your query."
+            )
+        
+        return (
+            f"**{result['title']}**\n\n"
+            f"{result['summary']}\n\n"
+            f"URL: {result['url']}\n\n"
+            f"Related topics: {', '.join(result['related']) if result['related'] else 'None'}"
+        )
+    
+    except Exception as e:
+        return f"Error searching Wikipedia: {str(e)}"
+
+
+@mcp.tool()
+async def wikipedia_summaries(titles: List[str], sentences: int = 5) -> str:
+    """
+    Get the summaries of several Wikipedia articles by exact title in one request.
+    
+    Useful for following up on the related topics listed by wikipedia_search.
+    
+    Args:
+        titles: Article titles to look up
+        sentences: Number of sentences to return per summary (default: 5)
+    
+    Returns:
+        A summary and URL for each title, in the order given
+    """
+    if not titles:
+        return "Error: No titles provided"
+    try:
+        keys = [("wikipedia_title", title, sentences) for title in titles]
+        results = [search_cache.get(key) for key in keys]
+        missing = [title for title, result in zip(titles, results) if result is None]
+        # get() only counts hits; every title sent to the API is a miss
+        search_cache.misses += len(missing)
+        if missing:
+            fetched = dict(zip(missing, await wikipedia_api.get_summaries(missing, sentences=sentences)))
+            for i, (title, key) in enumerate(zip(titles, keys)):
+                if results[i] is None and fetched[title] is not None:
+                    results[i] = fetched[title]
+                    search_cache.set(key, results[i])
+        
+        sections = []
+        for title, result in zip(titles, results):
+            if result is None:
+                sections.append(f"**{title}**\n\nNo Wikipedia article found.")
+            else:
+                sections.append(f"**{result['title']}**\n\n{result['summary']}\n\nURL: {result['url']}")
+        return "\n\n---\n\n".join(sections)
+    
+    except Exception as e:
+        return f"Error fetching Wikipedia summaries: {str(e)}"
+
+
+@mcp.tool()
+def search_cache_stats() -> str:
+    """
+    Report hit/miss/coalescing counters of the search result cache.
+    
+    Returns:
+        Cache statistics as "key: value" lines
+    """
+    return "\n".join(f"{k}: {v}" for k, v in search_cache.stats().items())
+
+
+if __name__ == "__main__":
+    # Run the MCP server using stdio transport
+    mcp.run(transport="stdio")
@@ -0,0 +1,121 @@
+"""
+Search Result Cache
+
+In-memory TTL cache for web_search and wikipedia_search results, shared by
+every researcher that talks to this server process. Queries are normalized
+(case, punctuation, whitespace, stopwords and word order) so trivially
+different phrasings share one entry, and concurrent identical lookups are
+coalesced into a single upstream call.
+"""
+
+import asyncio
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "which",
+    "who", "why", "with",
+})
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a search query used as its cache key.
+
+    Lowercases, strips punctuation, drops stopwords and sorts the remaining
+    words, so "The history of Python" and "python history" collide. A query
+    made only of stopwords keeps them.
+    """
+    words = _WORD.findall(unicodedata.normalize("NFKC", query).lower())
+    content = [w for w in words if w not in STOPWORDS] or words
+    return " ".join(sorted(content))
+
+
+class QueryCache:
+    """
+    TTL + LRU cache of search results with in-flight request coalescing.
+
+    Args:
+        ttl: Seconds a result is reused (default: $SEARCH_CACHE_TTL or 1 hour)
+        max_entries: Entries kept before evicting the least recently used
+            (default: $SEARCH_CACHE_MAX_ENTRIES or 1000)
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+        self.max_entries = max_entries or int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    @staticmethod
+    def key(namespace: str, query: str, *params: Hashable) -> Tuple:
+        """Cache key for a query issued to `namespace` with extra parameters."""
+        return (namespace, normalize_query(query), *params)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return a fresh cached result for `key` (counting a hit), or None."""
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] >= self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Tuple, result: Any):
+        """Store a result fetched outside get_or_fetch() (e.g. by a batch call)."""
+        self._entries[key] = (time.time(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached result for `key`, or await `fetch()` to produce it.
+
+        If the same key is already being fetched, wait for that call instead
+        of starting another. The fetch runs as its own task and every caller
+        awaits it shielded, so a caller that is cancelled (e.g. by a per-item
+        timeout) doesn't cancel it for the others. Exceptions propagate to
+        every waiter and are not cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Tuple, task: "asyncio.Task[Any]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # exception() also marks it retrieved, so a fetch nobody waits for anymore doesn't warn
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+    def stats(self) -> dict:
+        """Hit, miss and coalescing counters plus the current entry count."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,121 @@
+"""
+Wikipedia Backend
+
+Looks up Wikipedia articles through the MediaWiki Action API in a single
+request: search, title, canonical URL and the leading sentences of the
+article come back together, and several known titles can be resolved in one
+call. Replaces the `wikipedia` package, which needed three sequential
+requests (search, page, summary) per lookup.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+from mcp_servers import http_client
+
+# TextExtracts returns at most 20 plain-text extracts per request
+MAX_TITLES_PER_REQUEST = 20
+
+
+def api_url() -> str:
+    """Action API endpoint for WIKIPEDIA_LANG (default "en")."""
+    return f"https://{os.getenv('WIKIPEDIA_LANG', 'en')}.wikipedia.org/w/api.php"
+
+
+def _params(sentences: int, **extra) -> dict:
+    return {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "redirects": "1",
+        "prop": "extracts|info|pageprops",
+        "exintro": "1",
+        "explaintext": "1",
+        "exsentences": str(sentences),
+        "exlimit": "max",
+        "inprop": "url",
+        "ppprop": "disambiguation",
+        **extra,
+    }
+
+
+async def _query(params: dict) -> dict:
+    response = await http_client.fetch(f"{api_url()}?{urlencode(params)}")
+    response.raise_for_status()
+    data = json.loads(response.content)
+    if "error" in data:
+        raise RuntimeError(data["error"].get("info", "Wikipedia API error"))
+    return data.get("query", {})
+
+
+def _article(page: dict) -> dict:
+    return {
+        "title": page["title"],
+        "summary": page.get("extract", "").strip(),
+        "url": page.get("fullurl", ""),
+    }
+
+
+def _is_disambiguation(page: dict) -> bool:
+    return "disambiguation" in page.get("pageprops", {})
+
+
+async def search(query: str, sentences: int = 5, results: int = 3) -> dict:
+    """
+    Find the best-matching article for a query in one API request.
+
+    Disambiguation pages are skipped in favour of the highest-ranked regular
+    article among the results.
+
+    Returns:
+        {"found": False}, {"options": [...]} when every match is a
+        disambiguation page, or {"title", "summary", "url", "related"}
+    """
+    data = await _query(_params(sentences, generator="search", gsrsearch=query, gsrlimit=str(results)))
+    pages = sorted(
+        (p for p in data.get("pages", []) if not p.get("missing")),
+        key=lambda p: p.get("index", 0),
+    )
+    if not pages:
+        return {"found": False}
+
+    articles = [p for p in pages if not _is_disambiguation(p)]
+    if not articles:
+        return {"options": [p["title"] for p in pages]}
+
+    best = articles[0]
+    return {
+        **_article(best),
+        "related": [p["title"] for p in pages if p is not best],
+    }
+
+
+async def get_summaries(titles: List[str], sentences: int = 5) -> List[Optional[dict]]:
+    """
+    Resolve several article titles, up to 20 per API request.
+
+    Returns:
+        One {"title", "summary", "url"} per input title, in order, or None for
+        titles that do not exist
+    """
+    by_title: Dict[str, Optional[dict]] = {}
+    for start in range(0, len(titles), MAX_TITLES_PER_REQUEST):
+        batch = titles[start:start + MAX_TITLES_PER_REQUEST]
+        data = await _query(_params(sentences, titles="|".join(batch)))
+
+        # Map each requested title through normalization and redirects
+        aliases = {t: t for t in batch}
+        for step in ("normalized", "redirects"):
+            for change in data.get(step, []):
+                for requested, current in aliases.items():
+                    if current == change["from"]:
+                        aliases[requested] = change["to"]
+
+        pages = {p["title"]: p for p in data.get("pages", [])}
+        for requested, resolved in aliases.items():
+            page = pages.get(resolved)
+            by_title[requested] = None if page is None or page.get("missing") else _article(page)
+
+    return [by_title[t] for t in titles]
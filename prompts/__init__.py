@@ -1,29 +1,111 @@
-"""
-Prompts Module
-
-Provides utility functions to load prompts from markdown files.
-"""
-
-from pathlib import Path
-
-
-def load_prompt(prompt_name: str) -> str:
-    """
-    Load a prompt from a markdown file.
-    
-    Args:
-        prompt_name: Name of the prompt file (without .md extension)
-        
-    Returns:
-        The prompt content as a string
-        
-    Raises:
-        FileNotFoundError: If the prompt file doesn't exist
-    """
-    prompts_dir = Path(__file__).parent
-    prompt_file = prompts_dir / f"{prompt_name}.md"
-    
-    if not prompt_file.exists():
-        raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
-    
-    return prompt_file.read_text(encoding='utf-8').strip()
+"""
+Prompts Module
+
+Provides utility functions to load prompts from markdown files and assemble
+them into model messages.
+
+Prompt files are read once and cached. Templates (prompts with {placeholders})
+are whitespace-normalized on load and written with their fixed instructions
+first and the per-call values after, ordered from least to most variable, so
+the start of each request is byte-identical across researchers, revisions and
+queries and OpenAI-compatible prompt caching can reuse it.
+"""
+
+import functools
+import re
+import textwrap
+from pathlib import Path
+from typing import List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from utils.tokens import count_tokens
+
+PROMPTS_DIR = Path(__file__).parent
+
+_PLACEHOLDER = re.compile(r"\{\w+\}")
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt(prompt_name: str) -> str:
+    """
+    Load a prompt from a markdown file.
+
+    Args:
+        prompt_name: Name of the prompt file (without .md extension)
+
+    Returns:
+        The prompt content as a string
+
+    Raises:
+        FileNotFoundError: If the prompt file doesn't exist
+    """
+    prompt_file = PROMPTS_DIR / f"{prompt_name}.md"
+
+    if not prompt_file.exists():
+        raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
+
+    return prompt_file.read_text(encoding='utf-8').strip()
+
+
+def normalize_whitespace(text: str) -> str:
+    """Dedent, strip trailing spaces and collapse runs of blank lines."""
+    lines = [line.rstrip() for line in textwrap.dedent(text).strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+@functools.lru_cache(maxsize=None)
+def load_template(prompt_name: str) -> str:
+    """A prompt template with normalized whitespace (cached)."""
+    return normalize_whitespace(load_prompt(prompt_name))
+
+
+def render_prompt(prompt_name: str, **values) -> str:
+    """
+    Fill a template's {placeholders}.
+
+    String values are stripped of surrounding whitespace; their contents are
+    inserted as is.
+    """
+    return load_template(prompt_name).format_map(
+        {key: value.strip() if isinstance(value, str) else value for key, value in values.items()}
+    )
+
+
+def stable_prefix(prompt_name: str) -> str:
+    """The part of a template before its first placeholder, identical on every call."""
+    template = load_template(prompt_name)
+    match = _PLACEHOLDER.search(template)
+    return template[:match.start()] if match else template
+
+
+def prompt_messages(system_prompt: str, user_template: str, **values) -> List[BaseMessage]:
+    """
+    System prompt followed by a rendered user template.
+
+    Args:
+        system_prompt: Name of the system prompt file
+        user_template: Name of the user message template
+        **values: Template values
+
+    Returns:
+        [SystemMessage, HumanMessage]
+    """
+    return [
+        SystemMessage(content=load_prompt(system_prompt)),
+        HumanMessage(content=render_prompt(user_template, **values)),
+    ]
+
+
+def log_prompt_tokens(agent: str, messages: List[BaseMessage], user_template: str = "") -> dict:
+    """
+    Print and return the token count of a prompt and of its cacheable prefix.
+
+    The prefix is the system prompt plus the fixed start of `user_template`.
+    """
+    total = sum(count_tokens(m.content) for m in messages if isinstance(m.content, str))
+    stable = count_tokens(messages[0].content) if isinstance(messages[0], SystemMessage) else 0
+    if user_template:
+        stable += count_tokens(stable_prefix(user_template))
+    print(f"   🧮 {agent} prompt: {total} tokens ({stable} in the stable prefix)")
+    return {"prompt_tokens": total, "stable_prefix_tokens": stable}
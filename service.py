@@ -0,0 +1,278 @@
+"""
+HTTP Service
+
+Async HTTP front-end that serves many concurrent research sessions from one
+process and one compiled graph. Each session is a graph thread; its human
+review interrupt is exposed as a resource and resumed with the feedback
+POSTed to it.
+
+Endpoints:
+    POST /runs                      {"query": ..., "thread_id"?: ...} → 202, starts a run
+    GET  /runs/{thread_id}          Status, phase and current draft
+    GET  /runs/{thread_id}/review   The pending review (409 if none is pending)
+    POST /runs/{thread_id}/review   {"feedback": "approve" | "<changes>"} → 202, resumes the run
+    GET  /health
+
+Runs execute as background tasks on the server's event loop, so requests
+return immediately; poll the run (or its review) for progress. State lives in
+the durable checkpointer, so pending reviews survive a restart.
+
+Usage:
+    uvicorn service:app [--host 0.0.0.0] [--port 8000]
+"""
+
+import asyncio
+import contextlib
+import uuid
+import weakref
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+load_dotenv()
+
+import main  # noqa: E402
+from tools import close_tools, release_fetch_registry  # noqa: E402
+from utils import (  # noqa: E402
+    close_checkpointer,
+    close_llm_cache,
+    close_llm_clients,
+    close_research_store,
+    prune_checkpoints,
+)
+
+
+class RunManager:
+    """
+    Background graph runs keyed by thread_id.
+
+    At most one task drives a thread at a time: create() and resume() check
+    the thread's state and start its task under a per-thread lock. A failed
+    task's error is kept until the thread is resumed again. Finished tasks
+    are dropped.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._errors: Dict[str, str] = {}
+        # Held only while a request claims a thread; dropped once nobody holds them
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    @staticmethod
+    def config(thread_id: str) -> dict:
+        # draft_streamed: reviewers fetch the draft from the API, so nodes don't print it
+        return {"configurable": {"thread_id": thread_id, "draft_streamed": True}}
+
+    def running(self, thread_id: str) -> bool:
+        task = self._tasks.get(thread_id)
+        return task is not None and not task.done()
+
+    def _lock(self, thread_id: str) -> asyncio.Lock:
+        lock = self._locks.get(thread_id)
+        if lock is None:
+            lock = self._locks[thread_id] = asyncio.Lock()
+        return lock
+
+    async def create(self, thread_id: str, graph_input) -> Optional[asyncio.Task]:
+        """Start a new thread, or return None if the thread already exists."""
+        async with self._lock(thread_id):
+            if self.running(thread_id) or await self.status(thread_id) is not None:
+                return None
+            return self.start(thread_id, graph_input)
+
+    async def resume(self, thread_id: str, feedback: str) -> Optional[asyncio.Task]:
+        """Resume a thread's pending review with `feedback`, or return None if none is pending."""
+        async with self._lock(thread_id):
+            # No task can start or finish for this thread while the lock is held
+            if await self.review(thread_id) is None:
+                return None
+            return self.start(thread_id, Command(resume=feedback))
+
+    def start(self, thread_id: str, graph_input) -> asyncio.Task:
+        """Drive the thread with `graph_input` until it finishes or interrupts."""
+        self._errors.pop(thread_id, None)
+        task = asyncio.create_task(self._drive(thread_id, graph_input))
+        self._tasks[thread_id] = task
+        task.add_done_callback(lambda t: self._forget(thread_id, t))
+        return task
+
+    def _forget(self, thread_id: str, task: asyncio.Task):
+        if self._tasks.get(thread_id) is task:
+            del self._tasks[thread_id]
+
+    async def _drive(self, thread_id: str, graph_input):
+        config = self.config(thread_id)
+        try:
+            await self.graph.ainvoke(graph_input, config)
+            if not (await self.graph.aget_state(config)).next:
+                # Finished: only the newest checkpoints are kept
+                await prune_checkpoints(self.graph.checkpointer, thread_id)
+                release_fetch_registry(thread_id)
+        except Exception as exc:
+            self._errors[thread_id] = f"{type(exc).__name__}: {exc}"
+            # Resuming starts a new registry; don't keep this one for the life of the process
+            release_fetch_registry(thread_id)
+
+    async def status(self, thread_id: str) -> Optional[dict]:
+        """Status of a thread, or None if it is unknown."""
+        snapshot = await self.graph.aget_state(self.config(thread_id))
+        if not snapshot.values and not self.running(thread_id):
+            return None
+        values = snapshot.values or {}
+        if self.running(thread_id):
+            status = "running"
+        elif thread_id in self._errors:
+            status = "error"
+        elif snapshot.next:
+            status = "awaiting_review" if _pending_review(snapshot) else "interrupted"
+        else:
+            status = "completed"
+        return {
+            "thread_id": thread_id,
+            "status": status,
+            "phase": values.get("current_phase"),
+            "draft": values.get("draft_document", ""),
+            "research_rounds": values.get("research_rounds") or [],
+            "error": self._errors.get(thread_id),
+        }
+
+    async def review(self, thread_id: str) -> Optional[dict]:
+        """The pending review of a thread, or None."""
+        if self.running(thread_id):
+            return None
+        snapshot = await self.graph.aget_state(self.config(thread_id))
+        interrupt = _pending_review(snapshot)
+        if interrupt is None:
+            return None
+        return {
+            "thread_id": thread_id,
+            "message": interrupt.value.get("message") if isinstance(interrupt.value, dict) else str(interrupt.value),
+            "draft": snapshot.values.get("draft_document", ""),
+        }
+
+    async def aclose(self):
+        """Cancel unfinished runs; they continue from their last checkpoint when resumed."""
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _pending_review(snapshot):
+    """The human_review interrupt waiting in a state snapshot, if any."""
+    for task in snapshot.tasks:
+        if task.name == "human_review" and task.interrupts:
+            return task.interrupts[0]
+    return None
+
+
+def _runs(request: Request) -> RunManager:
+    return request.app.state.runs
+
+
+async def _json_body(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+async def create_run(request: Request) -> JSONResponse:
+    body = await _json_body(request)
+    query = str(body.get("query") or "").strip()
+    if not query:
+        return JSONResponse({"error": "'query' is required"}, status_code=400)
+    thread_id = str(body.get("thread_id") or uuid.uuid4().hex[:8])
+
+    started = await _runs(request).create(thread_id, {
+        "messages": [HumanMessage(content=query)],
+        "research_store_id": thread_id,
+        "research_record_ids": [],
+        "parallel_results": [],
+        "research_rounds": [],
+        "agent_metrics": [],
+        "current_phase": "initial",
+    })
+    if started is None:
+        return JSONResponse({"error": f"Run {thread_id} already exists"}, status_code=409)
+    return JSONResponse({"thread_id": thread_id, "status": "running"}, status_code=202)
+
+
+async def get_run(request: Request) -> JSONResponse:
+    thread_id = request.path_params["thread_id"]
+    status = await _runs(request).status(thread_id)
+    if status is None:
+        return JSONResponse({"error": f"Unknown run {thread_id}"}, status_code=404)
+    return JSONResponse(status)
+
+
+async def get_review(request: Request) -> JSONResponse:
+    thread_id = request.path_params["thread_id"]
+    runs = _runs(request)
+    review = await runs.review(thread_id)
+    if review is None:
+        status = await runs.status(thread_id)
+        if status is None:
+            return JSONResponse({"error": f"Unknown run {thread_id}"}, status_code=404)
+        return JSONResponse({"error": "No review pending", "status": status["status"]}, status_code=409)
+    return JSONResponse(review)
+
+
+async def submit_review(request: Request) -> JSONResponse:
+    thread_id = request.path_params["thread_id"]
+    body = await _json_body(request)
+    feedback = str(body.get("feedback") or "").strip()
+    if not feedback:
+        return JSONResponse({"error": "'feedback' is required"}, status_code=400)
+
+    runs = _runs(request)
+    if await runs.resume(thread_id, feedback) is None:
+        status = await runs.status(thread_id)
+        if status is None:
+            return JSONResponse({"error": f"Unknown run {thread_id}"}, status_code=404)
+        return JSONResponse({"error": "No review pending", "status": status["status"]}, status_code=409)
+    return JSONResponse({"thread_id": thread_id, "status": "running"}, status_code=202)
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    # One compiled graph (and its checkpointer) serves every session
+    app.state.runs = RunManager(main.create_multi_agent_graph())
+    try:
+        yield
+    finally:
+        await app.state.runs.aclose()
+        await close_tools()
+        await close_llm_clients()
+        close_llm_cache()
+        close_research_store()
+        await close_checkpointer()
+
+
+def create_app() -> Starlette:
+    """Build the service application."""
+    return Starlette(
+        routes=[
+            Route("/health", health, methods=["GET"]),
+            Route("/runs", create_run, methods=["POST"]),
+            Route("/runs/{thread_id}", get_run, methods=["GET"]),
+            Route("/runs/{thread_id}/review", get_review, methods=["GET"]),
+            Route("/runs/{thread_id}/review", submit_review, methods=["POST"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+app = create_app()
@@ -1,166 +1,268 @@
-"""
-Shared fixtures for live LangSmith pytest test suite.
-
-NO MOCKING — uses real ChatOpenAI and real tool schemas.
-Tests make actual LLM API calls to verify tool selection and argument generation.
-
-Requires OPENAI_API_KEY to be set.
-"""
-
-import os
-import sys
-import pytest
-from typing import List, Optional
-
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.tools import tool
-from langchain_core.messages import HumanMessage, AIMessage
-
-# Ensure project root is on path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
-# Load .env from project root
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
-
-
-# ---------------------------------------------------------------------------
-# Real tool definitions (matching MCP server signatures exactly)
-# These give the LLM the correct schemas for tool binding.
-# ---------------------------------------------------------------------------
-
-@tool
-def web_search(query: str, max_results: int = 5) -> str:
-    """Search the web using DuckDuckGo and return relevant results.
-
-    Args:
-        query: The search query string
-        max_results: Maximum number of results to return (default: 5)
-    """
-    return f"Search results for '{query}'"
-
-
-@tool
-def fetch_webpage(url: str, max_chars: int = 5000) -> str:
-    """Fetch and extract the main text content from a webpage URL.
-
-    Args:
-        url: The URL to fetch content from
-        max_chars: Maximum characters to return (default: 5000)
-    """
-    return f"Content from {url}"
-
-
-@tool
-def wikipedia_search(query: str, sentences: int = 5) -> str:
-    """Search Wikipedia and return a summary of the topic.
-
-    Args:
-        query: The topic to search for on Wikipedia
-        sentences: Number of sentences to return in summary (default: 5)
-    """
-    return f"Wikipedia summary for '{query}'"
-
-
-@tool
-def write_document(filename: str, content: str) -> str:
-    """Write content to a document file. Creates a new file or overwrites existing.
-
-    Args:
-        filename: Name of the document file (e.g., 'research_notes.md')
-        content: The content to write to the document
-    """
-    return f"Document '{filename}' written successfully"
-
-
-@tool
-def read_document(filename: str) -> str:
-    """Read the content of an existing document.
-
-    Args:
-        filename: Name of the document file to read
-    """
-    return f"Content of '{filename}'"
-
-
-@tool
-def append_to_document(filename: str, content: str) -> str:
-    """Append content to an existing document. Creates the file if it doesn't exist.
-
-    Args:
-        filename: Name of the document file
-        content: The content to append
-    """
-    return f"Content appended to '{filename}'"
-
-
-@tool
-def list_documents() -> str:
-    """List all documents in the output directory."""
-    return "No documents found."
-
-
-# ---------------------------------------------------------------------------
-# Fixtures
-# ---------------------------------------------------------------------------
-
-RESEARCH_TOOLS = [web_search, fetch_webpage, wikipedia_search]
-DOCUMENT_TOOLS = [write_document]
-
-
-@pytest.fixture(scope="session")
-def llm():
-    """Real ChatOpenAI instance (session-scoped to reuse connections)."""
-    return ChatOpenAI(model="gpt-4o", temperature=0.1)
-
-
-@pytest.fixture(scope="session")
-def research_model(llm):
-    """LLM bound with research tool schemas."""
-    return llm.bind_tools(RESEARCH_TOOLS)
-
-
-@pytest.fixture(scope="session")
-def document_model(llm):
-    """LLM bound with document tool schemas."""
-    return llm.bind_tools(DOCUMENT_TOOLS)
-
-
-@pytest.fixture(scope="session")
-def researcher_system_prompt():
-    """Load the actual researcher prompt from file."""
-    from prompts import load_prompt
-    return load_prompt("researcher")
-
-
-@pytest.fixture(scope="session")
-def writer_system_prompt():
-    """Load the actual writer prompt from file."""
-    from prompts import load_prompt
-    return load_prompt("writer")
-
-
-@pytest.fixture(scope="session")
-def reviewer_system_prompt():
-    """Reviewer prompt for the legacy pipeline test (no separate file needed)."""
-    return """You are a Document Review Specialist Agent. Your job is to fact-check and improve documents.
-
-YOUR RESPONSIBILITIES:
-1. Read the current document using read_document
-2. Review for accuracy, completeness, and quality
-3. Make improvements and save the final version using write_document
-
-REVIEW CHECKLIST:
-- Verify facts are accurately represented
-- Check that sources are properly cited
-- Ensure logical flow and structure
-- Improve clarity and readability
-- Fix any grammatical or formatting issues
-- Add any missing important information
-
-OUTPUT:
-1. Provide a brief review summary of changes made
-2. Save the improved document using write_document
-
-Be thorough but efficient. Focus on substantive improvements."""
-
+"""
+Shared fixtures for the pytest suite.
+
+Live tests (test_pipeline.py) use the `llm`, `research_model` and
+`document_model` fixtures: real ChatOpenAI with real tool schemas, making
+actual LLM API calls to verify tool selection and argument generation. They
+require OPENAI_API_KEY to be set.
+
+Offline unit tests (test_*_unit.py) need no key or network. `fake_llm_server`
+points get_llm() at the local FakeLLMServer in tests/fake_llm.py, and the
+autouse fixtures give every test an in-memory research store and checkpoint
+database with the LLM response cache turned off.
+"""
+
+import os
+import sys
+import pytest
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain_core.tools import tool
+from langchain_core.messages import HumanMessage, AIMessage
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Load .env from project root
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+
+# ---------------------------------------------------------------------------
+# Real tool definitions (matching MCP server signatures exactly)
+# These give the LLM the correct schemas for tool binding.
+# ---------------------------------------------------------------------------
+
+@tool
+def web_search(query: str, max_results: int = 5) -> str:
+    """Search the web using DuckDuckGo and return relevant results.
+
+    Args:
+        query: The search query string
+        max_results: Maximum number of results to return (default: 5)
+    """
+    return f"Search results for '{query}'"
+
+
+@tool
+def fetch_webpage(url: str, max_chars: int = 5000) -> str:
+    """Fetch and extract the main text content from a webpage URL.
+
+    Args:
+        url: The URL to fetch content from
+        max_chars: Maximum characters to return (default: 5000)
+    """
+    return f"Content from {url}"
+
+
+@tool
+def web_search_many(queries: List[str], max_results: int = 5, timeout: float = 15) -> str:
+    """Run several web searches concurrently using DuckDuckGo.
+
+    Args:
+        queries: The search query strings
+        max_results: Maximum number of results per query (default: 5)
+        timeout: Maximum seconds to wait for each search (default: 15)
+    """
+    return f"Search results for {len(queries)} queries"
+
+
+@tool
+def fetch_webpages(urls: List[str], max_chars: int = 5000, timeout: float = 15) -> str:
+    """Fetch several webpages concurrently and extract their main text content.
+
+    Args:
+        urls: The URLs to fetch content from
+        max_chars: Maximum characters to return per page (default: 5000)
+        timeout: Maximum seconds to wait for each page (default: 15)
+    """
+    return f"Content from {len(urls)} URLs"
+
+
+@tool
+def wikipedia_search(query: str, sentences: int = 5) -> str:
+    """Search Wikipedia and return a summary of the topic.
+
+    Args:
+        query: The topic to search for on Wikipedia
+        sentences: Number of sentences to return in summary (default: 5)
+    """
+    return f"Wikipedia summary for '{query}'"
+
+
+@tool
+def wikipedia_summaries(titles: List[str], sentences: int = 5) -> str:
+    """Get the summaries of several Wikipedia articles by exact title in one request.
+
+    Args:
+        titles: Article titles to look up
+        sentences: Number of sentences to return per summary (default: 5)
+    """
+    return f"Wikipedia summaries for {len(titles)} titles"
+
+
+@tool
+def write_document(filename: str, content: str) -> str:
+    """Write content to a document file. Creates a new file or overwrites existing.
+
+    Args:
+        filename: Name of the document file (e.g., 'research_notes.md')
+        content: The content to write to the document
+    """
+    return f"Document '{filename}' written successfully"
+
+
+@tool
+def read_document(filename: str) -> str:
+    """Read the content of an existing document.
+
+    Args:
+        filename: Name of the document file to read
+    """
+    return f"Content of '{filename}'"
+
+
+@tool
+def append_to_document(filename: str, content: str) -> str:
+    """Append content to an existing document. Creates the file if it doesn't exist.
+
+    Args:
+        filename: Name of the document file
+        content: The content to append
+    """
+    return f"Content appended to '{filename}'"
+
+
+@tool
+def list_documents() -> str:
+    """List all documents in the output directory."""
+    return "No documents found."
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+RESEARCH_TOOLS = [web_search, web_search_many, fetch_webpage, fetch_webpages, wikipedia_search, wikipedia_summaries]
+DOCUMENT_TOOLS = [write_document]
+
+
+@pytest.fixture(scope="session")
+def llm():
+    """Real ChatOpenAI instance (session-scoped to reuse connections)."""
+    return ChatOpenAI(model="gpt-4o", temperature=0.1)
+
+
+@pytest.fixture(scope="session")
+def research_model(llm):
+    """LLM bound with research tool schemas."""
+    return llm.bind_tools(RESEARCH_TOOLS)
+
+
+@pytest.fixture(scope="session")
+def document_model(llm):
+    """LLM bound with document tool schemas."""
+    return llm.bind_tools(DOCUMENT_TOOLS)
+
+
+@pytest.fixture(scope="session")
+def researcher_system_prompt():
+    """Load the actual researcher prompt from file."""
+    from prompts import load_prompt
+    return load_prompt("researcher")
+
+
+@pytest.fixture(scope="session")
+def writer_system_prompt():
+    """Load the actual writer prompt from file."""
+    from prompts import load_prompt
+    return load_prompt("writer")
+
+
+@pytest.fixture(scope="session")
+def reviewer_system_prompt():
+    """Reviewer prompt for the legacy pipeline test (no separate file needed)."""
+    return """You are a Document Review Specialist Agent. Your job is to fact-check and improve documents.
+
+YOUR RESPONSIBILITIES:
+1. Read the current document using read_document
+2. Review for accuracy, completeness, and quality
+3. Make improvements and save the final version using write_document
+
+REVIEW CHECKLIST:
+- Verify facts are accurately represented
+- Check that sources are properly cited
+- Ensure logical flow and structure
+- Improve clarity and readability
+- Fix any grammatical or formatting issues
+- Add any missing important information
+
+OUTPUT:
+1. Provide a brief review summary of changes made
+2. Save the improved document using write_document
+
+Be thorough but efficient. Focus on substantive improvements."""
+
+
+
+# ---------------------------------------------------------------------------
+# Offline fixtures: local fake LLM endpoint
+# ---------------------------------------------------------------------------
+
+def default_fake_reply(request: dict):
+    """Plausible reply for each agent's request shape."""
+    import json
+    if request.get("response_format"):
+        # Supervisor structured output
+        return json.dumps({
+            "action": "research",
+            "subtopics": ["First subtopic", "Second subtopic"],
+            "rewrite_instructions": None,
+        })
+    if request.get("tools"):
+        # Researcher: answer without calling tools
+        return "Research summary: key facts about the subtopic."
+    return "# Draft\n\nA document synthesized from the research."
+
+
+@pytest.fixture
+def fake_llm_server(monkeypatch):
+    """
+    Start a FakeLLMServer and point get_llm() at it.
+
+    Tests can replace `server.responder` and `server.delay` before running.
+    """
+    from tests.fake_llm import FakeLLMServer
+
+    server = FakeLLMServer(default_fake_reply).start()
+    monkeypatch.setenv("OPENAI_API_BASE", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-fake")
+    monkeypatch.setenv("MODEL_NAME", "fake-model")
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def research_store(monkeypatch):
+    """In-memory ResearchStore used by get_research_store() during each test."""
+    from utils import research_store as store_module
+    store = store_module.ResearchStore(":memory:")
+    monkeypatch.setattr(store_module, "_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_db(monkeypatch):
+    """Checkpointers created during a test use an in-memory database."""
+    monkeypatch.setenv("CHECKPOINT_DB", ":memory:")
+
+
+@pytest.fixture(autouse=True)
+def llm_cache_off(monkeypatch):
+    """Tests reach the (fake) model unless they enable LLM_CACHE themselves."""
+    from utils import close_llm_cache
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    yield
+    close_llm_cache()
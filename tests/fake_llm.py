@@ -0,0 +1,185 @@
+"""
+Local fake OpenAI-compatible LLM server and event-loop instrumentation.
+
+FakeLLMServer answers POST /v1/chat/completions from a background thread with
+responses chosen by a Python callback, after an optional delay that stands
+in for model latency. Requests with "stream": true get the reply as
+server-sent events, one word per chunk. Point OPENAI_API_BASE at `server.base_url` to run real
+ChatOpenAI clients against it without network access or API keys.
+
+LoopBlockMonitor measures how long the asyncio event loop is kept from
+running other tasks, to catch nodes that make blocking calls.
+"""
+
+import asyncio
+import gc
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Union
+
+# A responder returns the assistant message content, or a dict with
+# "content" and/or "tool_calls" ([{"name": ..., "args": {...}}])
+Responder = Callable[[dict], Union[str, dict]]
+
+
+def _completion(request: dict, reply: Union[str, dict]) -> dict:
+    if isinstance(reply, str):
+        reply = {"content": reply}
+    message = {"role": "assistant", "content": reply.get("content")}
+    if reply.get("tool_calls"):
+        message["tool_calls"] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:8]}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call.get("args", {}))},
+            }
+            for call in reply["tool_calls"]
+        ]
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:8]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model") or "fake-model",
+        "choices": [{
+            "index": 0,
+            "message": message,
+            "finish_reason": "tool_calls" if reply.get("tool_calls") else "stop",
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+    }
+
+
+def _stream_chunks(request: dict, reply: Union[str, dict]) -> List[dict]:
+    content = reply if isinstance(reply, str) else reply.get("content") or ""
+    base = {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:8]}",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": request.get("model") or "fake-model",
+    }
+    # Split after whitespace so the pieces concatenate back to the content
+    pieces = re.findall(r"\S+\s*|\s+", content) or [""]
+    chunks = [
+        {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece} if i == 0 else {"content": piece}, "finish_reason": None}]}
+        for i, piece in enumerate(pieces)
+    ]
+    chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+    return chunks
+
+
+class FakeLLMServer:
+    """
+    OpenAI-compatible chat completions endpoint on localhost.
+
+    Args:
+        responder: Chooses the reply for each request body
+        delay: Seconds to wait before replying (simulated model latency)
+        chunk_delay: Seconds between streamed chunks
+    """
+
+    def __init__(self, responder: Responder, delay: float = 0.0, chunk_delay: float = 0.0):
+        self.responder = responder
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.requests: List[dict] = []
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server.requests.append(body)
+                time.sleep(server.delay)
+                if body.get("stream"):
+                    self._send_stream(body)
+                    return
+                payload = json.dumps(_completion(body, server.responder(body))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_stream(self, body: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for chunk in _stream_chunks(body, server.responder(body)):
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(server.chunk_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+
+class LoopBlockMonitor:
+    """
+    Async context manager recording the longest stall of the event loop.
+
+    A background task sleeps for `interval` seconds at a time; any extra delay
+    before it wakes up is time the loop spent blocked by someone else.
+
+    Objects alive on entry are moved out of the garbage collector's reach
+    (gc.freeze) for the duration: a full collection over the heap left by
+    earlier tests can pause the process for 100+ ms, which says nothing
+    about the code being measured.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.max_block = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.max_block = max(self.max_block, loop.time() - start - self.interval)
+
+    async def __aenter__(self) -> "LoopBlockMonitor":
+        gc.collect()
+        gc.freeze()
+        self._task = asyncio.create_task(self._watch())
+        # Let the watcher take its first timestamp
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            gc.unfreeze()
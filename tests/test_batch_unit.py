@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+import batch
+import main
+from tests.conftest import RESEARCH_TOOLS
+from utils import close_checkpointer, close_llm_clients
+
+
+def test_load_queries_assigns_unique_ids(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    path.write_text(
+        '{"id": "ai", "query": "AI"}\n'
+        "\n"
+        '{"id": "ai", "query": "AI again", "feedback": "Shorter"}\n'
+        '{"query": "No id / here"}\n',
+        encoding="utf-8",
+    )
+
+    queries = batch.load_queries(path)
+
+    assert [q["id"] for q in queries] == ["ai", "ai-2", "4"]
+    assert queries[1]["feedback"] == ["Shorter"]
+    assert queries[2]["feedback"] == []
+
+
+def test_load_queries_requires_query(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    path.write_text('{"id": "x"}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="missing 'query'"):
+        batch.load_queries(path)
+
+
+@pytest.mark.asyncio
+async def test_run_batch_against_fake_llm(fake_llm_server, tmp_path, monkeypatch):
+    """Queries run concurrently to approval; scripted feedback triggers another round."""
+    monkeypatch.setattr("utils.pdf.OUTPUT_DIR", tmp_path / "pdf")
+    fake_llm_server.delay = 0.05
+    queries = [
+        {"id": "one", "query": "History of the printing press", "feedback": []},
+        {"id": "two", "query": "History of the telegraph", "feedback": ["Add more on Morse code"]},
+        {"id": "three", "query": "History of radio", "feedback": []},
+    ]
+
+    try:
+        with patch.object(main, "get_tools", AsyncMock(return_value=RESEARCH_TOOLS)):
+            summary = await batch.run_batch(queries, tmp_path / "out", concurrency=2)
+    finally:
+        await close_llm_clients()
+        await close_checkpointer()
+
+    reports = {r["id"]: r for r in map(json.loads, (tmp_path / "out" / "report.jsonl").read_text().splitlines())}
+    assert summary["queries"] == summary["succeeded"] == 3
+    assert json.loads((tmp_path / "out" / "summary.json").read_text()) == summary
+    assert all(r["status"] == "ok" for r in reports.values())
+    assert reports["one"]["reviews"] == 1
+    assert reports["two"]["reviews"] == 2
+    assert reports["one"]["total_tokens"] > 0
+    assert (tmp_path / "out" / "two.md").read_text().startswith("# Draft")
+    assert len(list((tmp_path / "pdf").glob("*.pdf"))) == 3
@@ -0,0 +1,201 @@
+import operator
+import threading
+import time
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Command, interrupt
+
+from utils.checkpoint import (
+    CompactSerializer,
+    ZLIB_SUFFIX,
+    _checkpoint_id_at,
+    close_checkpointer,
+    get_checkpointer,
+    prune_checkpoints,
+)
+
+
+class _State(TypedDict, total=False):
+    document: str
+    steps: Annotated[List[int], operator.add]
+    feedback: str
+
+
+def _graph(checkpointer, steps: int = 3):
+    """document stays the same while `steps` nodes each add a step, then a review interrupt."""
+    builder = StateGraph(_State)
+    previous = START
+    for i in range(steps):
+        builder.add_node(f"step{i}", lambda state, i=i: {"steps": [i]})
+        builder.add_edge(previous, f"step{i}")
+        previous = f"step{i}"
+    builder.add_node("review", lambda state: {"feedback": interrupt("review")})
+    builder.add_edge(previous, "review")
+    builder.add_edge("review", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+async def _checkpoint_bytes(saver) -> int:
+    async with saver.conn.execute("SELECT SUM(LENGTH(checkpoint)) FROM checkpoints") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+def test_serializer_round_trip_shares_large_values():
+    serde = CompactSerializer(":memory:", compress_min_bytes=100, shared_min_bytes=100)
+    document = "A long unchanging draft. " * 200
+    first = {"id": "1", "channel_values": {"document": document, "steps": [0]}}
+    second = {"id": "2", "channel_values": {"document": document, "steps": [0, 1]}}
+
+    type_, data = serde.dumps_typed(first)
+    serde.dumps_typed(second)
+
+    assert serde.loads_typed((type_, data)) == first
+    # The draft is stored once and each checkpoint only holds its hash
+    assert serde._conn.execute("SELECT COUNT(*) FROM checkpoint_values").fetchone()[0] == 1
+    assert len(data) < 300
+
+
+def test_serializer_compresses_large_payloads():
+    serde = CompactSerializer(":memory:", compress_min_bytes=100)
+    text = "repeated text " * 100
+
+    type_, data = serde.dumps_typed(text)
+
+    assert type_.endswith(ZLIB_SUFFIX)
+    assert len(data) < len(text) / 5
+    assert serde.loads_typed((type_, data)) == text
+    assert not serde.dumps_typed("short")[0].endswith(ZLIB_SUFFIX)
+
+
+def test_collect_garbage_drops_unreferenced_values():
+    serde = CompactSerializer(":memory:", shared_min_bytes=10)
+    serde.dumps_typed({"id": "old", "channel_values": {"document": "old draft " * 10}})
+    serde.dumps_typed({"id": "new", "channel_values": {"document": "new draft " * 10}})
+
+    assert serde.collect_garbage(["old"]) == 1
+    rows = serde._conn.execute("SELECT checkpoint_id FROM checkpoint_value_refs").fetchall()
+    assert rows == [("new",)]
+
+
+def test_collect_garbage_keeps_values_of_uncommitted_checkpoints():
+    """Values written for a checkpoint whose row isn't saved yet survive another thread's pruning."""
+    serde = CompactSerializer(":memory:", shared_min_bytes=10)
+    shared = "a draft both threads hold " * 10
+    serde.dumps_typed({"id": "pruned", "channel_values": {"document": shared, "notes": "pruned notes " * 10}})
+    # Another thread serialized this checkpoint but hasn't inserted its row
+    type_, data = serde.dumps_typed({"id": "in-flight", "channel_values": {"document": shared}})
+
+    assert serde.collect_garbage(["pruned"]) == 1
+    assert serde.loads_typed((type_, data))["channel_values"]["document"] == shared
+
+
+@pytest.mark.asyncio
+async def test_large_unchanged_state_is_not_copied_per_checkpoint():
+    """Checkpoints of a run whose draft never changes stay small with CompactSerializer."""
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    document = "".join(f"Paragraph {i} of a long draft awaiting review.\n" for i in range(400))
+    sizes = {}
+    for name, serde in [("plain", None), ("compact", CompactSerializer(":memory:"))]:
+        async with aiosqlite.connect(":memory:") as conn:
+            saver = AsyncSqliteSaver(conn, serde=serde)
+            graph = _graph(saver, steps=5)
+            config = {"configurable": {"thread_id": name}}
+            await graph.ainvoke({"document": document}, config)
+            sizes[name] = await _checkpoint_bytes(saver)
+            assert (await graph.aget_state(config)).values["document"] == document
+
+    assert sizes["compact"] < sizes["plain"] / 10
+
+
+@pytest.mark.asyncio
+async def test_prune_keeps_newest_checkpoints_and_resume_still_works():
+    saver = get_checkpointer()
+    try:
+        graph = _graph(saver, steps=6)
+        config = {"configurable": {"thread_id": "prune"}}
+        await graph.ainvoke({"document": "x" * 10000}, config)
+
+        deleted = await prune_checkpoints(saver, "prune", keep=2)
+        history = [c async for c in saver.alist(config)]
+
+        assert deleted > 0
+        assert len(history) == 2
+        result = await graph.ainvoke(Command(resume="approve"), config)
+        assert result["feedback"] == "approve"
+        assert result["steps"] == [0, 1, 2, 3, 4, 5]
+    finally:
+        await close_checkpointer()
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_values_are_stored_off_the_event_loop():
+    saver = get_checkpointer()
+    compact = saver.serde.compact
+    threads = []
+
+    def recording_compact(checkpoint):
+        threads.append(threading.get_ident())
+        return compact(checkpoint)
+
+    try:
+        saver.serde.compact = recording_compact
+        graph = _graph(saver, steps=2)
+        config = {"configurable": {"thread_id": "offload"}}
+        await graph.ainvoke({"document": "x" * 10000}, config)
+
+        assert threads and threading.get_ident() not in threads
+        assert (await graph.aget_state(config)).values["document"] == "x" * 10000
+    finally:
+        await close_checkpointer()
+
+
+@pytest.mark.asyncio
+async def test_prune_drops_values_of_checkpoints_never_committed():
+    """Old refs with no checkpoint row are swept; recent ones may still be in flight."""
+    saver = get_checkpointer()
+    serde = saver.serde
+    try:
+        graph = _graph(saver, steps=2)
+        config = {"configurable": {"thread_id": "orphans"}}
+        await graph.ainvoke({"document": "x" * 10000}, config)
+        values = serde._conn.execute("SELECT COUNT(*) FROM checkpoint_values").fetchone()[0]
+        old = _checkpoint_id_at(time.time() - 7200)
+        recent = _checkpoint_id_at(time.time())
+        serde.compact({"id": old, "channel_values": {"document": "crashed " * 1000}})
+        serde.compact({"id": recent, "channel_values": {"document": "in flight " * 1000}})
+
+        await prune_checkpoints(saver, "orphans", keep=100)
+
+        refs = {row[0] for row in serde._conn.execute("SELECT checkpoint_id FROM checkpoint_value_refs")}
+        assert old not in refs
+        assert recent in refs
+        assert serde._conn.execute("SELECT COUNT(*) FROM checkpoint_values").fetchone()[0] == values + 1
+        assert (await graph.aget_state(config)).values["document"] == "x" * 10000
+    finally:
+        await close_checkpointer()
+
+
+@pytest.mark.asyncio
+async def test_thread_resumes_after_restart(monkeypatch, tmp_path):
+    """A run interrupted for review can be resumed from a new checkpointer on the same file."""
+    monkeypatch.setenv("CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    config = {"configurable": {"thread_id": "restart"}}
+
+    try:
+        await _graph(get_checkpointer()).ainvoke({"document": "draft " * 2000}, config)
+    finally:
+        await close_checkpointer()
+
+    try:
+        graph = _graph(get_checkpointer())
+        assert (await graph.aget_state(config)).next == ("review",)
+        result = await graph.ainvoke(Command(resume="looks good"), config)
+    finally:
+        await close_checkpointer()
+
+    assert result["document"] == "draft " * 2000
+    assert result["feedback"] == "looks good"
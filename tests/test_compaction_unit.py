@@ -0,0 +1,147 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.compaction import CONDENSED_SUBTOPIC, FactIndex, compact_records
+
+
+@pytest.fixture(autouse=True)
+def char_tokens():
+    """Count one token per 4 characters regardless of tiktoken availability."""
+    with patch("agents.compaction.count_tokens", side_effect=lambda text: len(text) // 4), \
+         patch("utils.research_store.count_tokens", side_effect=lambda text: len(text) // 4), \
+         patch("agents.compaction.split_by_tokens", side_effect=lambda text, n: text.split("\n\n")):
+        yield
+
+
+def test_fact_index_exact_and_near_duplicates():
+    index = FactIndex()
+    assert index.add_if_new("- Python was created by Guido van Rossum in 1991 (python.org)")
+    # Same words, different case and punctuation
+    assert not index.add_if_new("* python was created by Guido van Rossum in 1991 -- python.org")
+    # Nearly the same sentence
+    assert not index.add_if_new("- Python was created by Guido van Rossum in 1991 (python.org, wiki)")
+    # Shares a few words only
+    assert index.add_if_new("- Python 3.0 was released in December 2008 (python.org)")
+    # Short lines such as section markers are never treated as duplicates
+    assert index.add_if_new("--- SOURCE 1 ---")
+    assert index.add_if_new("--- SOURCE 1 ---")
+
+
+@pytest.mark.asyncio
+async def test_compact_drops_facts_repeated_across_rounds(research_store):
+    old = research_store.add("run", "Invention", "- The printing press was invented around 1440 by Gutenberg\n- Movable type spread across Europe")
+    repeat = research_store.add("run", "History", "- The printing press was invented around 1440 by Gutenberg")
+    mixed = research_store.add("run", "Spread", "--- Findings ---\n- The printing press was invented around 1440 by Gutenberg\n- Venice became a major printing centre by 1500")
+
+    with patch("agents.compaction.get_llm") as get_llm:
+        ids, report = await compact_records(research_store, "run", [old], [repeat, mixed], "q", max_tokens=1000)
+
+    get_llm.assert_not_called()
+    # The fully repeated record is dropped; the mixed one is replaced by a trimmed copy
+    assert ids[0] == old and len(ids) == 2 and ids[1] not in (repeat, mixed)
+    trimmed = research_store.get([ids[1]])[0]
+    assert trimmed.text == "--- Findings ---\n- Venice became a major printing centre by 1500"
+    assert trimmed.subtopic == "Spread"
+    # Records are append-only: the original is untouched
+    assert "Gutenberg" in research_store.get([mixed])[0].text
+    assert report["deduplicated"] < report["raw"]
+    assert report["final"] == report["deduplicated"]
+    assert report["condensed"] is False
+
+
+@pytest.mark.asyncio
+async def test_compact_keeps_records_of_short_lines(research_store):
+    """Lists of names or dates have no line long enough to compare, so nothing is dropped."""
+    cities = research_store.add("run", "Capitals", "Paris\nBerlin\nRome")
+    dates = research_store.add("run", "Dates", "- 1789\n- 1871")
+
+    ids, report = await compact_records(research_store, "run", [], [cities, dates], "q", max_tokens=1000)
+
+    assert ids == [cities, dates]
+    assert report["final"] == report["raw"] > 0
+
+
+@pytest.mark.asyncio
+async def test_compact_over_budget_condenses_earlier_rounds(research_store):
+    existing = [research_store.add("run", "Earlier", f"- Earlier round fact number {i} with several details" * 3) for i in range(8)]
+    new = research_store.add("run", "New", "- Brand new fact from this round")
+    model = MagicMock()
+    model.ainvoke = AsyncMock(return_value=AIMessage(content="- note"))
+
+    with patch("agents.compaction.get_llm", return_value=model):
+        ids, report = await compact_records(research_store, "run", existing, [new], "printing press", max_tokens=100)
+
+    assert report["condensed"] is True
+    assert report["final"] <= 100 < report["deduplicated"]
+    # Earlier rounds were condensed into one notes record; the new round is kept verbatim
+    assert len(ids) == 2 and ids[1] == new
+    notes = research_store.get([ids[0]])[0]
+    assert notes.subtopic == CONDENSED_SUBTOPIC
+    assert "Earlier round fact" not in notes.text
+    prompt = model.ainvoke.await_args_list[0].args[0][1].content
+    assert "printing press" in prompt and "Earlier round fact number 0" in prompt
+
+
+@pytest.mark.asyncio
+async def test_merge_node_reports_rounds(research_store):
+    from main import merge_research_node
+
+    old = research_store.add("t1", "Invention", "- The printing press was invented around 1440 by Gutenberg")
+    new = [
+        research_store.add("t1", "History", "- The printing press was invented around 1440 by Gutenberg"),
+        research_store.add("t1", "Paper", "- Paper mills spread through Europe in the 13th century"),
+    ]
+    state = {
+        "messages": [HumanMessage(content="History of printing")],
+        "research_store_id": "t1",
+        "research_record_ids": [old],
+        "parallel_results": new,
+        "research_rounds": [{"round": 1}],
+    }
+    result = await merge_research_node(state)
+
+    assert result["research_record_ids"] == [old, new[1]]
+    assert result["research_rounds"][0]["round"] == 2
+
+
+@pytest.mark.asyncio
+async def test_merge_clears_parallel_results_between_rounds(research_store):
+    """Each round's merge sees only the records its own researchers added."""
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import END, START, StateGraph
+
+    from agents.state import AgentState
+    from main import merge_research_node
+
+    rounds = [
+        [research_store.add("t1", "Invention", "- The printing press was invented around 1440 by Gutenberg")],
+        [research_store.add("t1", "Paper", "- Paper mills spread through Europe in the 13th century")],
+    ]
+
+    def research(state):
+        return {"parallel_results": rounds[len(state.get("research_rounds") or [])]}
+
+    builder = StateGraph(AgentState)
+    builder.add_node("research", research)
+    builder.add_node("merge", merge_research_node)
+    builder.add_edge(START, "research")
+    builder.add_edge("research", "merge")
+    builder.add_edge("merge", END)
+    graph = builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "t1"}}
+
+    first = await graph.ainvoke({
+        "messages": [HumanMessage(content="History of printing")],
+        "research_store_id": "t1",
+        "research_record_ids": [],
+        "parallel_results": [],
+        "research_rounds": [],
+    }, config)
+    second = await graph.ainvoke({"messages": []}, config)
+
+    assert first["parallel_results"] == second["parallel_results"] == []
+    assert second["research_record_ids"] == rounds[0] + rounds[1]
+    # The second round's raw count is the first round's records plus its own, not the first round's twice
+    reports = second["research_rounds"]
+    assert reports[1]["raw"] == reports[0]["final"] + research_store.get(rounds[1])[0].tokens
@@ -0,0 +1,96 @@
+"""
+Event loop responsiveness tests.
+
+Runs the real graph (real ChatOpenAI clients) against a local fake LLM server
+with simulated latency, and checks that no node holds the event loop for
+longer than MAX_LOOP_BLOCK while waiting on the model.
+"""
+
+import asyncio
+import time
+import uuid
+import pytest
+from unittest.mock import AsyncMock, patch
+from langchain_core.messages import HumanMessage
+
+from tests.conftest import RESEARCH_TOOLS
+from tests.fake_llm import LoopBlockMonitor
+from utils import close_checkpointer, close_llm_clients
+
+# Longest acceptable stall; well below the simulated model latency
+MAX_LOOP_BLOCK = 0.1
+MODEL_LATENCY = 0.3
+
+
+async def _warm_up(server):
+    """
+    Make one request with no latency so lazy imports and TLS setup, which
+    happen once per process, don't count against the steady-state budget.
+    """
+    from utils import get_llm
+    delay, server.delay = server.delay, 0
+    await get_llm(temperature=0).ainvoke("ping")
+    server.delay = delay
+    server.requests.clear()
+
+
+@pytest.mark.asyncio
+async def test_monitor_detects_blocking_call():
+    """Sanity check: a synchronous sleep on the loop is reported."""
+    async with LoopBlockMonitor() as monitor:
+        await asyncio.sleep(0.02)
+        time.sleep(MODEL_LATENCY)
+        await asyncio.sleep(0.02)
+
+    assert monitor.max_block >= MODEL_LATENCY * 0.8
+
+
+@pytest.mark.asyncio
+async def test_supervisor_does_not_block_loop(fake_llm_server):
+    from agents.supervisor import run_supervisor
+
+    fake_llm_server.delay = MODEL_LATENCY
+    state = {"messages": [HumanMessage(content="History of the printing press")]}
+
+    try:
+        await _warm_up(fake_llm_server)
+        async with LoopBlockMonitor() as monitor:
+            result = await run_supervisor(state)
+    finally:
+        await close_llm_clients()
+
+    assert result["current_phase"] == "research"
+    assert result["subtopics"] == ["First subtopic", "Second subtopic"]
+    assert len(fake_llm_server.requests) == 1
+    assert monitor.max_block < MAX_LOOP_BLOCK
+
+
+@pytest.mark.asyncio
+async def test_graph_does_not_block_loop(fake_llm_server):
+    """Supervisor → parallel researchers → merge → writer, up to the human review interrupt."""
+    import main
+
+    fake_llm_server.delay = MODEL_LATENCY
+    graph = main.create_multi_agent_graph()
+    # Compiled once per checkpointer and shared by every query
+    assert main.create_multi_agent_graph() is graph
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+    try:
+        await _warm_up(fake_llm_server)
+        with patch.object(main, "get_tools", AsyncMock(return_value=RESEARCH_TOOLS)):
+            async with LoopBlockMonitor() as monitor:
+                await graph.ainvoke(
+                    {"messages": [HumanMessage(content="History of the printing press")]},
+                    config,
+                )
+        snapshot = await graph.aget_state(config)
+    finally:
+        await close_llm_clients()
+        await close_checkpointer()
+
+    assert snapshot.next == ("human_review",)
+    assert snapshot.values["draft_document"].startswith("# Draft")
+    # Supervisor, two researchers and the writer
+    assert len(fake_llm_server.requests) == 4
+    assert monitor.max_block < MAX_LOOP_BLOCK
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+
+from mcp_servers.extraction import FEED_CHUNK_SIZE, LxmlExtractor, SoupExtractor, get_extractor
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures" / "html").glob("*.html"))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+def test_lxml_matches_soup_on_fixtures(path):
+    """The streaming engine yields the same main content as the original parser."""
+    html = path.read_bytes()
+    fast = LxmlExtractor().extract(html).text.splitlines()
+    slow = SoupExtractor().extract(html).text.splitlines()
+
+    # lxml additionally drops <aside> boilerplate; everything it keeps is in the original
+    assert set(fast) <= set(slow)
+    assert len("".join(fast)) > 0.9 * len("".join(slow))
+
+
+@pytest.mark.parametrize("engine", ["lxml", "soup"])
+def test_boilerplate_is_removed(engine):
+    html = (
+        "<html><head><script>var x = 1;</script><style>p{}</style></head><body>"
+        "<header>Site</header><nav>Menu</nav><p>Main <!-- note --> text</p><footer>Legal</footer>"
+        "</body></html>"
+    )
+    result = get_extractor(engine).extract(html)
+
+    assert result.text == "Main\ntext"
+    assert not result.truncated
+
+
+def test_stops_at_budget_and_reports_truncation():
+    html = "<body>" + "".join(f"<p>paragraph number {i}</p>" for i in range(1000)) + "</body>"
+    result = LxmlExtractor().extract(html, max_chars=100)
+
+    assert result.truncated
+    assert len(result.text) <= 100
+    assert result.text.startswith("paragraph number 0\nparagraph number 1")
+
+
+@pytest.mark.parametrize("engine", ["lxml", "soup"])
+def test_text_exactly_at_budget_is_not_truncated(engine):
+    result = get_extractor(engine).extract("<body><p>" + "x" * 20 + "</p></body>", max_chars=20)
+
+    assert result.text == "x" * 20
+    assert not result.truncated
+
+
+def test_incremental_feed_signals_done():
+    """feed() returns True once the budget is reached so callers can stop reading."""
+    session = LxmlExtractor().session(max_chars=50)
+    assert session.feed(b"<html><body><p>short</p>") is False
+    assert session.feed(b"<p>" + b"x" * 100 + b"</p>") is True
+    assert session.close().startswith("short\nxxx")
+
+
+def test_multibyte_characters_split_across_chunks():
+    """UTF-8 sequences cut at a chunk boundary decode correctly."""
+    prefix = "<html><body><p>"
+    padding = "a" * (FEED_CHUNK_SIZE - len(prefix) - 1)
+    html = (prefix + padding + "é</p><p>café – naïve</p></body></html>").encode("utf-8")
+    # The two bytes of the first "é" straddle the first chunk boundary
+    assert html[FEED_CHUNK_SIZE - 1:FEED_CHUNK_SIZE + 1] == "é".encode("utf-8")
+    result = LxmlExtractor().extract(html)
+
+    assert result.text.endswith("café – naïve")
+
+
+def test_declared_charset_is_respected():
+    html = '<html><head><meta charset="iso-8859-1"></head><body><p>Zürich</p></body></html>'
+    result = LxmlExtractor().extract(html.encode("iso-8859-1"))
+
+    assert result.text == "Zürich"
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        get_extractor("regex")
@@ -0,0 +1,52 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+import httpx
+
+from mcp_servers import http_client
+
+
+def _tracking_transport(stats: dict, delay: float = 0.05) -> httpx.MockTransport:
+    """Mock transport that records the peak number of in-flight requests per host."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        stats["inflight"][host] = stats["inflight"].get(host, 0) + 1
+        stats["peak"][host] = max(stats["peak"].get(host, 0), stats["inflight"][host])
+        await asyncio.sleep(delay)
+        stats["inflight"][host] -= 1
+        return httpx.Response(200, text=f"<p>{request.url.path}</p>")
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_within_a_loop():
+    try:
+        assert http_client.get_client() is http_client.get_client()
+    finally:
+        await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fetches_run_concurrently_with_per_host_limit(monkeypatch):
+    """Requests proceed in parallel but never exceed HTTP_MAX_PER_HOST per host."""
+    monkeypatch.setenv("HTTP_MAX_PER_HOST", "2")
+    stats = {"inflight": {}, "peak": {}}
+    client = httpx.AsyncClient(transport=_tracking_transport(stats))
+
+    urls = [f"https://a.example/{i}" for i in range(6)] + [f"https://b.example/{i}" for i in range(2)]
+    try:
+        with patch.object(http_client, "get_client", return_value=client):
+            start = asyncio.get_running_loop().time()
+            responses = await asyncio.gather(*(http_client.fetch(u) for u in urls))
+            elapsed = asyncio.get_running_loop().time() - start
+    finally:
+        await client.aclose()
+        await http_client.aclose()
+
+    assert [r.text for r in responses] == [f"<p>/{u.rsplit('/', 1)[1]}</p>" for u in urls]
+    assert stats["peak"]["a.example"] == 2
+    assert stats["peak"]["b.example"] == 2
+    # 6 requests to a.example at 2 at a time take ~3 rounds, not 8 sequential ones
+    assert elapsed < 0.05 * 6
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from utils import get_llm, max_fanout, min_fanout, research_slot
+from utils.limits import llm_rate_limiter
+
+
+def test_fanout_bounded_by_subtopics_and_concurrency(monkeypatch):
+    monkeypatch.setenv("RESEARCH_MAX_SUBTOPICS", "6")
+    monkeypatch.setenv("RESEARCH_CONCURRENCY", "3")
+    monkeypatch.delenv("LLM_REQUESTS_PER_MINUTE", raising=False)
+    assert max_fanout() == 3
+
+    monkeypatch.setenv("RESEARCH_CONCURRENCY", "10")
+    assert max_fanout() == 6
+
+
+def test_fanout_bounded_by_rate_budget(monkeypatch):
+    monkeypatch.setenv("RESEARCH_MAX_SUBTOPICS", "8")
+    monkeypatch.setenv("RESEARCH_CONCURRENCY", "8")
+    monkeypatch.setenv("RESEARCHER_MAX_ITERATIONS", "5")
+    monkeypatch.setenv("LLM_REQUESTS_PER_MINUTE", "15")
+    assert max_fanout() == 3
+
+    # Never below one researcher, and the minimum never exceeds the maximum
+    monkeypatch.setenv("LLM_REQUESTS_PER_MINUTE", "2")
+    monkeypatch.setenv("RESEARCH_MIN_SUBTOPICS", "3")
+    assert max_fanout() == 1
+    assert min_fanout() == 1
+
+
+def test_rate_limiter_shared_by_llm_instances(monkeypatch):
+    monkeypatch.setenv("MODEL_NAME", "fake-model")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-fake")
+    monkeypatch.delenv("LLM_REQUESTS_PER_MINUTE", raising=False)
+    assert get_llm(temperature=0).rate_limiter is None
+
+    monkeypatch.setenv("LLM_REQUESTS_PER_MINUTE", "120")
+    limiter = llm_rate_limiter()
+    assert limiter.requests_per_second == 2
+    assert get_llm(temperature=0).rate_limiter is limiter
+    assert get_llm(temperature=0.5).rate_limiter is limiter
+
+
+@pytest.mark.asyncio
+async def test_research_slot_caps_concurrent_calls(monkeypatch):
+    monkeypatch.setenv("RESEARCH_CONCURRENCY", "2")
+    in_flight = peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with research_slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
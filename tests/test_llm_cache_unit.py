@@ -0,0 +1,115 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from utils import astream_cached, close_llm_clients, get_llm, llm_cache_stats
+from utils.llm_cache import LLMResponseCache, response_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = LLMResponseCache(path=str(tmp_path / "llm.sqlite"), max_bytes=100_000)
+    yield c
+    c.close()
+
+
+def _generation(content: str, **kwargs) -> list:
+    return [ChatGeneration(message=AIMessage(content=content, **kwargs))]
+
+
+def test_keys_cover_scope_model_and_messages():
+    base = response_key("http://a/v1", "[messages]", "model-params")
+    assert base == response_key("http://a/v1", "[messages]", "model-params")
+    assert base != response_key("http://b/v1", "[messages]", "model-params")
+    assert base != response_key("http://a/v1", "[other messages]", "model-params")
+    assert base != response_key("http://a/v1", "[messages]", "other-params")
+
+
+def test_update_then_lookup_is_a_hit(cache):
+    assert cache.lookup("prompt", "llm") is None
+    tool_call = {"name": "web_search", "args": {"query": "AI"}, "id": "call_1", "type": "tool_call"}
+    cache.update("prompt", "llm", _generation("", tool_calls=[tool_call]))
+
+    cached = cache.lookup("prompt", "llm")
+    assert cached[0].message.tool_calls == [tool_call]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["writes"] == 1
+    assert stats["entries"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    first = LLMResponseCache(path)
+    first.update("prompt", "llm", _generation("saved"))
+    first.close()
+
+    second = LLMResponseCache(path)
+    assert second.lookup("prompt", "llm")[0].message.content == "saved"
+    second.close()
+
+
+def test_lru_eviction_keeps_recently_used(cache):
+    # Incompressible content so each entry is a known size
+    import os
+    payload = lambda: os.urandom(600).hex()
+    cache.update("a", "llm", _generation(payload()))
+    size = cache.stats()["bytes"]
+    cache.max_bytes = int(size * 2.5)
+    cache.update("b", "llm", _generation(payload()))
+    cache.lookup("a", "llm")
+    cache.update("c", "llm", _generation(payload()))
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") is not None
+    assert cache.lookup("c", "llm") is not None
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_are_served_from_cache(fake_llm_server, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", ":memory:")
+    messages = [HumanMessage(content="Summarize AI")]
+    try:
+        model = get_llm(temperature=0)
+        first = await model.ainvoke(messages)
+        second = await model.ainvoke(messages)
+        await model.ainvoke([HumanMessage(content="Summarize radio")])
+        # Different parameters are a different request
+        await get_llm(temperature=0.5).ainvoke(messages)
+    finally:
+        await close_llm_clients()
+
+    assert second.content == first.content
+    assert len(fake_llm_server.requests) == 3
+    stats = llm_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_streamed_requests_are_cached(fake_llm_server, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", ":memory:")
+    messages = [HumanMessage(content="Write the draft")]
+    try:
+        model = get_llm(temperature=0, stream_usage=True)
+        first = [chunk.content async for chunk in astream_cached(model, messages)]
+        second = [chunk.content async for chunk in astream_cached(model, messages)]
+    finally:
+        await close_llm_clients()
+
+    assert len(first) > 1
+    assert second == ["".join(first)]
+    assert len(fake_llm_server.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_off_by_default(fake_llm_server):
+    messages = [HumanMessage(content="Summarize AI")]
+    try:
+        model = get_llm(temperature=0)
+        await model.ainvoke(messages)
+        await model.ainvoke(messages)
+    finally:
+        await close_llm_clients()
+
+    assert len(fake_llm_server.requests) == 2
+    assert llm_cache_stats() is None
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+
+from utils import llm
+from utils.llm import bind_tools_cached, close_llm_clients, get_llm
+
+
+@pytest.fixture(autouse=True)
+def llm_env(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("MODEL_NAME", "test-model")
+    monkeypatch.setenv("OPENAI_API_BASE", "http://localhost:9/v1")
+
+
+@pytest.mark.asyncio
+async def test_same_settings_return_same_instance():
+    try:
+        assert get_llm(temperature=0.1) is get_llm(temperature=0.1)
+        assert get_llm(temperature=0) is not get_llm(temperature=0.1)
+        assert get_llm(temperature=0, max_tokens=100) is not get_llm(temperature=0)
+    finally:
+        await close_llm_clients()
+
+
+@pytest.mark.asyncio
+async def test_instances_share_connection_pool():
+    try:
+        writer, supervisor = get_llm(temperature=0), get_llm(temperature=0.1)
+        assert writer.http_async_client is supervisor.http_async_client
+        assert writer.http_client is supervisor.http_client
+    finally:
+        await close_llm_clients()
+
+
+@pytest.mark.asyncio
+async def test_endpoint_change_gets_new_instance(monkeypatch):
+    try:
+        first = get_llm()
+        monkeypatch.setenv("OPENAI_API_BASE", "http://localhost:10/v1")
+        second = get_llm()
+        assert first is not second
+        assert first.http_async_client is not second.http_async_client
+    finally:
+        await close_llm_clients()
+
+
+@pytest.mark.asyncio
+async def test_max_connections_is_configurable(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONNECTIONS", "3")
+    try:
+        pool = get_llm().http_async_client._transport._pool
+        assert pool._max_connections == 3
+    finally:
+        await close_llm_clients()
+
+
+def test_each_event_loop_gets_its_own_clients():
+    """Async connections are loop-bound, so a new loop must not reuse them."""
+    async def grab():
+        model = get_llm()
+        await close_llm_clients()
+        return model
+
+    assert asyncio.run(grab()) is not asyncio.run(grab())
+
+
+@pytest.mark.asyncio
+async def test_tool_bindings_are_reused():
+    from tests.conftest import RESEARCH_TOOLS
+    try:
+        model = get_llm(temperature=0.1)
+        bound = bind_tools_cached(model, RESEARCH_TOOLS)
+        assert bind_tools_cached(model, list(RESEARCH_TOOLS)) is bound
+        assert bind_tools_cached(model, RESEARCH_TOOLS[:2]) is not bound
+        assert bind_tools_cached(get_llm(temperature=0), RESEARCH_TOOLS) is not bound
+        assert len(bound.kwargs["tools"]) == len(RESEARCH_TOOLS)
+    finally:
+        await close_llm_clients()
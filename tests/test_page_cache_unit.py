@@ -0,0 +1,134 @@
+import time
+import pytest
+from unittest.mock import patch
+
+from mcp_servers.page_cache import PageCache, normalize_url, url_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = PageCache(path=str(tmp_path / "pages.sqlite"), ttl=60, max_bytes=10_000)
+    yield c
+    c.close()
+
+
+def test_normalize_url_collapses_equivalent_spellings():
+    """Host case, default port, fragment, tracking params and param order don't matter."""
+    a = "HTTPS://Example.com:443/page?b=2&a=1&utm_source=x#section"
+    b = "https://example.com/page?a=1&b=2"
+    assert normalize_url(a) == normalize_url(b)
+    assert url_key(a) == url_key(b)
+    assert url_key("https://example.com/other") != url_key(b)
+
+
+def test_put_then_get_is_a_hit(cache):
+    cache.put("https://example.com/a", body=b"<p>hi</p>", text="hi", etag='"v1"')
+    page = cache.get("https://EXAMPLE.com/a#top")
+
+    assert page.text == "hi"
+    assert page.body == b"<p>hi</p>"
+    assert page.validators() == {"If-None-Match": '"v1"'}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 0
+
+
+def test_stale_entry_counts_as_miss_until_revalidated(cache):
+    cache.put("https://example.com/a", body=b"x", text="x", last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    cache.ttl = 0
+    page = cache.get("https://example.com/a")
+    assert not page.is_fresh(cache.ttl)
+    assert cache.stats()["misses"] == 1
+
+    cache.ttl = 60
+    cache.mark_revalidated("https://example.com/a")
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 0 and stats["revalidations"] == 1
+    assert cache.get("https://example.com/a").is_fresh(cache.ttl)
+
+
+def test_lru_eviction_keeps_recently_used(cache):
+    cache.max_bytes = 2500
+    cache.put("https://example.com/1", body=b"", text="a" * 1000)
+    time.sleep(0.01)
+    cache.put("https://example.com/2", body=b"", text="b" * 1000)
+    time.sleep(0.01)
+    cache.get("https://example.com/1")  # 1 is now more recent than 2
+    time.sleep(0.01)
+    cache.put("https://example.com/3", body=b"", text="c" * 1000)
+
+    assert cache.get("https://example.com/2") is None
+    assert cache.get("https://example.com/1") is not None
+    assert cache.get("https://example.com/3") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.fixture
+def web():
+    """Route the research server's HTTP client to in-memory pages; records requests."""
+    import httpx
+    from mcp_servers import http_client
+
+    pages, requests_seen = {}, []
+
+    def handler(request):
+        requests_seen.append(request)
+        return pages[str(request.url)](request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch.object(http_client, "get_client", return_value=client):
+        yield pages, requests_seen
+
+
+def _html(body: bytes, **headers):
+    import httpx
+    return lambda request: httpx.Response(200, content=body, headers={"Content-Type": "text/html", **headers})
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpage_serves_repeat_requests_from_cache(cache, web):
+    """The second fetch of the same URL does not touch the network."""
+    from mcp_servers import research_server
+
+    pages, seen = web
+    pages["https://example.com/page"] = _html(b"<html><body><p>Hello world</p></body></html>", ETag='"abc"')
+    with patch.object(research_server, "page_cache", cache):
+        first = await research_server.fetch_webpage("https://example.com/page")
+        second = await research_server.fetch_webpage("https://example.com/page?utm_medium=email")
+
+    assert "Hello world" in first and "Hello world" in second
+    assert len(seen) == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpage_revalidates_stale_entry(cache, web):
+    """A stale entry is revalidated with its ETag and reused on 304."""
+    import httpx
+    from mcp_servers import research_server
+
+    pages, seen = web
+    pages["https://example.com/page"] = lambda request: httpx.Response(304)
+    cache.put("https://example.com/page", body=b"", text="Cached text", etag='"abc"')
+    cache.ttl = 0
+    with patch.object(research_server, "page_cache", cache):
+        result = await research_server.fetch_webpage("https://example.com/page")
+
+    assert "Cached text" in result
+    assert seen[0].headers["If-None-Match"] == '"abc"'
+    assert cache.stats()["revalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpage_reextracts_when_more_text_is_requested(cache, web):
+    """Text cut at a small budget is re-extracted from the cached body for a larger one."""
+    from mcp_servers import research_server
+
+    pages, seen = web
+    body = b"<html><body>" + b"".join(b"<p>paragraph %d</p>" % i for i in range(50)) + b"</body></html>"
+    pages["https://example.com/long"] = _html(body)
+    with patch.object(research_server, "page_cache", cache):
+        short = await research_server.fetch_webpage("https://example.com/long", max_chars=50)
+        longer = await research_server.fetch_webpage("https://example.com/long", max_chars=5000)
+
+    assert "[Content truncated...]" in short
+    assert "paragraph 49" in longer and "[Content truncated...]" not in longer
+    assert len(seen) == 1
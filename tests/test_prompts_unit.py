@@ -0,0 +1,71 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from prompts import (
+    load_prompt,
+    load_template,
+    log_prompt_tokens,
+    normalize_whitespace,
+    prompt_messages,
+    render_prompt,
+    stable_prefix,
+)
+
+
+def test_load_prompt_is_memoized():
+    load_prompt.cache_clear()
+    load_prompt("writer")
+    load_prompt("writer")
+    assert load_prompt.cache_info().hits == 1
+
+
+def test_normalize_whitespace():
+    text = """
+        Heading   
+
+        Body line
+            indented
+
+
+
+        End
+    """
+    assert normalize_whitespace(text) == "Heading\n\nBody line\n    indented\n\nEnd"
+
+
+def test_templates_are_normalized():
+    for name in ("writer_draft", "writer_revision", "writer_notes_excerpt", "supervisor_plan", "supervisor_feedback"):
+        template = load_template(name)
+        assert template == normalize_whitespace(template), name
+        assert not template[0].isspace(), name
+
+
+def test_requests_share_a_stable_prefix():
+    """Two revisions of different queries start with the same system prompt and instructions."""
+    first = prompt_messages("writer", "writer_revision", original_query="AI", research_data="r1",
+                            existing_draft="d1", rewrite_instructions="i1", human_feedback="f1")
+    second = prompt_messages("writer", "writer_revision", original_query="Radio", research_data="r2",
+                             existing_draft="d2", rewrite_instructions="i2", human_feedback="f2")
+
+    assert isinstance(first[0], SystemMessage) and isinstance(first[1], HumanMessage)
+    assert first[0].content == second[0].content
+    prefix = stable_prefix("writer_revision")
+    assert len(prefix) > 50
+    assert first[1].content.startswith(prefix) and second[1].content.startswith(prefix)
+    # The query comes before the more variable draft and feedback
+    content = first[1].content
+    assert content.index("AI") < content.index("d1") < content.index("f1")
+
+
+def test_render_keeps_values_verbatim():
+    draft = "# Title\n\n    code block {not a placeholder}\n"
+    content = render_prompt("writer_draft", original_query="  Q  ", research_data=draft)
+    assert "# Title\n\n    code block {not a placeholder}" in content
+    assert "ORIGINAL REQUEST:\nQ\n" in content
+
+
+def test_log_prompt_tokens(capsys):
+    messages = prompt_messages("supervisor_system", "supervisor_plan", width="between 1 and 4", original_query="AI")
+    stats = log_prompt_tokens("Supervisor", messages, "supervisor_plan")
+
+    assert 0 < stats["stable_prefix_tokens"] < stats["prompt_tokens"]
+    assert "Supervisor prompt:" in capsys.readouterr().out
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+import httpx
+
+from mcp_servers import research_server
+from mcp_servers.search_cache import QueryCache
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpages_preserves_order_and_runs_concurrently():
+    """Results come back in input order; total time tracks the slowest page."""
+    delays = {"https://a.example": 0.15, "https://b.example": 0.05, "https://c.example": 0.1}
+
+    async def fake_fetch(url, max_chars=5000):
+        await asyncio.sleep(delays[url])
+        return f"Content from {url}"
+
+    with patch.object(research_server, "fetch_webpage", side_effect=fake_fetch):
+        start = asyncio.get_running_loop().time()
+        result = await research_server.fetch_webpages(list(delays))
+        elapsed = asyncio.get_running_loop().time() - start
+
+    positions = [result.index(f"Content from {u}") for u in delays]
+    assert positions == sorted(positions)
+    assert elapsed < sum(delays.values())
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpages_times_out_individual_items():
+    """A slow page yields an error entry without failing the rest of the batch."""
+    async def fake_fetch(url, max_chars=5000):
+        if "slow" in url:
+            await asyncio.sleep(5)
+        return f"Content from {url}"
+
+    with patch.object(research_server, "fetch_webpage", side_effect=fake_fetch):
+        result = await research_server.fetch_webpages(
+            ["https://slow.example", "https://fast.example"], timeout=0.1
+        )
+
+    assert "Timed out" in result
+    assert "Content from https://fast.example" in result
+
+
+@pytest.mark.asyncio
+async def test_web_search_many_caps_concurrency(monkeypatch):
+    """No more than BATCH_CONCURRENCY searches run at the same time."""
+    monkeypatch.setenv("BATCH_CONCURRENCY", "2")
+    state = {"inflight": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_search(query, max_results=5):
+        with lock:
+            state["inflight"] += 1
+            state["peak"] = max(state["peak"], state["inflight"])
+        time.sleep(0.05)
+        with lock:
+            state["inflight"] -= 1
+        return [{"title": f"Result for {query}", "href": "https://example.com", "body": "..."}]
+
+    with patch.object(research_server, "_ddg_text", side_effect=fake_search), \
+         patch.object(research_server, "search_cache", QueryCache()):
+        result = await research_server.web_search_many(["q1", "q2", "q3", "q4", "q5"])
+
+    assert state["peak"] == 2
+    assert all(f"Search results for 'q{i}'" in result for i in range(1, 6))
+
+
+def _streaming_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class _ChunkStream(httpx.AsyncByteStream):
+    """Response body delivered in chunks; records how many were consumed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+
+@pytest.fixture
+def empty_cache(tmp_path):
+    from mcp_servers.page_cache import PageCache
+    cache = PageCache(path=str(tmp_path / "pages.sqlite"))
+    with patch.object(research_server, "page_cache", cache):
+        yield cache
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpage_rejects_non_html_before_reading_body(empty_cache):
+    stream = _ChunkStream([b"%PDF-1.7" + b"\0" * 1024] * 100)
+    client = _streaming_client(
+        lambda request: httpx.Response(200, headers={"Content-Type": "application/pdf"}, stream=stream)
+    )
+    with patch.object(research_server.http_client, "get_client", return_value=client):
+        result = await research_server.fetch_webpage("https://example.com/report.pdf")
+
+    assert "Unsupported content type 'application/pdf'" in result
+    assert stream.sent == 0
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpage_stops_reading_once_extractor_has_enough(empty_cache):
+    """A huge page is abandoned after the first chunks that fill max_chars."""
+    chunk = b"".join(b"<p>paragraph %d of a very long page</p>" % i for i in range(200))
+    stream = _ChunkStream([b"<html><body>"] + [chunk] * 500)
+    client = _streaming_client(
+        lambda request: httpx.Response(200, headers={"Content-Type": "text/html; charset=utf-8"}, stream=stream)
+    )
+    with patch.object(research_server.http_client, "get_client", return_value=client):
+        result = await research_server.fetch_webpage("https://example.com/huge", max_chars=500)
+
+    assert "[Content truncated...]" in result
+    assert stream.sent < 5
+    # The partial body is not cached, so a larger request will refetch
+    assert empty_cache.get("https://example.com/huge").body == b""
+
+
+@pytest.mark.asyncio
+async def test_fetch_webpage_enforces_byte_budget(empty_cache, monkeypatch):
+    """Downloads stop at FETCH_MAX_BYTES even if the page has little text."""
+    monkeypatch.setenv("FETCH_MAX_BYTES", "4096")
+    stream = _ChunkStream([b"<html><body><p>intro</p>"] + [b"<div></div>" * 100] * 100)
+    client = _streaming_client(
+        lambda request: httpx.Response(200, headers={"Content-Type": "text/html"}, stream=stream)
+    )
+    with patch.object(research_server.http_client, "get_client", return_value=client):
+        result = await research_server.fetch_webpage("https://example.com/bloated")
+
+    assert "intro" in result and "[Content truncated...]" in result
+    assert stream.sent * 1100 < 4096 + 2 * 1100
@@ -0,0 +1,88 @@
+import pytest
+
+from utils.research_store import ResearchStore, render_records, split_findings
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResearchStore(str(tmp_path / "research.sqlite"))
+    yield store
+    store.close()
+
+
+def test_add_and_get_preserve_requested_order(store):
+    first = store.add("run", "History", "Gutenberg printed the Bible around 1455.", "https://example.com/a")
+    second = store.add("run", "Spread", "Printing reached Venice by 1469.")
+
+    records = store.get([second, 999, first])
+
+    assert [r.id for r in records] == [second, first]
+    assert records[1].url == "https://example.com/a"
+    assert records[1].subtopic == "History"
+    assert records[1].tokens > 0
+    assert records[1].embedding is None
+
+
+def test_embedding_slot(store):
+    record_id = store.add("run", "History", "text")
+    store.set_embedding(record_id, [0.5, -1.0, 2.0])
+    assert store.get([record_id])[0].embedding == [0.5, -1.0, 2.0]
+
+
+def test_records_persist_and_expire(tmp_path):
+    path = str(tmp_path / "research.sqlite")
+    store = ResearchStore(path)
+    record_id = store.add("run", "History", "text")
+    store.close()
+
+    reopened = ResearchStore(path)
+    assert reopened.get([record_id])[0].text == "text"
+    reopened.close()
+
+    expired = ResearchStore(path, ttl=-1)
+    assert expired.get([record_id]) == []
+    expired.close()
+
+
+def test_split_findings_groups_headings_and_extracts_urls():
+    summary = (
+        "KEY FINDINGS:\n\n"
+        "- Gutenberg introduced movable metal type in Mainz around 1440, "
+        "according to https://en.wikipedia.org/wiki/Printing_press.\n\n"
+        "- By 1500 printing presses operated in more than 250 European cities, "
+        "producing millions of volumes."
+    )
+    findings = split_findings(summary)
+
+    assert len(findings) == 2
+    assert findings[0]["text"].startswith("KEY FINDINGS:\n- Gutenberg")
+    assert findings[0]["url"] == "https://en.wikipedia.org/wiki/Printing_press"
+    assert findings[1]["url"] == ""
+
+
+def test_select_ranks_by_query_within_budget(store):
+    ids = [
+        store.add("run", "Economics", "Book prices fell sharply after printing spread. " * 3),
+        store.add("run", "Religion", "The Reformation relied on printed pamphlets by Luther."),
+        store.add("run", "Science", "Printed journals let scientists share results quickly. " * 3),
+    ]
+    budget = store.get([ids[1]])[0].tokens + store.get([ids[2]])[0].tokens
+
+    selected = store.select(ids, "Luther Reformation pamphlets and scientists journals", budget)
+
+    assert [r.id for r in selected] == [ids[1], ids[2]]
+    assert "[%d] Religion\n" % ids[1] in render_records(selected)
+
+
+def test_select_uses_index_kept_up_to_date(store):
+    first = store.add("run", "Religion", "Luther's pamphlets spread the Reformation.")
+    store.add("other", "Religion", "Reformation sermons in another run.")
+    assert [r.id for r in store.select([first], "Reformation", 1000)] == [first]
+
+    # Added after the run's index was loaded
+    second = store.add("run", "Religion", "Calvin extended the Reformation to Geneva.")
+
+    assert len(store.index("run")) == 2
+    selected = store.select([first, second], "Calvin Geneva Reformation", 1000, k=1)
+    assert [r.id for r in selected] == [second]
+    assert store.select([first, second], "unrelated", 1000) == []
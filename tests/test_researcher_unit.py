@@ -1,65 +1,207 @@
-import pytest
-from unittest.mock import MagicMock, patch, AsyncMock
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, SystemMessage
-from agents.researcher import run_researcher
-from agents.state import AgentState
-
-
-@pytest.mark.asyncio
-async def test_researcher_run_no_tools():
-    """Test researcher when the model returns a direct answer (no tool calls)."""
-    mock_response = AIMessage(content="Search result summary")
-
-    mock_model_instance = MagicMock()
-    mock_model_with_tools = MagicMock()
-    mock_model_with_tools.ainvoke = AsyncMock(return_value=mock_response)
-    mock_model_instance.bind_tools.return_value = mock_model_with_tools
-
-    mock_tools = [MagicMock(name="web_search")]
-
-    with patch("agents.researcher.get_llm", return_value=mock_model_instance):
-        state: AgentState = {
-            "messages": [HumanMessage(content="Test query")],
-            "research_data": "",
-            "draft_document": "",
-            "current_phase": "research",
-        }
-
-        result = await run_researcher(state, tools=mock_tools)
-
-    assert result["parallel_results"] == ["Search result summary"]
-    assert "messages" in result
-
-
-@pytest.mark.asyncio
-async def test_researcher_run_with_tools():
-    """Test researcher when tools are called during the loop."""
-    tool_call = {"name": "web_search", "args": {"query": "AI"}, "id": "call_1"}
-
-    # First response has a tool call, second is the final answer
-    response_with_tool = AIMessage(content="", tool_calls=[tool_call])
-    response_final = AIMessage(content="Final research summary")
-
-    mock_model_instance = MagicMock()
-    mock_model_with_tools = MagicMock()
-    mock_model_with_tools.ainvoke = AsyncMock(
-        side_effect=[response_with_tool, response_final]
-    )
-    mock_model_instance.bind_tools.return_value = mock_model_with_tools
-
-    mock_tool = MagicMock()
-    mock_tool.name = "web_search"
-    mock_tool.ainvoke = AsyncMock(return_value="Tool output")
-
-    with patch("agents.researcher.get_llm", return_value=mock_model_instance):
-        state: AgentState = {
-            "messages": [HumanMessage(content="Test query")],
-            "research_data": "",
-            "draft_document": "",
-            "current_phase": "research",
-        }
-
-        result = await run_researcher(state, tools=[mock_tool])
-
-    assert result["parallel_results"] == ["Final research summary"]
-    assert "messages" in result
+import asyncio
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch, AsyncMock
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, SystemMessage
+from langchain_core.tools import tool
+from agents.researcher import run_researcher
+from agents.state import AgentState
+
+
+@pytest.mark.asyncio
+async def test_researcher_run_no_tools(research_store):
+    """Test researcher when the model returns a direct answer (no tool calls)."""
+    mock_response = AIMessage(content="Search result summary")
+
+    mock_model_instance = MagicMock()
+    mock_model_with_tools = MagicMock()
+    mock_model_with_tools.ainvoke = AsyncMock(return_value=mock_response)
+    mock_model_instance.bind_tools.return_value = mock_model_with_tools
+
+    mock_tools = [MagicMock(name="web_search")]
+
+    with patch("agents.researcher.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Test query")],
+            "research_store_id": "run",
+            "draft_document": "",
+            "current_phase": "research",
+        }
+
+        result = await run_researcher(state, tools=mock_tools)
+
+    assert [r.text for r in research_store.get(result["parallel_results"])] == ["Search result summary"]
+    assert "messages" in result
+
+
+@pytest.mark.asyncio
+async def test_researcher_run_with_tools(research_store):
+    """Test researcher when tools are called during the loop."""
+    tool_call = {"name": "web_search", "args": {"query": "AI"}, "id": "call_1"}
+
+    # First response has a tool call, second is the final answer
+    response_with_tool = AIMessage(content="", tool_calls=[tool_call])
+    response_final = AIMessage(content="Final research summary")
+
+    mock_model_instance = MagicMock()
+    mock_model_with_tools = MagicMock()
+    mock_model_with_tools.ainvoke = AsyncMock(
+        side_effect=[response_with_tool, response_final]
+    )
+    mock_model_instance.bind_tools.return_value = mock_model_with_tools
+
+    mock_tool = MagicMock()
+    mock_tool.name = "web_search"
+    mock_tool.ainvoke = AsyncMock(return_value="Tool output")
+
+    with patch("agents.researcher.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Test query")],
+            "research_store_id": "run",
+            "draft_document": "",
+            "current_phase": "research",
+        }
+
+        result = await run_researcher(state, tools=[mock_tool])
+
+    assert [r.text for r in research_store.get(result["parallel_results"])] == ["Final research summary"]
+    assert "messages" in result
+
+
+def _tool_loop_model():
+    """Mock model that calls web_search once and then answers."""
+    tool_call = {"name": "web_search", "args": {"query": "AI"}, "id": "call_1"}
+    mock_model_with_tools = MagicMock()
+    mock_model_with_tools.ainvoke = AsyncMock(side_effect=[
+        AIMessage(content="", tool_calls=[tool_call]),
+        AIMessage(content="Final research summary"),
+    ])
+    mock_model_instance = MagicMock()
+    mock_model_instance.bind_tools.return_value = mock_model_with_tools
+    return mock_model_instance
+
+
+@tool
+def web_search(query: str) -> str:
+    """Search the web."""
+    return "page text " * 500
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["local", "shared"])
+async def test_researcher_scratchpad_modes(monkeypatch, mode):
+    """A local scratchpad returns one short message and metrics; shared returns the whole loop."""
+    monkeypatch.setenv("AGENT_SCRATCHPAD", mode)
+
+    with patch("agents.researcher.get_llm", return_value=_tool_loop_model()):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Test query")],
+            "research_store_id": "run",
+        }
+        result = await run_researcher(state, tools=[web_search])
+
+    [metrics] = result["agent_metrics"]
+    assert metrics["iterations"] == 2
+    assert metrics["tool_calls"] == 1
+    assert metrics["tool_output_chars"] == len("page text " * 500)
+    assert metrics["findings"] == 1
+    if mode == "local":
+        [message] = result["messages"]
+        assert message.name == "researcher"
+        assert "Test query" in message.content and len(message.content) < 200
+    else:
+        assert isinstance(result["messages"][0], SystemMessage)
+        assert any(isinstance(m, ToolMessage) for m in result["messages"])
+
+
+def _model_calling(*turns):
+    """Mock model whose tool-bound ainvoke returns `turns` in order; plain ainvoke wraps up."""
+    mock_model_with_tools = MagicMock()
+    mock_model_with_tools.ainvoke = AsyncMock(side_effect=list(turns))
+    mock_model_instance = MagicMock()
+    mock_model_instance.bind_tools.return_value = mock_model_with_tools
+    mock_model_instance.ainvoke = AsyncMock(return_value=AIMessage(content="Wrap-up summary"))
+    return mock_model_instance
+
+
+def _calls(*names):
+    return AIMessage(content="", tool_calls=[
+        {"name": name, "args": {"query": str(i)}, "id": f"call_{i}"} for i, name in enumerate(names)
+    ])
+
+
+@tool
+async def slow_search(query: str) -> str:
+    """Search slowly."""
+    await asyncio.sleep(0.2)
+    return f"slow result {query}"
+
+
+@tool
+async def hanging_fetch(query: str) -> str:
+    """Never finishes in time."""
+    await asyncio.sleep(10)
+    return "late"
+
+
+@pytest.mark.asyncio
+async def test_researcher_runs_tool_calls_concurrently_with_timeout(monkeypatch):
+    monkeypatch.setenv("RESEARCHER_TOOL_TIMEOUT", "0.3")
+    model = _model_calling(
+        _calls("slow_search", "slow_search", "slow_search", "hanging_fetch", "missing_tool"),
+        AIMessage(content="Final research summary"),
+    )
+
+    start = time.perf_counter()
+    with patch("agents.researcher.get_llm", return_value=model):
+        result = await run_researcher(
+            {"messages": [HumanMessage(content="Test query")], "research_store_id": "run"},
+            tools=[slow_search, hanging_fetch],
+        )
+    elapsed = time.perf_counter() - start
+
+    # Three 0.2s calls in parallel and one cut off at the 0.3s timeout
+    assert elapsed < 0.55
+    [metrics] = result["agent_metrics"]
+    assert metrics["tool_calls"] == 5
+    assert metrics["tool_errors"] == 2
+    tool_messages = model.bind_tools.return_value.ainvoke.await_args_list[1].args[0][-5:]
+    assert [m.tool_call_id for m in tool_messages] == [f"call_{i}" for i in range(5)]
+    assert "timed out" in tool_messages[3].content
+    assert "unknown tool" in tool_messages[4].content
+
+
+@pytest.mark.asyncio
+async def test_researcher_truncates_tool_outputs_already_read(monkeypatch):
+    monkeypatch.setenv("RESEARCHER_OLD_TOOL_OUTPUT_CHARS", "100")
+    model = _model_calling(_calls("web_search"), _calls("web_search"), AIMessage(content="Final research summary"))
+
+    with patch("agents.researcher.get_llm", return_value=model):
+        await run_researcher(
+            {"messages": [HumanMessage(content="Test query")], "research_store_id": "run"},
+            tools=[web_search],
+        )
+
+    sent = model.bind_tools.return_value.ainvoke.await_args_list[2].args[0]
+    old_output, new_output = [m for m in sent if isinstance(m, ToolMessage)]
+    assert len(old_output.content) < 200 and "already read" in old_output.content
+    assert new_output.content == "page text " * 500
+
+
+@pytest.mark.asyncio
+async def test_researcher_stops_at_token_budget_and_wraps_up(monkeypatch, research_store):
+    monkeypatch.setenv("RESEARCHER_MAX_INPUT_TOKENS", "50")
+    model = _model_calling(_calls("web_search"), _calls("web_search"), AIMessage(content="unused"))
+
+    with patch("agents.researcher.get_llm", return_value=model):
+        result = await run_researcher(
+            {"messages": [HumanMessage(content="Test query")], "research_store_id": "run"},
+            tools=[web_search],
+        )
+
+    [metrics] = result["agent_metrics"]
+    assert metrics["stop_reason"] == "tokens"
+    assert metrics["iterations"] == 1
+    model.ainvoke.assert_awaited_once()
+    assert [r.text for r in research_store.get(result["parallel_results"])] == ["Wrap-up summary"]
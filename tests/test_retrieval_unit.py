@@ -0,0 +1,42 @@
+from utils.retrieval import BM25Index, tokenize
+
+
+def _index():
+    index = BM25Index()
+    index.add(1, "Gutenberg built the printing press in Mainz")
+    index.add(2, "Luther's pamphlets spread the Reformation through printing")
+    index.add(3, "Paper mills in Italy lowered the cost of paper")
+    return index
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("Please add more about the Reformation!") == ["reformation"]
+
+
+def test_search_ranks_matching_documents():
+    index = _index()
+
+    results = index.search("Reformation pamphlets")
+
+    assert [doc_id for doc_id, _ in results] == [2]
+    assert results[0][1] > 0
+    assert index.search("printing Mainz")[0][0] == 1
+    assert index.search("unrelated words") == []
+
+
+def test_rare_terms_outweigh_common_ones():
+    index = _index()
+    # "printing" appears in two documents, "mainz" in one
+    scores = dict(index.search("printing mainz"))
+    assert scores[1] > scores[2] > 0
+
+
+def test_incremental_add_and_restriction():
+    index = _index()
+    index.add(4, "A second Reformation pamphlet collection")
+    index.add(4, "ignored duplicate id")
+
+    assert len(index) == 4 and 4 in index
+    assert {doc_id for doc_id, _ in index.search("reformation")} == {2, 4}
+    assert [doc_id for doc_id, _ in index.search("reformation", doc_ids=[4, 1])] == [4]
+    assert len(index.search("reformation", k=1)) == 1
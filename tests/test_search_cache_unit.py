@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from mcp_servers import research_server
+from mcp_servers.search_cache import QueryCache, normalize_query
+
+
+def test_normalize_query_ignores_case_punctuation_stopwords_and_order():
+    assert normalize_query("The History of Python!") == normalize_query("python   history")
+    assert normalize_query("history of python") != normalize_query("history of java")
+    # A query of only stopwords is kept rather than collapsing to ""
+    assert normalize_query("The Who") == "the who"
+
+
+@pytest.mark.asyncio
+async def test_repeat_query_is_served_from_cache():
+    cache = QueryCache(ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return ["result"]
+
+    key = cache.key("web", "Quantum computing", 5)
+    assert await cache.get_or_fetch(key, fetch) == ["result"]
+    assert await cache.get_or_fetch(cache.key("web", "computing, quantum", 5), fetch) == ["result"]
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+    # Different parameters are a different entry
+    await cache.get_or_fetch(cache.key("web", "Quantum computing", 10), fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_refetched():
+    cache = QueryCache(ttl=0)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    key = cache.key("web", "q")
+    assert await cache.get_or_fetch(key, fetch) == 1
+    assert await cache.get_or_fetch(key, fetch) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_share_one_call():
+    cache = QueryCache(ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "shared"
+
+    key = cache.key("web", "llm agents")
+    results = await asyncio.gather(*(cache.get_or_fetch(key, fetch) for _ in range(5)))
+
+    assert results == ["shared"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_waiters_and_are_not_cached():
+    cache = QueryCache(ttl=60)
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("rate limited")
+
+    key = cache.key("web", "q")
+    results = await asyncio.gather(
+        cache.get_or_fetch(key, failing), cache.get_or_fetch(key, failing), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(attempts) == 1
+
+    async def ok():
+        return "recovered"
+
+    assert await cache.get_or_fetch(key, ok) == "recovered"
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_first_caller_does_not_cancel_the_waiters():
+    """A per-item timeout on the caller that started a search leaves it running for the others."""
+    cache = QueryCache(ttl=60)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "shared"
+
+    key = cache.key("web", "q")
+    first = asyncio.create_task(asyncio.wait_for(cache.get_or_fetch(key, slow), timeout=0.01))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_fetch(key, slow))
+    results = await asyncio.gather(first, waiter, return_exceptions=True)
+
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert results[1] == "shared"
+    assert cache.get(key) == "shared"
+
+
+def test_lru_bound():
+    cache = QueryCache(ttl=60, max_entries=2)
+
+    async def run():
+        for q in ("a", "b", "c"):
+            await cache.get_or_fetch(cache.key("web", q), lambda q=q: asyncio.sleep(0, result=q))
+
+    asyncio.run(run())
+    assert cache.stats()["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_web_search_reuses_results_for_equivalent_queries():
+    """web_search formats cached results with the caller's own query."""
+    raw = [{"title": "Python", "href": "https://python.org", "body": "A language"}]
+    with patch.object(research_server, "_ddg_text", return_value=raw) as ddg, \
+         patch.object(research_server, "search_cache", QueryCache()):
+        first = await research_server.web_search("History of Python")
+        second = await research_server.web_search("python history")
+
+    assert ddg.call_count == 1
+    assert "Search results for 'History of Python'" in first
+    assert "Search results for 'python history'" in second
+    assert "https://python.org" in second
+
+
+@pytest.mark.asyncio
+async def test_wikipedia_summaries_counts_hits_and_misses():
+    """Titles served from the cache count as hits, titles sent to the API as misses."""
+    def summary(title):
+        return {"title": title, "summary": f"About {title}", "url": f"https://en.wikipedia.org/wiki/{title}"}
+
+    api = AsyncMock(side_effect=lambda titles, sentences: [summary(t) for t in titles])
+    cache = QueryCache()
+    with patch.object(research_server.wikipedia_api, "get_summaries", api), \
+         patch.object(research_server, "search_cache", cache):
+        await research_server.wikipedia_summaries(["Ada Lovelace", "Alan Turing"])
+        await research_server.wikipedia_summaries(["Alan Turing", "Grace Hopper"])
+
+    assert api.await_args_list[1].args[0] == ["Grace Hopper"]
+    assert (cache.hits, cache.misses) == (1, 3)
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+from starlette.testclient import TestClient
+
+import main
+import service
+from tests.conftest import RESEARCH_TOOLS
+
+
+def _wait_for(client, thread_id: str, status: str, timeout: float = 10) -> dict:
+    """Poll a run until it reaches `status`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f"/runs/{thread_id}").json()
+        if body["status"] == status:
+            return body
+        assert body["status"] == "running", body
+        time.sleep(0.02)
+    raise AssertionError(f"{thread_id} did not reach {status}")
+
+
+@pytest.fixture
+def client(fake_llm_server, tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.pdf.OUTPUT_DIR", tmp_path)
+    with patch.object(main, "get_tools", AsyncMock(return_value=RESEARCH_TOOLS)), \
+         TestClient(service.create_app()) as test_client:
+        yield test_client
+
+
+def test_concurrent_sessions_review_and_resume(client, fake_llm_server):
+    fake_llm_server.delay = 0.05
+    started = [client.post("/runs", json={"query": f"History of topic {i}"}) for i in range(3)]
+    assert all(r.status_code == 202 for r in started)
+    thread_ids = [r.json()["thread_id"] for r in started]
+    assert len(set(thread_ids)) == 3
+
+    for thread_id in thread_ids:
+        _wait_for(client, thread_id, "awaiting_review")
+        review = client.get(f"/runs/{thread_id}/review").json()
+        assert review["draft"].startswith("# Draft")
+        assert "approve" in review["message"]
+
+    # Feedback sends one session back through research; the others are approved
+    assert client.post(f"/runs/{thread_ids[0]}/review", json={"feedback": "Add more dates"}).status_code == 202
+    for thread_id in thread_ids[1:]:
+        assert client.post(f"/runs/{thread_id}/review", json={"feedback": "approve"}).status_code == 202
+
+    revised = _wait_for(client, thread_ids[0], "awaiting_review")
+    assert len(revised["research_rounds"]) == 2
+    for thread_id in thread_ids[1:]:
+        done = _wait_for(client, thread_id, "completed")
+        assert done["phase"] == "approved"
+        assert client.get(f"/runs/{thread_id}/review").status_code == 409
+
+
+def test_request_validation_and_unknown_runs(client):
+    assert client.get("/health").json() == {"status": "ok"}
+    assert client.post("/runs", json={}).status_code == 400
+    assert client.get("/runs/nope").status_code == 404
+    assert client.get("/runs/nope/review").status_code == 404
+    assert client.post("/runs/nope/review", json={"feedback": "approve"}).status_code == 404
+
+    assert client.post("/runs", json={"query": "Radio", "thread_id": "fixed"}).status_code == 202
+    assert client.post("/runs", json={"query": "Radio", "thread_id": "fixed"}).status_code == 409
+    assert client.post("/runs/fixed/review", json={}).status_code == 400
+    _wait_for(client, "fixed", "awaiting_review")
+
+
+class _ReviewGraph:
+    """Graph stand-in paused at human review; resuming runs until `release` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.resumes = []
+        interrupt = SimpleNamespace(value={"message": "Type 'approve'"})
+        review = SimpleNamespace(name="human_review", interrupts=[interrupt])
+        self.snapshot = SimpleNamespace(values={"draft_document": "# Draft"}, next=("human_review",), tasks=[review])
+
+    async def aget_state(self, config):
+        # Lets other requests run between a handler's check and its start
+        await asyncio.sleep(0.01)
+        return self.snapshot
+
+    async def ainvoke(self, graph_input, config):
+        self.resumes.append(graph_input)
+        await self.release.wait()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reviews_resume_a_thread_once():
+    graph = _ReviewGraph()
+    app = service.create_app()
+    app.state.runs = service.RunManager(graph)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        responses = await asyncio.gather(*(
+            http.post("/runs/t1/review", json={"feedback": f"change {i}"}) for i in range(2)
+        ))
+        assert sorted(r.status_code for r in responses) == [202, 409]
+        assert len(graph.resumes) == 1
+
+        graph.release.set()
+        for _ in range(100):
+            if not app.state.runs._tasks:
+                break
+            await asyncio.sleep(0.01)
+    # Finished tasks don't accumulate
+    assert app.state.runs._tasks == {}
+
+
+@pytest.mark.asyncio
+async def test_review_of_a_finished_run_is_rejected():
+    """A thread with no pending interrupt is never resumed."""
+    graph = _ReviewGraph()
+    graph.snapshot = SimpleNamespace(values={"draft_document": "# Draft"}, next=(), tasks=[])
+    app = service.create_app()
+    app.state.runs = service.RunManager(graph)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        response = await http.post("/runs/t1/review", json={"feedback": "approve"})
+
+    assert response.status_code == 409
+    assert response.json()["status"] == "completed"
+    assert graph.resumes == []
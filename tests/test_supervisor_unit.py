@@ -1,74 +1,123 @@
-import pytest
-from unittest.mock import MagicMock, patch
-from langchain_core.messages import HumanMessage
-from agents.supervisor import run_supervisor
-from agents.models import SupervisorPlan
-from agents.state import AgentState
-
-
-@pytest.mark.asyncio
-async def test_supervisor_run_initial_query():
-    """Test supervisor initial query mode (research path)."""
-    mock_plan = SupervisorPlan(
-        action="research",
-        subtopics=["topic1", "topic2"],
-        rewrite_instructions=None,
-    )
-
-    mock_structured_llm = MagicMock()
-    mock_structured_llm.invoke.return_value = mock_plan
-
-    mock_model_instance = MagicMock()
-    mock_model_instance.with_structured_output.return_value = mock_structured_llm
-
-    with patch("agents.supervisor.get_llm", return_value=mock_model_instance):
-        state: AgentState = {
-            "messages": [HumanMessage(content="Explain quantum physics")],
-            "current_phase": "start",
-        }
-
-        result = await run_supervisor(state)
-
-    assert result["current_phase"] == "research"
-    assert result["subtopics"] == ["topic1", "topic2"]
-    assert result["rewrite_instructions"] == ""
-
-    # Check if correct user content was generated
-    prompt_msg = mock_structured_llm.invoke.call_args[0][0][1]
-    assert "Explain quantum physics" in prompt_msg.content
-    assert "Plan the research" in prompt_msg.content
-
-
-@pytest.mark.asyncio
-async def test_supervisor_run_feedback_loop():
-    """Test supervisor feedback loop mode (rewrite path)."""
-    mock_plan = SupervisorPlan(
-        action="rewrite",
-        subtopics=None,
-        rewrite_instructions="Fix the introduction.",
-    )
-
-    mock_structured_llm = MagicMock()
-    mock_structured_llm.invoke.return_value = mock_plan
-
-    mock_model_instance = MagicMock()
-    mock_model_instance.with_structured_output.return_value = mock_structured_llm
-
-    with patch("agents.supervisor.get_llm", return_value=mock_model_instance):
-        state: AgentState = {
-            "messages": [HumanMessage(content="Explain quantum physics")],
-            "human_feedback": "The intro is weak.",
-            "draft_document": "Quantum physics is cool.",
-            "current_phase": "human_review",
-        }
-
-        result = await run_supervisor(state)
-
-    assert result["current_phase"] == "rewrite"
-    assert "subtopics" not in result
-    assert result["rewrite_instructions"] == "Fix the introduction."
-
-    # Check if feedback was included in prompt
-    prompt_msg = mock_structured_llm.invoke.call_args[0][0][1]
-    assert "The intro is weak." in prompt_msg.content
-    assert "Quantum physics is cool." in prompt_msg.content
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.messages import HumanMessage
+from agents.supervisor import run_supervisor
+from agents.models import SupervisorPlan
+from agents.state import AgentState
+
+
+@pytest.mark.asyncio
+async def test_supervisor_run_initial_query():
+    """Test supervisor initial query mode (research path)."""
+    mock_plan = SupervisorPlan(
+        action="research",
+        subtopics=["topic1", "topic2"],
+        rewrite_instructions=None,
+    )
+
+    mock_structured_llm = MagicMock()
+    mock_structured_llm.ainvoke = AsyncMock(return_value=mock_plan)
+
+    mock_model_instance = MagicMock()
+    mock_model_instance.with_structured_output.return_value = mock_structured_llm
+
+    with patch("agents.supervisor.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Explain quantum physics")],
+            "current_phase": "start",
+        }
+
+        result = await run_supervisor(state)
+
+    assert result["current_phase"] == "research"
+    assert result["subtopics"] == ["topic1", "topic2"]
+    assert result["rewrite_instructions"] == ""
+
+    # Check if correct user content was generated
+    prompt_msg = mock_structured_llm.ainvoke.call_args[0][0][1]
+    assert "Explain quantum physics" in prompt_msg.content
+    assert "Plan the research" in prompt_msg.content
+
+
+@pytest.mark.asyncio
+async def test_supervisor_run_feedback_loop():
+    """Test supervisor feedback loop mode (rewrite path)."""
+    mock_plan = SupervisorPlan(
+        action="rewrite",
+        subtopics=None,
+        rewrite_instructions="Fix the introduction.",
+    )
+
+    mock_structured_llm = MagicMock()
+    mock_structured_llm.ainvoke = AsyncMock(return_value=mock_plan)
+
+    mock_model_instance = MagicMock()
+    mock_model_instance.with_structured_output.return_value = mock_structured_llm
+
+    with patch("agents.supervisor.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Explain quantum physics")],
+            "human_feedback": "The intro is weak.",
+            "draft_document": "Quantum physics is cool.",
+            "current_phase": "human_review",
+        }
+
+        result = await run_supervisor(state)
+
+    assert result["current_phase"] == "rewrite"
+    assert "subtopics" not in result
+    assert result["rewrite_instructions"] == "Fix the introduction."
+
+    # Check if feedback was included in prompt
+    prompt_msg = mock_structured_llm.ainvoke.call_args[0][0][1]
+    assert "The intro is weak." in prompt_msg.content
+    assert "Quantum physics is cool." in prompt_msg.content
+
+
+@pytest.mark.asyncio
+async def test_supervisor_feedback_sees_relevant_research(research_store):
+    """Feedback mode shows the gathered research that matches the feedback."""
+    ids = [
+        research_store.add("run", "Entanglement", "Bell tests confirmed entanglement violates local realism."),
+        research_store.add("run", "History", "Planck introduced energy quanta in 1900."),
+    ]
+    mock_structured_llm = MagicMock()
+    mock_structured_llm.ainvoke = AsyncMock(return_value=SupervisorPlan(action="rewrite", rewrite_instructions="Expand."))
+    mock_model_instance = MagicMock()
+    mock_model_instance.with_structured_output.return_value = mock_structured_llm
+
+    with patch("agents.supervisor.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Explain quantum physics")],
+            "human_feedback": "Say more about entanglement and Bell tests.",
+            "draft_document": "Quantum physics is cool.",
+            "research_record_ids": ids,
+            "current_phase": "human_review",
+        }
+        await run_supervisor(state)
+
+    prompt = mock_structured_llm.ainvoke.call_args[0][0][1].content
+    assert "Bell tests confirmed entanglement" in prompt
+    assert "Planck" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_supervisor_fanout_within_limits(monkeypatch):
+    """The prompt asks for a width within the limits; extra or repeated subtopics are dropped."""
+    monkeypatch.setenv("RESEARCH_MIN_SUBTOPICS", "2")
+    monkeypatch.setenv("RESEARCH_MAX_SUBTOPICS", "3")
+    monkeypatch.setenv("RESEARCH_CONCURRENCY", "4")
+    monkeypatch.delenv("LLM_REQUESTS_PER_MINUTE", raising=False)
+    mock_structured_llm = MagicMock()
+    mock_structured_llm.ainvoke = AsyncMock(return_value=SupervisorPlan(
+        action="research", subtopics=["a", "b", "a", "c", "d"],
+    ))
+    mock_model_instance = MagicMock()
+    mock_model_instance.with_structured_output.return_value = mock_structured_llm
+
+    with patch("agents.supervisor.get_llm", return_value=mock_model_instance):
+        result = await run_supervisor({"messages": [HumanMessage(content="History of computing")]})
+
+    assert result["subtopics"] == ["a", "b", "c"]
+    prompt = mock_structured_llm.ainvoke.call_args[0][0][1].content
+    assert "between 2 and 3 focused subtopics" in prompt
@@ -0,0 +1,44 @@
+import pytest
+
+from utils import tokens
+from utils.tokens import count_tokens, split_by_tokens
+
+
+@pytest.fixture
+def char_estimate(monkeypatch):
+    """Use the ~4 chars/token estimate so counts don't depend on tiktoken data files."""
+    monkeypatch.setattr(tokens, "_encoding", lambda model: None)
+
+
+def test_count_tokens_estimate(char_estimate):
+    assert count_tokens("") == 0
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2
+
+
+def test_count_tokens_uses_encoding(monkeypatch):
+    class FakeEncoding:
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    monkeypatch.setattr(tokens, "_encoding", lambda model: FakeEncoding())
+    assert count_tokens("one two three") == 3
+
+
+def test_split_by_tokens_keeps_paragraphs_together(char_estimate):
+    paragraphs = [f"Paragraph {i} " + "x" * 30 for i in range(10)]
+    chunks = split_by_tokens("\n\n".join(paragraphs), max_tokens=25)
+
+    assert all(count_tokens(c) <= 25 for c in chunks)
+    assert len(chunks) == 5
+    # Nothing lost and no paragraph cut in half
+    assert "\n\n".join(chunks) == "\n\n".join(paragraphs)
+
+
+def test_split_by_tokens_cuts_oversized_paragraphs(char_estimate):
+    lines = "\n".join("y" * 60 for _ in range(4))
+    long_word = "z" * 250
+    chunks = split_by_tokens(f"{lines}\n\n{long_word}", max_tokens=20)
+
+    assert all(count_tokens(c) <= 20 for c in chunks)
+    assert "".join(chunks).replace("\n", "") == "y" * 240 + long_word
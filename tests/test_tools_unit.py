@@ -0,0 +1,233 @@
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import tools
+from tools import ToolRegistry
+
+
+def _fake_client(opened: list, closed: list):
+    """A MultiServerMCPClient stand-in whose sessions record open/close."""
+    client = MagicMock()
+
+    @asynccontextmanager
+    async def session(server_name):
+        s = MagicMock(name=f"session-{len(opened)}")
+        s.send_ping = AsyncMock(return_value=None)
+        opened.append(s)
+        try:
+            yield s
+        finally:
+            closed.append(s)
+
+    client.session = session
+    return client
+
+
+async def _load_tools(session, server_name=None):
+    tool = MagicMock()
+    tool.name = "web_search"
+    tool.session = session
+    return [tool]
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_sessions_across_calls():
+    """Repeated get_tools() calls share one session instead of spawning new ones."""
+    opened, closed = [], []
+    with patch("tools.get_mcp_client", return_value=_fake_client(opened, closed)), \
+         patch("tools.load_mcp_tools", side_effect=_load_tools):
+        registry = ToolRegistry(pool_size=1)
+        first = await registry.get_tools()
+        second = await registry.get_tools()
+        assert first is second
+        assert len(opened) == 1
+
+        await registry.aclose()
+
+    assert closed == opened
+
+
+@pytest.mark.asyncio
+async def test_registry_round_robins_pool():
+    """With a pool of 2, consecutive callers get tools from different sessions."""
+    opened, closed = [], []
+    with patch("tools.get_mcp_client", return_value=_fake_client(opened, closed)), \
+         patch("tools.load_mcp_tools", side_effect=_load_tools):
+        registry = ToolRegistry(pool_size=2)
+        a = await registry.get_tools()
+        b = await registry.get_tools()
+        c = await registry.get_tools()
+        assert a[0].session is not b[0].session
+        assert a[0].session is c[0].session
+        await registry.aclose()
+
+    assert len(closed) == 2
+
+
+@pytest.mark.asyncio
+async def test_health_check_restarts_unresponsive_session():
+    """A session that fails its ping is replaced with a fresh one."""
+    opened, closed = [], []
+    with patch("tools.get_mcp_client", return_value=_fake_client(opened, closed)), \
+         patch("tools.load_mcp_tools", side_effect=_load_tools):
+        registry = ToolRegistry(pool_size=1)
+        await registry.get_tools()
+        opened[0].send_ping = AsyncMock(side_effect=RuntimeError("broken pipe"))
+
+        health = await registry.health_check()
+        assert health == [False]
+        assert len(opened) == 2
+        assert closed == [opened[0]]
+
+        tools_after = await registry.get_tools()
+        assert tools_after[0].session is opened[1]
+        await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_tools_pings_sessions_periodically(monkeypatch):
+    """A hung server (process alive, no ping reply) is restarted by get_tools() once the interval passes."""
+    monkeypatch.setenv("MCP_HEALTH_CHECK_INTERVAL", "0")
+    opened, closed = [], []
+    with patch("tools.get_mcp_client", return_value=_fake_client(opened, closed)), \
+         patch("tools.load_mcp_tools", side_effect=_load_tools):
+        registry = ToolRegistry(pool_size=1)
+        await registry.get_tools()
+        opened[0].send_ping = AsyncMock(side_effect=TimeoutError())
+
+        tools_after = await registry.get_tools()
+        assert tools_after[0].session is opened[1]
+        assert closed == [opened[0]]
+        await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_close_tools_resets_global_registry():
+    """close_tools() shuts down the shared registry so the next call starts fresh."""
+    registry = MagicMock()
+    registry.aclose = AsyncMock()
+    with patch.object(tools, "_registry", registry):
+        await tools.close_tools()
+        assert tools._registry is None
+    registry.aclose.assert_awaited_once()
+
+
+def _counting_fetch_tools(calls: list, delay: float = 0.05, batches: list = None):
+    """fetch_webpage/fetch_webpages/web_search stand-ins that record the pages fetched (and batch calls)."""
+    import asyncio
+    from langchain_core.tools import tool
+
+    @tool
+    async def fetch_webpage(url: str, max_chars: int = 5000) -> str:
+        """Fetch a page."""
+        calls.append(url)
+        await asyncio.sleep(delay)
+        return f"text of {url}"
+
+    @tool
+    async def fetch_webpages(urls: list, max_chars: int = 5000, timeout: float = 15) -> str:
+        """Fetch pages."""
+        if batches is not None:
+            batches.append(list(urls))
+        calls.extend(urls)
+        await asyncio.sleep(delay)
+        return "\n\n".join(f"=== [{i}] URL: {url} ===\ntext of {url}" for i, url in enumerate(urls, 1))
+
+    @tool
+    def web_search(query: str) -> str:
+        """Search."""
+        return "results"
+
+    return [fetch_webpage, fetch_webpages, web_search]
+
+
+@pytest.mark.asyncio
+async def test_shared_fetches_reuse_pages_across_researchers():
+    import asyncio
+    calls, batches = [], []
+    base = _counting_fetch_tools(calls, batches=batches)
+    first = {t.name: t for t in tools.with_shared_fetches(base, "run-a")}
+    second = {t.name: t for t in tools.with_shared_fetches(base, "run-a")}
+
+    try:
+        results = await asyncio.gather(
+            first["fetch_webpage"].ainvoke({"url": "https://example.com/a"}),
+            # In flight at the same time, and the same page with a fragment
+            second["fetch_webpage"].ainvoke({"url": "https://EXAMPLE.com/a#intro"}),
+            second["fetch_webpages"].ainvoke({"urls": ["https://example.com/a", "https://example.com/b"]}),
+        )
+        later = await first["fetch_webpage"].ainvoke({"url": "https://example.com/b"})
+    finally:
+        stats = tools.release_fetch_registry("run-a")
+
+    assert sorted(calls) == ["https://example.com/a", "https://example.com/b"]
+    # Only the page nobody was fetching yet went to the server
+    assert batches == [["https://example.com/b"]]
+    assert results[0] == results[1] == "text of https://example.com/a"
+    assert "=== [2] URL: https://example.com/b ===\ntext of https://example.com/b" in results[2]
+    assert later == "text of https://example.com/b"
+    assert stats == {"requested": 5, "fetched": 2, "saved": 3}
+    assert first["web_search"] is base[2]
+    # Researchers of one run share the wrappers
+    assert first["fetch_webpage"] is second["fetch_webpage"]
+
+
+@pytest.mark.asyncio
+async def test_shared_fetches_are_per_run_and_retry_failures():
+    calls = []
+    base = _counting_fetch_tools(calls, delay=0)
+    failing = {"first": True}
+
+    async def flaky(url: str, max_chars: int = 5000) -> str:
+        calls.append(url)
+        if failing.pop("first", False):
+            return "Error: HTTP 503"
+        return "page"
+
+    from langchain_core.tools import StructuredTool
+    base[0] = StructuredTool.from_function(coroutine=flaky, name="fetch_webpage", description="Fetch a page.")
+
+    try:
+        run_a = {t.name: t for t in tools.with_shared_fetches(base, "run-a")}
+        run_b = {t.name: t for t in tools.with_shared_fetches(base, "run-b")}
+        assert await run_a["fetch_webpage"].ainvoke({"url": "https://example.com"}) == "Error: HTTP 503"
+        assert await run_a["fetch_webpage"].ainvoke({"url": "https://example.com"}) == "page"
+        assert await run_b["fetch_webpage"].ainvoke({"url": "https://example.com"}) == "page"
+    finally:
+        tools.release_fetch_registry("run-a")
+        tools.release_fetch_registry("run-b")
+
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_shared_batch_fetch_is_one_call_with_per_page_errors():
+    from langchain_core.tools import StructuredTool, ToolException
+
+    calls, batches = [], []
+    base = _counting_fetch_tools(calls, delay=0, batches=batches)
+    attempts = []
+
+    async def failing_batch(urls: list, max_chars: int = 5000, timeout: float = 15) -> str:
+        attempts.append(list(urls))
+        raise ToolException("server unavailable")
+
+    real_batch = base[1]
+    base[1] = StructuredTool.from_function(coroutine=failing_batch, name="fetch_webpages", description="Fetch pages.")
+    urls = ["https://example.com/a", "https://example.com/b", "https://example.com/a#again"]
+
+    try:
+        wrapped = {t.name: t for t in tools.with_shared_fetches(base, "run-a")}
+        failed = await wrapped["fetch_webpages"].ainvoke({"urls": urls})
+        base[1] = real_batch
+        wrapped = {t.name: t for t in tools.with_shared_fetches(base, "run-a")}
+        retried = await wrapped["fetch_webpages"].ainvoke({"urls": urls})
+    finally:
+        tools.release_fetch_registry("run-a")
+
+    # One server call per batch, with the duplicate URL sent once
+    assert attempts == [["https://example.com/a", "https://example.com/b"]]
+    assert batches == [["https://example.com/a", "https://example.com/b"]]
+    assert failed.count("Error: server unavailable") == 3
+    assert "=== [3] URL: https://example.com/a#again ===\ntext of https://example.com/a" in retried
@@ -0,0 +1,128 @@
+import json
+import pytest
+from unittest.mock import patch
+
+import httpx
+
+from mcp_servers import http_client, research_server, wikipedia_api
+from mcp_servers.search_cache import QueryCache
+
+
+def _page(title, index=None, extract="", disambiguation=False, missing=False):
+    page = {"title": title, "extract": extract, "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"}
+    if index is not None:
+        page["index"] = index
+    if disambiguation:
+        page["pageprops"] = {"disambiguation": ""}
+    if missing:
+        page = {"title": title, "missing": True}
+    return page
+
+
+@pytest.fixture
+def api():
+    """Serve canned Action API responses; records every request's query params."""
+    responses, seen = [], []
+
+    def handler(request):
+        seen.append(dict(request.url.params))
+        return httpx.Response(200, content=json.dumps(responses.pop(0)).encode())
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch.object(http_client, "get_client", return_value=client):
+        yield responses, seen
+
+
+@pytest.mark.asyncio
+async def test_search_is_a_single_request(api):
+    responses, seen = api
+    responses.append({"query": {"pages": [
+        _page("Python (programming language)", index=1, extract="Python is a high-level language."),
+        _page("Monty Python", index=3),
+        _page("Pythonidae", index=2),
+    ]}})
+
+    result = await wikipedia_api.search("python language", sentences=2)
+
+    assert len(seen) == 1
+    assert seen[0]["gsrsearch"] == "python language"
+    assert seen[0]["exsentences"] == "2"
+    assert result["title"] == "Python (programming language)"
+    assert result["summary"] == "Python is a high-level language."
+    assert result["url"].endswith("Python_(programming_language)")
+    # Related topics keep search rank order
+    assert result["related"] == ["Pythonidae", "Monty Python"]
+
+
+@pytest.mark.asyncio
+async def test_search_skips_disambiguation_pages(api):
+    responses, _ = api
+    responses.append({"query": {"pages": [
+        _page("Mercury", index=1, disambiguation=True),
+        _page("Mercury (planet)", index=2, extract="Mercury is the smallest planet."),
+    ]}})
+
+    result = await wikipedia_api.search("mercury")
+
+    assert result["title"] == "Mercury (planet)"
+
+
+@pytest.mark.asyncio
+async def test_search_reports_only_disambiguation_and_no_results(api):
+    responses, _ = api
+    responses.append({"query": {"pages": [_page("Mercury", index=1, disambiguation=True)]}})
+    responses.append({"batchcomplete": True})
+
+    assert await wikipedia_api.search("mercury") == {"options": ["Mercury"]}
+    assert await wikipedia_api.search("zzzxxyy") == {"found": False}
+
+
+@pytest.mark.asyncio
+async def test_get_summaries_batches_and_follows_redirects(api):
+    responses, seen = api
+    responses.append({"query": {
+        "normalized": [{"from": "alan turing", "to": "Alan turing"}],
+        "redirects": [{"from": "Alan turing", "to": "Alan Turing"}],
+        "pages": [
+            _page("Alan Turing", extract="Alan Turing was a mathematician."),
+            _page("Ada Lovelace", extract="Ada Lovelace was a mathematician."),
+            _page("No Such Page", missing=True),
+        ],
+    }})
+
+    results = await wikipedia_api.get_summaries(["Ada Lovelace", "alan turing", "No Such Page"])
+
+    assert len(seen) == 1
+    assert seen[0]["titles"] == "Ada Lovelace|alan turing|No Such Page"
+    assert [r and r["title"] for r in results] == ["Ada Lovelace", "Alan Turing", None]
+
+
+@pytest.mark.asyncio
+async def test_wikipedia_summaries_tool_fetches_only_uncached_titles(api):
+    responses, seen = api
+    responses.append({"query": {"pages": [_page("Ada Lovelace", extract="Ada.")]}})
+    responses.append({"query": {"pages": [_page("Alan Turing", extract="Alan.")]}})
+
+    with patch.object(research_server, "search_cache", QueryCache()):
+        first = await research_server.wikipedia_summaries(["Ada Lovelace"])
+        second = await research_server.wikipedia_summaries(["Ada Lovelace", "Alan Turing"])
+
+    assert "Ada." in first
+    assert "Ada." in second and "Alan." in second
+    assert [s["titles"] for s in seen] == ["Ada Lovelace", "Alan Turing"]
+
+
+@pytest.mark.asyncio
+async def test_wikipedia_search_tool_formats_result(api):
+    responses, _ = api
+    responses.append({"query": {"pages": [
+        _page("Photosynthesis", index=1, extract="Photosynthesis converts light."),
+        _page("Chlorophyll", index=2),
+    ]}})
+
+    with patch.object(research_server, "search_cache", QueryCache()):
+        result = await research_server.wikipedia_search("photosynthesis")
+
+    assert result.startswith("**Photosynthesis**")
+    assert "URL: https://en.wikipedia.org/wiki/Photosynthesis" in result
+    assert "Related topics: Chlorophyll" in result
@@ -1,53 +1,220 @@
-import pytest
-from unittest.mock import MagicMock, patch, AsyncMock
-from langchain_core.messages import AIMessage, HumanMessage
-from agents.writer import run_writer
-from agents.state import AgentState
-
-
-@pytest.mark.asyncio
-async def test_writer_run_initial_draft():
-    """Test writer initial draft mode."""
-    mock_response = AIMessage(content="Initial Draft Content")
-
-    mock_model_instance = MagicMock()
-    mock_model_instance.ainvoke = AsyncMock(return_value=mock_response)
-
-    with patch("agents.writer.get_llm", return_value=mock_model_instance):
-        
-        state: AgentState = {
-            "messages": [HumanMessage(content="Write a report about AI")],
-            "research_data": "AI is growing.",
-            "draft_document": "",
-            "current_phase": "writing",
-        }
-
-        result = await run_writer(state)
-
-    assert result["draft_document"] == "Initial Draft Content"
-    assert result["current_phase"] == "human_review"
-    assert "messages" in result
-
-
-@pytest.mark.asyncio
-async def test_writer_run_revision():
-    """Test writer revision mode."""
-    mock_response = AIMessage(content="Revised Draft Content")
-
-    mock_model_instance = MagicMock()
-    mock_model_instance.ainvoke = AsyncMock(return_value=mock_response)
-
-    with patch("agents.writer.get_llm", return_value=mock_model_instance):
-        
-        state: AgentState = {
-            "messages": [HumanMessage(content="Write a report about AI")],
-            "research_data": "AI is growing.",
-            "draft_document": "Initial draft content",
-            "rewrite_instructions": "Add more about ethics.",
-            "current_phase": "writing",
-        }
-
-        result = await run_writer(state)
-
-    assert result["draft_document"] == "Revised Draft Content"
-    assert result["rewrite_instructions"] == ""  # Should be cleared
+import pytest
+from unittest.mock import MagicMock, patch, AsyncMock
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from agents.writer import run_writer
+from agents.state import AgentState
+
+
+def _streaming_model(*pieces):
+    """Mock model whose astream() yields the given content pieces as chunks."""
+    async def astream(messages):
+        for piece in pieces:
+            yield AIMessageChunk(content=piece)
+
+    model = MagicMock()
+    model.astream = MagicMock(side_effect=astream)
+    return model
+
+
+@pytest.mark.asyncio
+async def test_writer_run_initial_draft(research_store):
+    """Test writer initial draft mode."""
+    record_id = research_store.add("run", "AI", "AI is growing.")
+    mock_model_instance = _streaming_model("Initial ", "Draft ", "Content")
+
+    with patch("agents.writer.get_llm", return_value=mock_model_instance):
+        
+        state: AgentState = {
+            "messages": [HumanMessage(content="Write a report about AI")],
+            "research_record_ids": [record_id],
+            "draft_document": "",
+            "current_phase": "writing",
+        }
+
+        result = await run_writer(state)
+
+    assert "AI is growing." in mock_model_instance.astream.call_args.args[0][1].content
+    assert result["draft_document"] == "Initial Draft Content"
+    assert result["current_phase"] == "human_review"
+    assert "messages" in result
+
+
+@pytest.mark.asyncio
+async def test_writer_run_revision(research_store):
+    """Test writer revision mode."""
+    record_id = research_store.add("run", "AI", "AI is growing.")
+    mock_model_instance = _streaming_model("Revised Draft Content")
+
+    with patch("agents.writer.get_llm", return_value=mock_model_instance):
+        
+        state: AgentState = {
+            "messages": [HumanMessage(content="Write a report about AI")],
+            "research_record_ids": [record_id],
+            "draft_document": "Initial draft content",
+            "rewrite_instructions": "Add more about ethics.",
+            "current_phase": "writing",
+        }
+
+        result = await run_writer(state)
+
+    assert result["draft_document"] == "Revised Draft Content"
+    assert result["rewrite_instructions"] == ""  # Should be cleared
+
+
+@pytest.mark.asyncio
+async def test_writer_streams_tokens_to_custom_stream():
+    """Tokens go to the graph's custom stream in order and add up to the draft."""
+    events = []
+    mock_model_instance = _streaming_model("# Title", "\n\n", "Body ", "text.")
+
+    with patch("agents.writer.get_llm", return_value=mock_model_instance), \
+         patch("agents.writer.get_stream_writer", return_value=events.append):
+
+        state: AgentState = {
+            "messages": [HumanMessage(content="Write a report about AI")],
+            "research_data": "AI is growing.",
+            "draft_document": "",
+            "current_phase": "writing",
+        }
+
+        result = await run_writer(state)
+
+    assert [e["type"] for e in events] == ["draft_start"] + ["draft_token"] * 4 + ["draft_end"]
+    tokens = "".join(e["content"] for e in events if e["type"] == "draft_token")
+    assert tokens == result["draft_document"] == "# Title\n\nBody text."
+    assert result["messages"][-1].content == result["draft_document"]
+
+
+@pytest.mark.asyncio
+async def test_writer_graph_streams_before_draft_is_complete(fake_llm_server):
+    """Through a real graph and ChatOpenAI, the first token arrives well before the full draft."""
+    import time
+    from langgraph.graph import StateGraph, START, END
+    from utils import close_llm_clients
+
+    fake_llm_server.chunk_delay = 0.05
+    builder = StateGraph(AgentState)
+    builder.add_node("writer", run_writer)
+    builder.add_edge(START, "writer")
+    builder.add_edge("writer", END)
+    graph = builder.compile()
+
+    start = time.perf_counter()
+    first_token_at = None
+    tokens, final = [], None
+    try:
+        async for mode, event in graph.astream(
+            {"messages": [HumanMessage(content="Write a report")], "research_record_ids": []},
+            stream_mode=["custom", "values"],
+        ):
+            if mode == "custom" and event["type"] == "draft_token":
+                first_token_at = first_token_at or time.perf_counter() - start
+                tokens.append(event["content"])
+            elif mode == "values":
+                final = event
+    finally:
+        await close_llm_clients()
+    total = time.perf_counter() - start
+
+    assert fake_llm_server.requests[-1]["stream"] is True
+    assert len(tokens) > 1
+    assert "".join(tokens) == final["draft_document"]
+    assert first_token_at < total / 2
+
+
+@pytest.mark.asyncio
+async def test_writer_map_reduce_for_large_research(monkeypatch, research_store):
+    """Research over the token budget is condensed chunk by chunk before drafting."""
+    monkeypatch.setenv("WRITER_MAX_RESEARCH_TOKENS", "100")
+    monkeypatch.setenv("WRITER_CHUNK_TOKENS", "100")
+    record_ids = [research_store.add("run", f"Topic {i}", f"fact {i} " * 40) for i in range(6)]
+
+    mock_model_instance = _streaming_model("Final draft")
+    mock_model_instance.ainvoke = AsyncMock(side_effect=lambda msgs: AIMessageChunk(content="- condensed fact"))
+
+    with patch("agents.writer.get_llm", return_value=mock_model_instance), \
+         patch("agents.compaction.get_llm", return_value=mock_model_instance), \
+         patch("agents.compaction.count_tokens", side_effect=lambda text: len(text) // 4), \
+         patch("agents.compaction.split_by_tokens", side_effect=lambda text, n: text.split("\n\n")):
+
+        state: AgentState = {
+            "messages": [HumanMessage(content="Write a report about AI")],
+            "research_record_ids": record_ids,
+            "draft_document": "",
+            "current_phase": "writing",
+        }
+
+        result = await run_writer(state)
+
+    # One map call per chunk, then the streamed draft from the notes
+    assert mock_model_instance.ainvoke.await_count == 6
+    excerpt = mock_model_instance.ainvoke.await_args_list[0].args[0][1].content
+    assert "Write a report about AI" in excerpt and "fact 0" in excerpt
+    draft_prompt = mock_model_instance.astream.call_args.args[0][1].content
+    assert "--- NOTES 6 ---\n- condensed fact" in draft_prompt
+    assert "fact 0" not in draft_prompt
+    assert result["draft_document"] == "Final draft"
+
+
+@pytest.mark.asyncio
+async def test_writer_small_research_skips_map_reduce(research_store):
+    record_id = research_store.add("run", "AI", "AI is growing.")
+    mock_model_instance = _streaming_model("Draft")
+    mock_model_instance.ainvoke = AsyncMock()
+
+    with patch("agents.writer.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Write a report about AI")],
+            "research_record_ids": [record_id],
+            "draft_document": "",
+            "current_phase": "writing",
+        }
+        await run_writer(state)
+
+    mock_model_instance.ainvoke.assert_not_awaited()
+    assert "AI is growing." in mock_model_instance.astream.call_args.args[0][1].content
+
+
+@pytest.mark.asyncio
+async def test_writer_revision_selects_relevant_records(monkeypatch, research_store):
+    """Revisions get the records matching the instructions instead of the first N characters."""
+    monkeypatch.setenv("WRITER_REVISION_RESEARCH_TOKENS", "60")
+    filler = [research_store.add("run", "Market", f"Market size figure {i}. " * 10) for i in range(5)]
+    ethics = research_store.add("run", "Ethics", "Ethics boards review AI deployments for bias and safety.")
+    mock_model_instance = _streaming_model("Revised")
+
+    with patch("agents.writer.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Write a report about AI")],
+            "research_record_ids": filler + [ethics],
+            "draft_document": "Initial draft content",
+            "rewrite_instructions": "Add more about ethics and bias.",
+            "current_phase": "writing",
+        }
+        await run_writer(state)
+
+    prompt = mock_model_instance.astream.call_args.args[0][1].content
+    assert "Ethics boards review AI deployments" in prompt
+    assert "Market size figure" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_writer_keeps_prompt_out_of_shared_messages(research_store):
+    """By default only the draft message reaches the shared history, plus metrics."""
+    record_id = research_store.add("run", "AI", "AI is growing.")
+    mock_model_instance = _streaming_model("Draft")
+
+    with patch("agents.writer.get_llm", return_value=mock_model_instance):
+        state: AgentState = {
+            "messages": [HumanMessage(content="Write a report about AI")],
+            "research_record_ids": [record_id],
+            "draft_document": "",
+            "current_phase": "writing",
+        }
+        result = await run_writer(state)
+
+    assert [m.content for m in result["messages"]] == ["Draft"]
+    [metrics] = result["agent_metrics"]
+    assert metrics["mode"] == "initial"
+    assert metrics["draft_chars"] == 5
+    assert metrics["prompt_chars"] > len("AI is growing.")
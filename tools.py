@@ -1,45 +1,427 @@
-"""
-MCP Client Configuration for Tools
-
-Sets up MultiServerMCPClient to connect to research and document MCP servers.
-Provides async access to all MCP tools for the LangGraph agent.
-"""
-
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from pathlib import Path
-import os
-
-# Get absolute paths to MCP servers
-PROJECT_DIR = Path(__file__).parent
-RESEARCH_SERVER = str(PROJECT_DIR / "mcp_servers" / "research_server.py")
-
-
-def get_mcp_client() -> MultiServerMCPClient:
-    """
-    Create and return a MultiServerMCPClient configured with all MCP servers.
-    
-    Returns:
-        MultiServerMCPClient instance connected to research servers
-    """
-    client = MultiServerMCPClient(
-        {
-            "research": {
-                "command": "python",
-                "args": [RESEARCH_SERVER],
-                "transport": "stdio",
-            }
-        }
-    )
-    return client
-
-
-async def get_tools():
-    """
-    Async function to get all tools from MCP servers.
-    
-    Returns:
-        List of LangChain tools from all connected MCP servers
-    """
-    client = get_mcp_client()
-    tools = await client.get_tools()
-    return tools
+"""
+MCP Client Configuration for Tools
+
+Sets up MultiServerMCPClient to connect to research and document MCP servers.
+Provides async access to all MCP tools for the LangGraph agent.
+
+MCP sessions are long-lived: a process-wide ToolRegistry lazily starts a small
+pool of server sessions on first use and shares them across every researcher
+(and every query of the interactive loop) until close_tools() is called.
+
+Within a run, with_shared_fetches() routes every researcher's page fetches
+through one FetchRegistry, so sibling researchers that pick the same search
+hits fetch each page once.
+"""
+
+from langchain_core.tools import StructuredTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp_servers.page_cache import normalize_url
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
+import time
+
+# Get absolute paths to MCP servers
+PROJECT_DIR = Path(__file__).parent
+RESEARCH_SERVER = str(PROJECT_DIR / "mcp_servers" / "research_server.py")
+
+
+def get_mcp_client() -> MultiServerMCPClient:
+    """
+    Create and return a MultiServerMCPClient configured with all MCP servers.
+
+    Returns:
+        MultiServerMCPClient instance connected to research servers
+    """
+    client = MultiServerMCPClient(
+        {
+            "research": {
+                "command": "python",
+                "args": [RESEARCH_SERVER],
+                "transport": "stdio",
+            }
+        }
+    )
+    return client
+
+
+class _SessionWorker:
+    """
+    Owns one long-lived MCP session and the tools loaded from it.
+
+    The session (and its stdio subprocess) is opened and closed inside a
+    dedicated task because the underlying anyio context managers must be
+    exited by the same task that entered them.
+    """
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str):
+        self.client = client
+        self.server_name = server_name
+        self.session = None
+        self.tools: List = []
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        """True while the session task is running and connected."""
+        return self._task is not None and not self._task.done() and self.session is not None
+
+    async def start(self):
+        """Open the session and load its tools. Raises if startup fails."""
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.server_name}")
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self):
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                self.tools = await load_mcp_tools(session, server_name=self.server_name)
+                self._ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self, timeout: float) -> bool:
+        """Return True if the server answers a ping within `timeout` seconds."""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def stop(self):
+        """Close the session and wait for its subprocess to exit."""
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+
+
+class ToolRegistry:
+    """
+    Process-wide pool of MCP sessions and their LangChain tools.
+
+    Sessions start lazily on the first get_tools() call. Each call hands out
+    the tools of the next session in round-robin order, so parallel
+    researchers share a fixed set of server processes instead of each
+    spawning its own.
+
+    A session whose server process has exited is replaced on the next
+    get_tools() call. Every MCP_HEALTH_CHECK_INTERVAL seconds (default 60),
+    get_tools() also pings the sessions, so a server that is still running
+    but hung is restarted too.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None, server_name: str = "research"):
+        self.pool_size = max(1, pool_size or int(os.getenv("MCP_SESSION_POOL_SIZE", "1")))
+        self.server_name = server_name
+        self.ping_timeout = float(os.getenv("MCP_PING_TIMEOUT", "5"))
+        self.health_check_interval = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "60"))
+        self._last_health_check = time.monotonic()
+        self._client: Optional[MultiServerMCPClient] = None
+        self._workers: List[_SessionWorker] = []
+        self._next = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _start_worker(self) -> _SessionWorker:
+        if self._client is None:
+            self._client = get_mcp_client()
+        worker = _SessionWorker(self._client, self.server_name)
+        await worker.start()
+        return worker
+
+    async def _ensure_started(self):
+        async with self._get_lock():
+            # Replace sessions whose server process has exited
+            for i, worker in enumerate(self._workers):
+                if not worker.alive:
+                    await worker.stop()
+                    self._workers[i] = await self._start_worker()
+            while len(self._workers) < self.pool_size:
+                self._workers.append(await self._start_worker())
+
+    async def get_tools(self) -> List:
+        """
+        Get the tools of one pooled session, starting the pool if needed.
+
+        Returns:
+            List of LangChain tools bound to a live MCP session
+        """
+        await self._ensure_started()
+        if time.monotonic() - self._last_health_check >= self.health_check_interval:
+            await self.health_check()
+        worker = self._workers[self._next % len(self._workers)]
+        self._next += 1
+        return worker.tools
+
+    async def health_check(self) -> List[bool]:
+        """
+        Ping every pooled session and restart the ones that do not answer.
+
+        Returns:
+            Per-session health as observed before any restart
+        """
+        # Set first so concurrent get_tools() calls don't all start a check
+        self._last_health_check = time.monotonic()
+        workers = list(self._workers)
+        results = await asyncio.gather(*(w.ping(self.ping_timeout) for w in workers))
+        if not all(results):
+            async with self._get_lock():
+                for worker, ok in zip(workers, results):
+                    # Skip sessions already replaced while we were pinging
+                    if not ok and worker in self._workers:
+                        await worker.stop()
+                        self._workers[self._workers.index(worker)] = await self._start_worker()
+        return list(results)
+
+    async def aclose(self):
+        """Close every pooled session and stop their server processes."""
+        workers, self._workers = self._workers, []
+        await asyncio.gather(*(w.stop() for w in workers))
+
+
+_registry: Optional[ToolRegistry] = None
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Return the process-wide ToolRegistry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        _registry = ToolRegistry()
+    return _registry
+
+
+async def get_tools():
+    """
+    Async function to get all tools from MCP servers.
+
+    Tools come from the shared session pool, so repeated calls reuse the
+    running server processes instead of spawning new ones.
+
+    Returns:
+        List of LangChain tools from all connected MCP servers
+    """
+    return await get_tool_registry().get_tools()
+
+
+async def close_tools():
+    """Shut down the shared MCP sessions. Call once before the process exits."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
+
+
+# --- Shared fetches within a run ---
+
+def _tool_text(output) -> str:
+    """Text of a tool result (MCP tools may return content blocks)."""
+    if isinstance(output, list):
+        return "\n".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in output)
+    return output if isinstance(output, str) else str(output)
+
+
+def _batch_header(index: int, url: str) -> str:
+    """Section header of one page in a fetch_webpages result (the research server's layout)."""
+    return f"=== [{index}] URL: {url} ==="
+
+
+def _split_batch(urls: List[str], text: str) -> List[str]:
+    """Per-URL results of a fetch_webpages call, in the order of `urls`."""
+    starts = []
+    position = 0
+    for i, url in enumerate(urls, 1):
+        header = _batch_header(i, url) + "\n"
+        start = text.find(header, position)
+        if start < 0:
+            # Not the batch layout (e.g. a tool-level error): every page gets the whole text
+            return [text] * len(urls)
+        starts.append((start, start + len(header)))
+        position = start + len(header)
+    ends = [start for start, _ in starts[1:]] + [len(text)]
+    return [text[body:end].rstrip("\n") for (_, body), end in zip(starts, ends)]
+
+
+class FetchRegistry:
+    """
+    Pages fetched during one run, shared by all its researchers.
+
+    A URL fetched, or still being fetched, by one researcher is handed to any
+    other researcher that asks for it (with the same max_chars) instead of
+    being fetched again. URLs are keyed like the server's page cache
+    (mcp_servers.page_cache.normalize_url). Failed fetches are not kept, so a
+    later call retries.
+    """
+
+    def __init__(self):
+        self._pages: Dict[Tuple[str, int], "asyncio.Task[str]"] = {}
+        # Wrapped tool lists by the tools they wrap, reused by every researcher of the run
+        self.wrapped: Dict[Tuple[int, ...], Tuple[List, List]] = {}
+        self.requested = 0
+        self.fetched = 0
+
+    @property
+    def saved(self) -> int:
+        """Fetches answered from the registry."""
+        return self.requested - self.fetched
+
+    def stats(self) -> Dict[str, int]:
+        return {"requested": self.requested, "fetched": self.fetched, "saved": self.saved}
+
+    async def fetch(self, url: str, max_chars: int, fetch: Callable[[], Awaitable[str]]) -> str:
+        """Page text for `url`: shared if already fetched or in flight, otherwise from `fetch()`."""
+        key = (normalize_url(url), max_chars)
+        self.requested += 1
+        task = self._pages.get(key)
+        if task is None:
+            self.fetched += 1
+            task = asyncio.ensure_future(fetch())
+            self._pages[key] = task
+            task.add_done_callback(lambda t: self._forget_failure(key, t))
+        # Shielded so one researcher's timeout doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def fetch_many(
+        self,
+        urls: List[str],
+        max_chars: int,
+        fetch_batch: Callable[[List[str]], Awaitable[List[str]]],
+        timeout: float,
+    ) -> List[str]:
+        """
+        Page text for each of `urls`, in order.
+
+        Pages not already fetched or in flight are requested together with
+        one `fetch_batch(missing_urls)` call, which returns one result per
+        URL. Pages another call is fetching are awaited for at most `timeout`
+        seconds. A failure or timeout only fills that page's slot with an
+        "Error: ..." result.
+        """
+        keys = [(normalize_url(url), max_chars) for url in urls]
+        self.requested += len(urls)
+        missing: Dict[Tuple[str, int], str] = {}
+        for url, key in zip(urls, keys):
+            if key not in self._pages and key not in missing:
+                missing[key] = url
+        if missing:
+            self.fetched += len(missing)
+            batch = asyncio.ensure_future(fetch_batch(list(missing.values())))
+            for i, key in enumerate(missing):
+                task = asyncio.ensure_future(self._batch_item(batch, i))
+                self._pages[key] = task
+                task.add_done_callback(lambda t, key=key: self._forget_failure(key, t))
+        # Taken before awaiting: failed tasks are dropped from the registry when they finish
+        tasks = [self._pages[key] for key in keys]
+
+        async def wait(url: str, key: Tuple[str, int], task: "asyncio.Task[str]") -> str:
+            try:
+                # This call's own pages are bounded by the server's per-page timeout
+                if key in missing:
+                    return await asyncio.shield(task)
+                return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+            except asyncio.TimeoutError:
+                return f"Error: Timed out after {timeout:.0f}s for: {url}"
+            except Exception as e:
+                return f"Error: {e}"
+
+        return await asyncio.gather(*(wait(url, key, task) for url, key, task in zip(urls, keys, tasks)))
+
+    @staticmethod
+    async def _batch_item(batch: "asyncio.Future[List[str]]", index: int) -> str:
+        return (await batch)[index]
+
+    def _forget_failure(self, key: Tuple[str, int], task: "asyncio.Task[str]"):
+        if task.cancelled() or task.exception() is not None or str(task.result()).startswith("Error"):
+            if self._pages.get(key) is task:
+                del self._pages[key]
+
+
+_fetch_registries: Dict[str, FetchRegistry] = {}
+
+
+def get_fetch_registry(run_id: str) -> FetchRegistry:
+    """Return the FetchRegistry of a run, creating it on first use."""
+    if run_id not in _fetch_registries:
+        _fetch_registries[run_id] = FetchRegistry()
+    return _fetch_registries[run_id]
+
+
+def release_fetch_registry(run_id: str) -> Dict[str, int]:
+    """Drop a finished run's registry and return its stats."""
+    registry = _fetch_registries.pop(run_id, None)
+    return registry.stats() if registry is not None else FetchRegistry().stats()
+
+
+def with_shared_fetches(tools: List, run_id: str) -> List:
+    """
+    Wrap fetch_webpage and fetch_webpages so their pages go through the run's FetchRegistry.
+
+    fetch_webpages sends the pages the registry doesn't already have to the
+    server in one call (which caps its concurrency with BATCH_CONCURRENCY)
+    and shares the rest; other tools are returned unchanged.
+    """
+    by_name = {t.name: t for t in tools}
+    fetch_tool = by_name.get("fetch_webpage")
+    batch_tool = by_name.get("fetch_webpages")
+    if fetch_tool is None:
+        return tools
+    registry = get_fetch_registry(run_id)
+    key = tuple(id(t) for t in tools)
+    cached = registry.wrapped.get(key)
+    # The originals are kept with the wrappers so recycled ids can't match
+    if cached is not None and all(a is b for a, b in zip(cached[0], tools)):
+        return cached[1]
+
+    async def fetch_one(url: str, max_chars: int) -> str:
+        async def fetch() -> str:
+            return _tool_text(await fetch_tool.ainvoke({"url": url, "max_chars": max_chars}))
+        return await registry.fetch(url, max_chars, fetch)
+
+    async def fetch_webpage(url: str, max_chars: int = 5000) -> str:
+        return await fetch_one(url, max_chars)
+
+    async def fetch_webpages(urls: List[str], max_chars: int = 5000, timeout: float = 15) -> str:
+        if not urls:
+            return "Error: No URLs provided"
+
+        async def fetch_batch(missing: List[str]) -> List[str]:
+            output = await batch_tool.ainvoke({"urls": missing, "max_chars": max_chars, "timeout": timeout})
+            return _split_batch(missing, _tool_text(output))
+
+        results = await registry.fetch_many(urls, max_chars, fetch_batch, timeout)
+        # Same layout as the research server's batch tools
+        return "\n\n".join(
+            f"{_batch_header(i, url)}\n{result}" for i, (url, result) in enumerate(zip(urls, results), 1)
+        )
+
+    shared = {"fetch_webpage": fetch_webpage, "fetch_webpages": fetch_webpages}
+    wrapped = [
+        StructuredTool.from_function(
+            coroutine=shared[t.name],
+            name=t.name,
+            description=t.description,
+            args_schema=t.args_schema,
+        ) if t.name in shared else t
+        for t in tools
+    ]
+    registry.wrapped[key] = (list(tools), wrapped)
+    return wrapped
@@ -1,9 +1,56 @@
-"""
-Utilities Module
-
-Shared helpers used across agents.
-"""
-
-from .llm import get_llm
-
-__all__ = ["get_llm"]
+"""
+Utilities Module
+
+Shared helpers used across agents.
+"""
+
+from .llm import (
+    get_llm,
+    bind_tools_cached,
+    astream_cached,
+    close_llm_clients,
+    llm_cache_stats,
+    close_llm_cache,
+)
+from .llm_cache import LLMResponseCache
+from .limits import max_fanout, min_fanout, research_slot
+from .tokens import count_tokens, split_by_tokens
+from .research_store import (
+    ResearchRecord,
+    ResearchStore,
+    get_research_store,
+    close_research_store,
+    render_records,
+)
+from .checkpoint import (
+    CompactSerializer,
+    CompactSqliteSaver,
+    get_checkpointer,
+    close_checkpointer,
+    prune_checkpoints,
+)
+
+__all__ = [
+    "get_llm",
+    "bind_tools_cached",
+    "astream_cached",
+    "close_llm_clients",
+    "llm_cache_stats",
+    "close_llm_cache",
+    "LLMResponseCache",
+    "max_fanout",
+    "min_fanout",
+    "research_slot",
+    "count_tokens",
+    "split_by_tokens",
+    "ResearchRecord",
+    "ResearchStore",
+    "get_research_store",
+    "close_research_store",
+    "render_records",
+    "CompactSerializer",
+    "CompactSqliteSaver",
+    "get_checkpointer",
+    "close_checkpointer",
+    "prune_checkpoints",
+]
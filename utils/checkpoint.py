@@ -0,0 +1,310 @@
+"""
+Durable Checkpointer
+
+File-backed LangGraph checkpointer (SQLite in WAL mode) so interactive
+sessions survive a restart and can be resumed by thread_id, without keeping
+every run's state history in memory.
+
+The stock SQLite saver writes the complete state as one blob for every
+super-step, so a large value that never changes (a draft waiting for review,
+a long message history) is copied into each checkpoint. CompactSerializer
+stores large channel values separately, once per distinct content, so a
+checkpoint only adds the values that actually changed, and compresses large
+payloads. prune_checkpoints() keeps the newest CHECKPOINT_KEEP checkpoints
+of a thread and drops the values only the pruned checkpoints referred to,
+along with values stored for checkpoints whose row was never committed.
+
+Storing values is a synchronous SQLite write, so CompactSqliteSaver
+serializes checkpoints in a worker thread instead of on the event loop.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiosqlite
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+PROJECT_DIR = Path(__file__).parent.parent
+DEFAULT_CHECKPOINT_PATH = PROJECT_DIR / ".cache" / "checkpoints.sqlite"
+
+# Marks payloads compressed by CompactSerializer
+ZLIB_SUFFIX = "+zlib"
+# Key holding the content hashes of channel values stored out of line
+_REFS_KEY = "__value_refs__"
+# Values of a checkpoint with no committed row are orphaned once it is this
+# old; younger ones may belong to a checkpoint still being written
+ORPHAN_GRACE_SECONDS = 3600
+# 100-ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint_values (
+    hash TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint_value_refs (
+    checkpoint_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (checkpoint_id, hash)
+);
+CREATE INDEX IF NOT EXISTS checkpoint_value_refs_hash ON checkpoint_value_refs (hash);
+"""
+
+
+def _is_checkpoint(obj: Any) -> bool:
+    return isinstance(obj, dict) and "channel_values" in obj and "id" in obj
+
+
+def _checkpoint_id_at(timestamp: float) -> str:
+    """Smallest UUIDv6 checkpoint id created at `timestamp`; ids sort by creation time."""
+    ticks = int(timestamp * 10_000_000) + _UUID_EPOCH_OFFSET
+    value = ((ticks >> 12) & 0xFFFFFFFFFFFF) << 80 | 0x6 << 76 | (ticks & 0x0FFF) << 64
+    return str(uuid.UUID(int=value))
+
+
+class CompactSerializer(SerializerProtocol):
+    """
+    JsonPlusSerializer with compression and content-addressed channel values.
+
+    Serializing a checkpoint writes its large values to SQLite synchronously.
+    CompactSqliteSaver does that in a worker thread through compact(); other
+    callers of dumps_typed() pay for the write on their own thread.
+
+    Args:
+        path: SQLite file holding the shared values (the checkpoint database)
+        compress_min_bytes: Compress payloads at least this large
+            (default: $CHECKPOINT_COMPRESS_MIN_BYTES or 1 KB)
+        shared_min_bytes: Store channel values at least this large once, by
+            content hash (default: $CHECKPOINT_SHARED_MIN_BYTES or 4 KB)
+    """
+
+    def __init__(self, path: str, compress_min_bytes: Optional[int] = None, shared_min_bytes: Optional[int] = None):
+        self.inner = JsonPlusSerializer()
+        self.compress_min_bytes = compress_min_bytes or int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "1024"))
+        self.shared_min_bytes = shared_min_bytes or int(os.getenv("CHECKPOINT_SHARED_MIN_BYTES", "4096"))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _store_value(self, checkpoint_id: str, value: Any) -> Optional[str]:
+        """Store a large value out of line and return its hash, or None if it's small."""
+        type_, data = self.inner.dumps_typed(value)
+        if len(data) < self.shared_min_bytes:
+            return None
+        digest = hashlib.sha256(type_.encode() + b"\0" + data).hexdigest()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO checkpoint_values (hash, type, data) VALUES (?, ?, ?)",
+                (digest, type_, zlib.compress(data)),
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO checkpoint_value_refs (checkpoint_id, hash) VALUES (?, ?)",
+                (checkpoint_id, digest),
+            )
+        return digest
+
+    def _load_value(self, digest: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT type, data FROM checkpoint_values WHERE hash = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"Checkpoint value {digest} is missing")
+        return self.inner.loads_typed((row[0], zlib.decompress(row[1])))
+
+    def compact(self, checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a checkpoint's large channel values and return it with their hashes in their place."""
+        inline: Dict[str, Any] = {}
+        refs: Dict[str, str] = {}
+        for channel, value in checkpoint["channel_values"].items():
+            digest = self._store_value(checkpoint["id"], value)
+            if digest is None:
+                inline[channel] = value
+            else:
+                refs[channel] = digest
+        return {**checkpoint, "channel_values": inline, _REFS_KEY: refs}
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if _is_checkpoint(obj) and _REFS_KEY not in obj:
+            obj = self.compact(obj)
+
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) >= self.compress_min_bytes:
+            return type_ + ZLIB_SUFFIX, zlib.compress(data)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(ZLIB_SUFFIX):
+            type_, payload = type_[:-len(ZLIB_SUFFIX)], zlib.decompress(payload)
+        obj = self.inner.loads_typed((type_, payload))
+        if isinstance(obj, dict) and _REFS_KEY in obj:
+            refs = obj.pop(_REFS_KEY)
+            obj["channel_values"] = {
+                **obj["channel_values"],
+                **{channel: self._load_value(digest) for channel, digest in refs.items()},
+            }
+        return obj
+
+    def collect_garbage(self, deleted_checkpoint_ids: Iterable[str]) -> int:
+        """
+        Forget the references of deleted checkpoints and drop the values they
+        were the last to refer to.
+
+        Only values referenced by `deleted_checkpoint_ids` are candidates. A
+        value stored for a checkpoint that is still being written (its row
+        not yet committed) already has a reference, added together with the
+        value under the same lock, so it is never collected.
+
+        Returns:
+            Number of values deleted
+        """
+        with self._lock:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS pruned_checkpoints (id TEXT PRIMARY KEY)")
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS pruned_values (hash TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM pruned_checkpoints")
+            self._conn.execute("DELETE FROM pruned_values")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO pruned_checkpoints (id) VALUES (?)",
+                ((i,) for i in deleted_checkpoint_ids),
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pruned_values (hash) SELECT hash FROM checkpoint_value_refs "
+                "WHERE checkpoint_id IN (SELECT id FROM pruned_checkpoints)"
+            )
+            self._conn.execute(
+                "DELETE FROM checkpoint_value_refs WHERE checkpoint_id IN (SELECT id FROM pruned_checkpoints)"
+            )
+            deleted = self._conn.execute(
+                "DELETE FROM checkpoint_values WHERE hash IN (SELECT hash FROM pruned_values) "
+                "AND hash NOT IN (SELECT hash FROM checkpoint_value_refs)"
+            ).rowcount
+        return deleted
+
+    def referencing_checkpoints(self, created_before: str) -> List[str]:
+        """Ids of checkpoints with values stored out of line, created before the id `created_before`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT checkpoint_id FROM checkpoint_value_refs WHERE checkpoint_id < ?",
+                (created_before,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CompactSqliteSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver that stores CompactSerializer values off the event loop."""
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        if isinstance(self.serde, CompactSerializer):
+            checkpoint = await asyncio.to_thread(self.serde.compact, checkpoint)
+        return await super().aput(config, checkpoint, metadata, new_versions)
+
+
+def checkpoint_path() -> str:
+    """Checkpoint database from CHECKPOINT_DB (default .cache/checkpoints.sqlite)."""
+    path = os.getenv("CHECKPOINT_DB", str(DEFAULT_CHECKPOINT_PATH))
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# Checkpointers are bound to the event loop that created them
+_checkpointers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSqliteSaver]" = weakref.WeakKeyDictionary()
+
+
+def get_checkpointer() -> AsyncSqliteSaver:
+    """
+    Return the running loop's durable checkpointer, creating it on first use.
+
+    Must be called with an event loop running.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _checkpointers:
+        path = checkpoint_path()
+        conn = aiosqlite.connect(path)
+        _checkpointers[loop] = CompactSqliteSaver(conn, serde=CompactSerializer(path))
+    return _checkpointers[loop]
+
+
+async def _execute(saver: AsyncSqliteSaver, sql: str, params: tuple = ()) -> list:
+    await saver.setup()
+    async with saver.lock, saver.conn.execute(sql, params) as cursor:
+        rows = await cursor.fetchall()
+        await saver.conn.commit()
+    return rows
+
+
+async def _orphaned_checkpoints(saver: AsyncSqliteSaver, serde: CompactSerializer) -> List[str]:
+    """Checkpoints older than ORPHAN_GRACE_SECONDS that have stored values but no committed row."""
+    candidates = await asyncio.to_thread(
+        serde.referencing_checkpoints, _checkpoint_id_at(time.time() - ORPHAN_GRACE_SECONDS)
+    )
+    committed = set()
+    for start in range(0, len(candidates), 500):
+        batch = candidates[start:start + 500]
+        marks = ",".join("?" * len(batch))
+        rows = await _execute(saver, f"SELECT checkpoint_id FROM checkpoints WHERE checkpoint_id IN ({marks})", tuple(batch))
+        committed.update(row[0] for row in rows)
+    return [checkpoint_id for checkpoint_id in candidates if checkpoint_id not in committed]
+
+
+async def prune_checkpoints(saver: AsyncSqliteSaver, thread_id: str, keep: Optional[int] = None) -> int:
+    """
+    Keep only the newest `keep` checkpoints of a thread (default: $CHECKPOINT_KEEP or 10).
+
+    The latest checkpoint is always kept, so the thread can still be resumed.
+    Values left behind by checkpoints of any thread whose row was never
+    committed (a crash between storing the values and saving the row) are
+    dropped as well.
+
+    Returns:
+        Number of checkpoints deleted
+    """
+    keep = max(1, keep if keep is not None else int(os.getenv("CHECKPOINT_KEEP", "10")))
+    # Checkpoint ids are time-ordered (UUIDv6)
+    rows = await _execute(
+        saver,
+        "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? ORDER BY checkpoint_id DESC",
+        (str(thread_id),),
+    )
+    stale = [row[0] for row in rows[keep:]]
+    for start in range(0, len(stale), 500):
+        batch = stale[start:start + 500]
+        marks = ",".join("?" * len(batch))
+        await _execute(saver, f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id IN ({marks})", (str(thread_id), *batch))
+        await _execute(saver, f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_id IN ({marks})", (str(thread_id), *batch))
+
+    if isinstance(saver.serde, CompactSerializer):
+        # Only this thread's pruned checkpoints and old orphans: other threads
+        # may be writing checkpoints whose values are stored but whose rows
+        # aren't committed yet
+        deleted = stale + await _orphaned_checkpoints(saver, saver.serde)
+        if deleted:
+            await asyncio.to_thread(saver.serde.collect_garbage, deleted)
+    return len(stale)
+
+
+async def close_checkpointer():
+    """Close the running loop's checkpointer."""
+    saver = _checkpointers.pop(asyncio.get_running_loop(), None)
+    if saver is not None:
+        await saver.conn.close()
+        if isinstance(saver.serde, CompactSerializer):
+            saver.serde.close()
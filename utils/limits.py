@@ -0,0 +1,86 @@
+"""
+Concurrency and Rate Limits
+
+Bounds on how much work the pipeline puts on the model provider at once:
+
+- research_slot(): semaphore shared by every researcher's LLM and tool
+  calls (RESEARCH_CONCURRENCY), so a wide fan-out queues instead of
+  flooding the API. Semaphores belong to the event loop that uses them, so
+  one is kept per running loop.
+- llm_rate_limiter(): process-wide token bucket applied to every model
+  instance from get_llm() when LLM_REQUESTS_PER_MINUTE is set.
+- max_fanout(): how many subtopics the supervisor may fan out to, given
+  RESEARCH_MAX_SUBTOPICS, the concurrency limit and the rate budget.
+"""
+
+import asyncio
+import functools
+import os
+import weakref
+from typing import Optional
+
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def research_concurrency() -> int:
+    """Researcher LLM/tool calls allowed in flight at once (RESEARCH_CONCURRENCY, default 4)."""
+    return max(1, int(os.getenv("RESEARCH_CONCURRENCY", "4")))
+
+
+def research_slot() -> asyncio.Semaphore:
+    """The running loop's semaphore for researcher LLM and tool calls."""
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(research_concurrency())
+    return _semaphores[loop]
+
+
+def requests_per_minute() -> Optional[float]:
+    """API request budget from LLM_REQUESTS_PER_MINUTE, or None when unlimited."""
+    value = os.getenv("LLM_REQUESTS_PER_MINUTE", "")
+    return float(value) if value else None
+
+
+@functools.lru_cache(maxsize=4)
+def _rate_limiter(rpm: float, burst: int) -> InMemoryRateLimiter:
+    return InMemoryRateLimiter(
+        requests_per_second=rpm / 60,
+        check_every_n_seconds=0.05,
+        max_bucket_size=burst,
+    )
+
+
+def llm_rate_limiter() -> Optional[InMemoryRateLimiter]:
+    """
+    Shared rate limiter for model calls, or None when LLM_REQUESTS_PER_MINUTE is unset.
+
+    Bursts of up to RESEARCH_CONCURRENCY requests are allowed once the bucket
+    has filled.
+    """
+    rpm = requests_per_minute()
+    if rpm is None:
+        return None
+    return _rate_limiter(rpm, research_concurrency())
+
+
+def max_fanout() -> int:
+    """
+    Most researchers one research round may start.
+
+    The smallest of RESEARCH_MAX_SUBTOPICS (default 4), RESEARCH_CONCURRENCY
+    and, with a rate budget, the number of researchers whose worst case of
+    RESEARCHER_MAX_ITERATIONS model calls fits in one minute of it.
+    """
+    width = min(int(os.getenv("RESEARCH_MAX_SUBTOPICS", "4")), research_concurrency())
+    rpm = requests_per_minute()
+    if rpm is not None:
+        calls_per_researcher = int(os.getenv("RESEARCHER_MAX_ITERATIONS", "5"))
+        width = min(width, int(rpm // calls_per_researcher))
+    return max(1, width)
+
+
+def min_fanout() -> int:
+    """Fewest subtopics the supervisor is asked for (RESEARCH_MIN_SUBTOPICS, default 1)."""
+    return max(1, min(int(os.getenv("RESEARCH_MIN_SUBTOPICS", "1")), max_fanout()))
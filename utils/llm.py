@@ -1,25 +1,219 @@
-"""
-LLM Factory
-
-Single place to create the ChatOpenAI instance used by all agents.
-"""
-
-import os
-from langchain_openai import ChatOpenAI
-
-
-def get_llm(temperature: float = 0.1) -> ChatOpenAI:
-    """
-    Create a ChatOpenAI instance from environment variables.
-
-    Args:
-        temperature: Model temperature (default 0.1)
-
-    Returns:
-        Configured ChatOpenAI instance
-    """
-    return ChatOpenAI(
-        model=os.environ.get("MODEL_NAME"),
-        base_url=os.environ.get("OPENAI_API_BASE"),
-        temperature=temperature,
-    )
+"""
+LLM Factory
+
+Single place to create the ChatOpenAI instance used by all agents.
+
+Instances are cached by (model, base_url, temperature, extra params), and all
+instances talking to the same endpoint share one pair of pooled HTTP clients,
+so the supervisor, every researcher and the writer reuse open connections to
+the API across nodes and across queries. Pooled connections belong to the
+event loop that opened them, so the cache is kept per running loop.
+
+Tool bindings are cached the same way (bind_tools_cached).
+
+When LLM_REQUESTS_PER_MINUTE is set, every instance shares one rate limiter
+(see utils.limits) so all agents together stay within the provider's limit.
+
+When LLM_CACHE names a SQLite file (or ":memory:"), every instance looks up
+byte-identical requests in a response cache (see utils.llm_cache) before
+calling the API; astream_cached() does the same for streamed calls.
+"""
+
+import asyncio
+import functools
+import os
+import ssl
+import weakref
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessageChunk, BaseMessage, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration
+from langchain_openai import ChatOpenAI
+
+from .limits import llm_rate_limiter
+from .llm_cache import LLMResponseCache
+
+# Cache used when no event loop is running (e.g. scripts, sync tests)
+_sync_cache: Dict[Tuple, object] = {}
+_loop_caches: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, object]]" = weakref.WeakKeyDictionary()
+# Response caches by (path, endpoint); SQLite connections aren't loop-bound, so one per process
+_response_caches: Dict[Tuple[str, str], LLMResponseCache] = {}
+
+
+def _cache() -> Dict[Tuple, object]:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _sync_cache
+    if loop not in _loop_caches:
+        _loop_caches[loop] = {}
+    return _loop_caches[loop]
+
+
+@functools.lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    # Loading the CA bundle takes tens of milliseconds; do it once per process
+    # rather than for every client on every event loop
+    return httpx.create_ssl_context()
+
+
+def _http_clients(base_url: Optional[str]) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Shared sync/async HTTP clients for one API endpoint.
+
+    Pool size is bounded by LLM_MAX_CONNECTIONS (default 20) with up to
+    LLM_MAX_KEEPALIVE (default 10) idle keep-alive connections.
+    """
+    cache = _cache()
+    key = ("http", base_url)
+    if key not in cache:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+        )
+        timeout = httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "600")), connect=10.0)
+        cache[key] = (
+            httpx.Client(limits=limits, timeout=timeout, verify=_ssl_context()),
+            httpx.AsyncClient(limits=limits, timeout=timeout, verify=_ssl_context()),
+        )
+    return cache[key]
+
+
+def llm_response_cache(base_url: Optional[str] = None) -> Optional[LLMResponseCache]:
+    """
+    The response cache for an API endpoint, or None unless LLM_CACHE is set.
+
+    LLM_CACHE is the SQLite file (or ":memory:"); LLM_CACHE_MAX_MB (default
+    256) bounds its size.
+    """
+    path = os.getenv("LLM_CACHE", "").strip()
+    if not path:
+        return None
+    key = (path, base_url or "")
+    if key not in _response_caches:
+        _response_caches[key] = LLMResponseCache(
+            path,
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            scope=base_url or "",
+        )
+    return _response_caches[key]
+
+
+def llm_cache_stats() -> Optional[dict]:
+    """Hit/miss counters summed over the response caches in use, or None if caching is off."""
+    if not _response_caches:
+        return None
+    caches = list(_response_caches.values())
+    totals = {name: sum(c.stats()[name] for c in caches) for name in ("hits", "misses", "writes", "evictions")}
+    lookups = totals["hits"] + totals["misses"]
+    totals["hit_rate"] = round(totals["hits"] / lookups, 3) if lookups else 0.0
+    return totals
+
+
+def close_llm_cache():
+    """Close the response caches (they are reopened on next use)."""
+    for cache in _response_caches.values():
+        cache.close()
+    _response_caches.clear()
+
+
+def get_llm(temperature: float = 0.1, **kwargs) -> ChatOpenAI:
+    """
+    Get a ChatOpenAI instance configured from environment variables.
+
+    Repeated calls with the same settings return the same instance.
+
+    Args:
+        temperature: Model temperature (default 0.1)
+        **kwargs: Extra ChatOpenAI parameters; part of the cache key
+
+    Returns:
+        Configured ChatOpenAI instance
+    """
+    model = os.environ.get("MODEL_NAME")
+    base_url = os.environ.get("OPENAI_API_BASE")
+    rate_limiter = llm_rate_limiter()
+    response_cache = llm_response_cache(base_url)
+    key = (
+        "llm", model, base_url, temperature, id(rate_limiter), id(response_cache),
+        tuple(sorted((k, repr(v)) for k, v in kwargs.items())),
+    )
+
+    cache = _cache()
+    if key not in cache:
+        http_client, http_async_client = _http_clients(base_url)
+        cache[key] = ChatOpenAI(
+            model=model,
+            base_url=base_url,
+            temperature=temperature,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            rate_limiter=rate_limiter,
+            cache=response_cache,
+            **kwargs,
+        )
+    return cache[key]
+
+
+def bind_tools_cached(model, tools: list):
+    """
+    model.bind_tools(tools), converted once and reused.
+
+    Bindings are cached next to the model instance (per event loop), keyed by
+    the tools' names and descriptions, so every researcher of every query
+    shares one bound model instead of re-converting the tool schemas.
+    Wrappers with the same name and description as the original tool (e.g.
+    shared fetches) reuse the original's binding.
+    """
+    cache = _cache()
+    key = ("bound", id(model), tuple((t.name, t.description) for t in tools))
+    entry = cache.get(key)
+    # The model is kept in the entry so a recycled id() can't return another model's binding
+    if entry is None or entry[0] is not model:
+        entry = cache[key] = (model, model.bind_tools(tools))
+    return entry[1]
+
+
+async def astream_cached(model, messages: List[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+    """
+    model.astream(messages) through the model's response cache.
+
+    LangChain only consults the cache for non-streamed calls. On a hit the
+    cached response is yielded as a single chunk; on a miss the chunks are
+    streamed as usual and the assembled response is stored.
+    """
+    cache = model.cache if isinstance(model.cache, BaseCache) else None
+    if cache is None:
+        async for chunk in model.astream(messages):
+            yield chunk
+        return
+
+    # Same key as LangChain's own lookups: message ids are not part of the request
+    llm_string = model._get_llm_string()
+    prompt = dumps([m.model_copy(update={"id": None}) if getattr(m, "id", None) else m for m in messages])
+    cached = await cache.alookup(prompt, llm_string)
+    if cached:
+        message = cached[0].message
+        yield AIMessageChunk(content=message.content, response_metadata=message.response_metadata)
+        return
+
+    response = None
+    async for chunk in model.astream(messages):
+        response = chunk if response is None else response + chunk
+        yield chunk
+    if response is not None:
+        await cache.aupdate(prompt, llm_string, [ChatGeneration(message=message_chunk_to_message(response))])
+
+
+async def close_llm_clients():
+    """Close the pooled HTTP clients of the running loop and forget its cached instances."""
+    cache = _cache()
+    for key, value in list(cache.items()):
+        if key[0] == "http":
+            sync_client, async_client = value
+            sync_client.close()
+            await async_client.aclose()
+    cache.clear()
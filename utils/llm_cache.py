@@ -0,0 +1,144 @@
+"""
+LLM Response Cache
+
+Opt-in, SQLite-backed exact-match cache of chat model responses, plugged into
+ChatOpenAI through LangChain's BaseCache interface. Entries are keyed by the
+SHA-256 of the endpoint, the model string LangChain derives from the model's
+parameters (model name, temperature, bound tools and their schemas, structured
+output format) and the serialized messages, so only byte-identical requests
+share a response. Batch re-runs and regression tests then pay for each
+completion once.
+
+Cached responses keep the token usage recorded when they were made, so
+token budgets play out the same way on a re-run. The total size is bounded
+with least-recently-used eviction, and each instance counts its hits and
+misses.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import warnings
+import zlib
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+PROJECT_DIR = Path(__file__).parent.parent
+DEFAULT_CACHE_PATH = PROJECT_DIR / ".cache" / "llm.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+def response_key(scope: str, prompt: str, llm_string: str) -> str:
+    """Content address of a request: SHA-256 of its endpoint, model string and messages."""
+    digest = hashlib.sha256()
+    for part in (scope, llm_string, prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    SQLite-backed chat response cache with LRU eviction and hit counters.
+
+    Args:
+        path: SQLite file, or ":memory:" (default: .cache/llm.sqlite)
+        max_bytes: Total size budget before LRU eviction (default 256 MB)
+        scope: Kept in every key; the API endpoint, which LangChain's model
+            string leaves out
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None, scope: str = ""):
+        if path is None:
+            path = str(DEFAULT_CACHE_PATH)
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else 256 * 1024 * 1024
+        self.scope = scope
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Any]]:
+        """The cached generations for a request, marked as recently used, or None."""
+        key = response_key(self.scope, prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return loads(zlib.decompress(row[0]).decode("utf-8"), allowed_objects="core")
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Any]):
+        """Store (or replace) the generations for a request, then evict down to the size budget."""
+        blob = zlib.compress(dumps(list(return_val)).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (response_key(self.scope, prompt, llm_string), blob, len(blob), now, now),
+            )
+            self.writes += 1
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, **kwargs: Any):
+        """Delete every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus current entry count and size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._conn.close()
@@ -0,0 +1,240 @@
+"""
+Research Store
+
+Append-only SQLite store of the findings gathered by researchers. Graph state
+only carries the run id and the ids of the records in play, so checkpoints
+stay small no matter how much research accumulates, and the writer can pick
+the records relevant to a request instead of slicing one big string.
+
+Each record holds the subtopic it was researched for, its source URL, the
+text, its token count and an optional embedding slot for semantic ranking.
+Records are never modified once written (apart from filling the embedding
+slot); compaction adds new records and changes which ids the state points to.
+
+Each run's records are indexed with BM25 as they are added, so select() can
+return the records most relevant to feedback or instructions.
+"""
+
+import array
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .retrieval import BM25Index
+from .tokens import count_tokens
+
+PROJECT_DIR = Path(__file__).parent.parent
+DEFAULT_STORE_PATH = PROJECT_DIR / ".cache" / "research.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    subtopic TEXT NOT NULL,
+    url TEXT NOT NULL,
+    text TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    embedding BLOB,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_run ON records (run_id);
+"""
+
+# Runs whose BM25 index is kept in memory
+MAX_INDEXED_RUNS = 16
+
+_URL = re.compile(r"https?://[^\s)\]>\"']+")
+_WORD = re.compile(r"\w+")
+
+# Paragraphs shorter than this are headings and join the next paragraph
+_MIN_FINDING_WORDS = 12
+
+
+@dataclass
+class ResearchRecord:
+    """One finding as stored in the ResearchStore."""
+    id: int
+    run_id: str
+    subtopic: str
+    url: str
+    text: str
+    tokens: int
+    embedding: Optional[List[float]] = None
+
+    def render(self) -> str:
+        """Text block used in prompts, headed by the record's subtopic and source."""
+        header = f"[{self.id}] {self.subtopic}"
+        if self.url:
+            header += f" ({self.url})"
+        return f"{header}\n{self.text}"
+
+
+def render_records(records: Iterable[ResearchRecord]) -> str:
+    """Join records into one prompt section."""
+    return "\n\n".join(record.render() for record in records)
+
+
+def split_findings(text: str) -> List[dict]:
+    """
+    Split a researcher's summary into findings: {"url", "text"} per paragraph.
+
+    Short paragraphs such as headings are joined to the paragraph after them.
+    The URL is the first link in the paragraph, if any.
+    """
+    findings = []
+    pending = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pending = f"{pending}\n{paragraph}" if pending else paragraph
+        if len(_WORD.findall(pending)) >= _MIN_FINDING_WORDS:
+            findings.append(pending)
+            pending = ""
+    if pending:
+        if findings:
+            findings[-1] = f"{findings[-1]}\n\n{pending}"
+        else:
+            findings.append(pending)
+
+    result = []
+    for finding in findings:
+        match = _URL.search(finding)
+        result.append({"url": match.group(0).rstrip(".,;:") if match else "", "text": finding})
+    return result
+
+
+class ResearchStore:
+    """
+    SQLite-backed, append-only store of research records.
+
+    Args:
+        path: SQLite file, or ":memory:" (default: $RESEARCH_STORE_PATH or .cache/research.sqlite)
+        ttl: Records older than this many seconds are deleted on open
+            (default: $RESEARCH_STORE_TTL or 7 days)
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        if path is None:
+            path = os.getenv("RESEARCH_STORE_PATH", str(DEFAULT_STORE_PATH))
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl if ttl is not None else float(os.getenv("RESEARCH_STORE_TTL", str(7 * 86400)))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute("DELETE FROM records WHERE created_at < ?", (time.time() - self.ttl,))
+        self._indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+
+    def add(self, run_id: str, subtopic: str, text: str, url: str = "") -> int:
+        """Append a record and return its id."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO records (run_id, subtopic, url, text, tokens, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, subtopic, url, text, count_tokens(text), time.time()),
+            )
+            if run_id in self._indexes:
+                self._indexes[run_id].add(cursor.lastrowid, f"{subtopic}\n{text}")
+        return cursor.lastrowid
+
+    def add_findings(self, run_id: str, subtopic: str, text: str) -> List[int]:
+        """Split a researcher's summary with split_findings() and append each finding."""
+        return [self.add(run_id, subtopic, f["text"], f["url"]) for f in split_findings(text)]
+
+    def get(self, ids: Sequence[int]) -> List[ResearchRecord]:
+        """Records for `ids`, in the same order; unknown ids are skipped."""
+        if not ids:
+            return []
+        by_id: Dict[int, ResearchRecord] = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                batch = list(ids[start:start + 500])
+                rows = self._conn.execute(
+                    "SELECT id, run_id, subtopic, url, text, tokens, embedding FROM records "
+                    f"WHERE id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for row in rows:
+                    embedding = array.array("f", row[6]).tolist() if row[6] else None
+                    by_id[row[0]] = ResearchRecord(*row[:6], embedding=embedding)
+        return [by_id[i] for i in ids if i in by_id]
+
+    def set_embedding(self, record_id: int, embedding: Sequence[float]):
+        """Fill the embedding slot of a record (stored as float32)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE records SET embedding = ? WHERE id = ?",
+                (array.array("f", embedding).tobytes(), record_id),
+            )
+
+    def index(self, run_id: str) -> BM25Index:
+        """BM25 index of a run's records, loaded on first use and then kept up to date by add()."""
+        with self._lock:
+            index = self._indexes.get(run_id)
+            if index is None:
+                index = BM25Index()
+                for record_id, subtopic, text in self._conn.execute(
+                    "SELECT id, subtopic, text FROM records WHERE run_id = ? ORDER BY id", (run_id,)
+                ):
+                    index.add(record_id, f"{subtopic}\n{text}")
+                self._indexes[run_id] = index
+                while len(self._indexes) > MAX_INDEXED_RUNS:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(run_id)
+        return index
+
+    def select(self, ids: Sequence[int], query: str, max_tokens: int, k: Optional[int] = None) -> List[ResearchRecord]:
+        """
+        The records among `ids` most relevant to `query` that fit in `max_tokens`.
+
+        Records are ranked by BM25 score against their run's index and taken
+        greedily while they fit (at most `k` of them); records that don't match
+        the query at all are left out. The result keeps the order of `ids`.
+        """
+        records = self.get(ids)
+        scores: Dict[int, float] = {}
+        for run_id in {r.run_id for r in records}:
+            run_ids = [r.id for r in records if r.run_id == run_id]
+            scores.update(self.index(run_id).search(query, doc_ids=run_ids))
+
+        ranked = sorted((r for r in records if r.id in scores), key=lambda r: -scores[r.id])
+        chosen, used = set(), 0
+        for record in ranked:
+            if k is not None and len(chosen) >= k:
+                break
+            if used + record.tokens <= max_tokens:
+                chosen.add(record.id)
+                used += record.tokens
+        return [r for r in records if r.id in chosen]
+
+    def close(self):
+        with self._lock:
+            self._indexes.clear()
+            self._conn.close()
+
+
+_store: Optional[ResearchStore] = None
+
+
+def get_research_store() -> ResearchStore:
+    """Return the process-wide ResearchStore, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = ResearchStore()
+    return _store
+
+
+def close_research_store():
+    """Close the process-wide ResearchStore."""
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,89 @@
+"""
+BM25 Retrieval
+
+Small in-process Okapi BM25 index. Documents are added one at a time as
+research arrives, so the index never needs a rebuild, and a search can be
+restricted to a subset of documents (e.g. the records currently in play).
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STOPWORDS = frozenset({
+    "a", "about", "add", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "is", "it", "its", "make", "more", "of", "on", "or", "please", "that", "the", "this", "to",
+    "was", "what", "when", "where", "which", "who", "why", "with",
+})
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words of `text` without stopwords."""
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 index over integer document ids.
+
+    Args:
+        k1: Term frequency saturation
+        b: Document length normalization
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id: int, text: str):
+        """Index a document. Adding an id twice is a no-op."""
+        if doc_id in self._lengths:
+            return
+        terms = tokenize(text)
+        self._lengths[doc_id] = len(terms)
+        self._total_length += len(terms)
+        for term, count in Counter(terms).items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def search(self, query: str, k: Optional[int] = None, doc_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Rank documents matching `query`.
+
+        Args:
+            query: Free text
+            k: Return at most this many results (None = all matches)
+            doc_ids: Only consider these documents
+
+        Returns:
+            (doc_id, score) pairs with a positive score, best first
+        """
+        if not self._lengths:
+            return []
+        allowed = set(doc_ids) if doc_ids is not None else None
+        n = len(self._lengths)
+        average_length = self._total_length / n or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k] if k is not None else ranked
@@ -0,0 +1,92 @@
+"""
+Token Counting
+
+Token estimates used to budget prompts. Uses tiktoken with the encoding of
+MODEL_NAME when available; if tiktoken or its encoding files can't be loaded
+(e.g. offline), falls back to ~4 characters per token, which is close enough
+for budgeting English prose.
+"""
+
+import functools
+import os
+import re
+from typing import List, Optional
+
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model: Optional[str]):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+    except KeyError:
+        # Unknown or non-OpenAI model name
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            return None
+    except Exception:
+        # Encoding file not cached and not downloadable
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Number of tokens in `text` for `model` (default: MODEL_NAME).
+
+    Args:
+        text: Text to measure
+        model: Model whose tokenizer to use
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model or os.getenv("MODEL_NAME"))
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_by_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> List[str]:
+    """
+    Split text into chunks of at most `max_tokens`, breaking at paragraphs.
+
+    Paragraphs longer than the budget are split by lines, then cut by
+    characters as a last resort.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+            current.clear()
+            current_tokens = 0
+
+    for paragraph in _PARAGRAPH.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph, model)
+        if tokens > max_tokens:
+            flush()
+            if "\n" in paragraph:
+                chunks.extend(split_by_tokens("\n\n".join(paragraph.splitlines()), max_tokens, model))
+            else:
+                step = max_tokens * CHARS_PER_TOKEN
+                chunks.extend(paragraph[i:i + step] for i in range(0, len(paragraph), step))
+            continue
+        if current_tokens + tokens > max_tokens:
+            flush()
+        current.append(paragraph)
+        current_tokens += tokens
+
+    flush()
+    return chunks